@@ -6,7 +6,10 @@ from datetime import datetime
 from pydantic import BaseModel
 from app.db.database import get_db
 from app.models.models import User
-from app.core.security import verify_password, create_access_token, hash_password
+from app.core.security import (
+    verify_password_async, create_access_token,
+    oauth2_scheme, revoke_token, token_cache, get_current_user, CurrentUser,
+)
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -22,7 +25,7 @@ class TokenResponse(BaseModel):
 async def login(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.username == form.username))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(form.password, user.hashed_password):
+    if not user or not await verify_password_async(form.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account disabled")
@@ -40,6 +43,17 @@ async def login(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession =
         role=role,
     )
 
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    """Revoke the caller's token for the rest of its lifetime."""
+    await revoke_token(token)
+    return {"status": "logged_out"}
+
+@router.get("/token-cache-stats")
+async def token_cache_stats(user: CurrentUser = Depends(get_current_user)):
+    """Token cache hit rate and average per-request auth overhead."""
+    return token_cache.stats()
+
 class ChangePasswordRequest(BaseModel):
     current_password: str
     new_password: str
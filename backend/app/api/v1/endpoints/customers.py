@@ -16,36 +16,17 @@ from pydantic import BaseModel, Field
 
 from app.db.database import get_db
 from app.models.models import Customer, CreditTransaction, SalesOrder, CreditStatus
+from app.core.serialization import ORJSONResponse
+from app.services.pagination import apply_keyset, next_cursor, set_next_cursor
+from app.services.serializers import (
+    CUSTOMER_FIELDS, CUSTOMER_VIEWS, ORDER_FIELDS, CREDIT_TRANSACTION_FIELDS, select_fields,
+)
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
 
 def _customer_dict(c: Customer) -> dict:
-    return {
-        "id": str(c.id),
-        "code": c.code,
-        "customer_type": c.customer_type,
-        "name": c.name,
-        "phone": c.phone,
-        "email": c.email,
-        "address": c.address,
-        "district": c.district,
-        "province": c.province,
-        "postal_code": c.postal_code,
-        "tax_id": c.tax_id,
-        "farm_area_rai": float(c.farm_area_rai) if c.farm_area_rai is not None else None,
-        "crop_types": c.crop_types or [],
-        "credit_limit": float(c.credit_limit) if c.credit_limit is not None else 0,
-        "credit_balance": float(c.credit_balance) if c.credit_balance is not None else 0,
-        "credit_days": c.credit_days,
-        "credit_status": c.credit_status if c.credit_status else "active",
-        "loyalty_points": c.loyalty_points,
-        "total_purchases": float(c.total_purchases) if c.total_purchases is not None else 0,
-        "is_active": c.is_active,
-        "notes": c.notes,
-        "created_at": c.created_at.isoformat() if c.created_at else None,
-        "updated_at": c.updated_at.isoformat() if c.updated_at else None,
-    }
+    return CUSTOMER_FIELDS.from_object(c)
 
 
 # ─── SCHEMAS ─────────────────────────────────────────────────
@@ -98,10 +79,18 @@ async def list_customers(
     is_active: bool = True,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """List customers with filters."""
-    query = select(Customer).where(Customer.is_active == is_active)
+    """
+    List customers with filters, by name (keyset via ?cursor=).
+    ?view=pos|admin or ?fields=id,name,... limit the columns fetched.
+    """
+    serializer = select_fields(CUSTOMER_VIEWS, view, fields)
+    keys = (Customer.name, Customer.id)
+    query = serializer.select(*keys).where(Customer.is_active == is_active)
     if search:
         from sqlalchemy import or_
         query = query.where(
@@ -116,8 +105,13 @@ async def list_customers(
     if has_overdue:
         query = query.where(Customer.credit_status == CreditStatus.overdue)
 
-    result = await db.execute(query.order_by(Customer.name).limit(limit).offset(offset))
-    return result.scalars().all()
+    query = apply_keyset(query, keys, cursor).limit(limit)
+    if not cursor:
+        query = query.offset(offset)
+    rows = (await db.execute(query)).all()
+    response = ORJSONResponse(serializer.rows(rows))
+    set_next_cursor(response, next_cursor(rows, keys, limit))
+    return response
 
 
 @router.post("", status_code=201)
@@ -242,17 +236,18 @@ async def customer_purchase_history(
     customer_id: str,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get customer purchase history."""
-    result = await db.execute(
-        select(SalesOrder)
-        .where(SalesOrder.customer_id == uuid.UUID(customer_id))
-        .order_by(SalesOrder.order_date.desc())
-        .limit(limit)
-        .offset(offset)
-    )
-    orders = result.scalars().all()
+    """Get customer purchase history, newest first (keyset via ?cursor=)."""
+    keys = (SalesOrder.order_date, SalesOrder.id)
+    query = apply_keyset(
+        ORDER_FIELDS.select().where(SalesOrder.customer_id == uuid.UUID(customer_id)),
+        keys, cursor, descending=True,
+    ).limit(limit)
+    if not cursor:
+        query = query.offset(offset)
+    orders = (await db.execute(query)).all()
 
     # Totals
     totals = await db.execute(
@@ -262,11 +257,12 @@ async def customer_purchase_history(
         ).where(SalesOrder.customer_id == uuid.UUID(customer_id))
     )
     row = totals.one()
-    return {
+    return ORJSONResponse({
         "total_orders": row.total_orders or 0,
         "total_spent": float(row.total_spent or 0),
-        "orders": orders,
-    }
+        "orders": ORDER_FIELDS.rows(orders),
+        "next_cursor": next_cursor(orders, keys, limit),
+    })
 
 
 @router.get("/{customer_id}/credit-transactions")
@@ -277,9 +273,9 @@ async def customer_credit_transactions(
 ):
     """Get credit transaction history for a customer."""
     result = await db.execute(
-        select(CreditTransaction)
+        CREDIT_TRANSACTION_FIELDS.select()
         .where(CreditTransaction.customer_id == uuid.UUID(customer_id))
         .order_by(CreditTransaction.created_at.desc())
         .limit(limit)
     )
-    return result.scalars().all()
+    return ORJSONResponse(CREDIT_TRANSACTION_FIELDS.rows(result.all()))
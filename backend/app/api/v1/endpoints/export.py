@@ -0,0 +1,190 @@
+"""
+Data Export API
+- Sales orders and order lines
+- Stock ledger
+- Customer credit history
+- Incremental Parquet sales fact dataset for offline analytics
+Row exports stream as CSV or NDJSON (?format=) without paging.
+"""
+import uuid
+from pathlib import Path
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Query
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import ReportSessionLocal
+from app.models.models import (
+    SalesOrder, SalesOrderItem, Product, Customer, Warehouse,
+    StockTransaction, CreditTransaction, OrderStatus,
+)
+from app.services.date_range import between_days
+from app.services.exporter import stream_export
+from app.services.sales_parquet import export_sales_facts, load_watermark
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+FORMAT = Query(default="csv", pattern="^(csv|ndjson)$")
+
+
+# ─── ENDPOINTS ───────────────────────────────────────────────
+@router.get("/sales")
+async def export_sales(
+    format: str = FORMAT,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+):
+    """Sales order headers, oldest first."""
+    query = (
+        select(
+            SalesOrder.order_number,
+            SalesOrder.order_date,
+            SalesOrder.status,
+            Customer.code.label("customer_code"),
+            Customer.name.label("customer_name"),
+            Warehouse.code.label("warehouse_code"),
+            SalesOrder.subtotal,
+            SalesOrder.discount_amount,
+            SalesOrder.tax_amount,
+            SalesOrder.total_amount,
+            SalesOrder.paid_amount,
+            SalesOrder.payment_method,
+            SalesOrder.payment_status,
+            SalesOrder.is_credit_sale,
+        )
+        .outerjoin(Customer, SalesOrder.customer_id == Customer.id)
+        .outerjoin(Warehouse, SalesOrder.warehouse_id == Warehouse.id)
+        .where(between_days(SalesOrder.order_date, date_from, date_to))
+        .order_by(SalesOrder.order_date, SalesOrder.id)
+    )
+    if status:
+        query = query.where(SalesOrder.status == status)
+    return await stream_export(query, format, "sales")
+
+
+@router.get("/sales-items")
+async def export_sales_items(
+    format: str = FORMAT,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """Line items of completed orders, oldest first."""
+    query = (
+        select(
+            SalesOrder.order_number,
+            SalesOrder.order_date,
+            Product.code.label("product_code"),
+            Product.name.label("product_name"),
+            Product.unit,
+            SalesOrderItem.quantity,
+            SalesOrderItem.unit_price,
+            SalesOrderItem.discount_amount,
+            SalesOrderItem.tax_amount,
+            SalesOrderItem.total_amount,
+            SalesOrderItem.lot_number,
+        )
+        .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
+        .join(Product, SalesOrderItem.product_id == Product.id)
+        .where(
+            SalesOrder.status == OrderStatus.completed,
+            between_days(SalesOrder.order_date, date_from, date_to),
+        )
+        .order_by(SalesOrder.order_date, SalesOrder.id, SalesOrderItem.id)
+    )
+    return await stream_export(query, format, "sales_items")
+
+
+@router.get("/stock-ledger")
+async def export_stock_ledger(
+    format: str = FORMAT,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    product_id: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+):
+    """Stock transactions, oldest first."""
+    query = (
+        select(
+            StockTransaction.created_at,
+            StockTransaction.reference_no,
+            StockTransaction.transaction_type,
+            Product.code.label("product_code"),
+            Product.name.label("product_name"),
+            Warehouse.code.label("warehouse_code"),
+            StockTransaction.quantity,
+            StockTransaction.unit_cost,
+            StockTransaction.total_cost,
+            StockTransaction.before_quantity,
+            StockTransaction.after_quantity,
+            StockTransaction.lot_number,
+            StockTransaction.expiry_date,
+            StockTransaction.notes,
+        )
+        .join(Product, StockTransaction.product_id == Product.id)
+        .join(Warehouse, StockTransaction.warehouse_id == Warehouse.id)
+        .where(between_days(StockTransaction.created_at, date_from, date_to))
+        .order_by(StockTransaction.created_at, StockTransaction.id)
+    )
+    if product_id:
+        query = query.where(StockTransaction.product_id == uuid.UUID(product_id))
+    if transaction_type:
+        query = query.where(StockTransaction.transaction_type == transaction_type)
+    return await stream_export(query, format, "stock_ledger")
+
+
+@router.get("/credit-history")
+async def export_credit_history(
+    format: str = FORMAT,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    customer_id: Optional[str] = None,
+):
+    """Customer credit transactions, oldest first."""
+    query = (
+        select(
+            CreditTransaction.created_at,
+            Customer.code.label("customer_code"),
+            Customer.name.label("customer_name"),
+            CreditTransaction.transaction_type,
+            SalesOrder.order_number,
+            CreditTransaction.amount,
+            CreditTransaction.balance_before,
+            CreditTransaction.balance_after,
+            CreditTransaction.due_date,
+            CreditTransaction.paid_date,
+            CreditTransaction.notes,
+        )
+        .join(Customer, CreditTransaction.customer_id == Customer.id)
+        .outerjoin(SalesOrder, CreditTransaction.order_id == SalesOrder.id)
+        .where(between_days(CreditTransaction.created_at, date_from, date_to))
+        .order_by(CreditTransaction.created_at, CreditTransaction.id)
+    )
+    if customer_id:
+        query = query.where(CreditTransaction.customer_id == uuid.UUID(customer_id))
+    return await stream_export(query, format, "credit_history")
+
+
+@router.post("/sales-parquet")
+async def run_sales_parquet_export():
+    """Append completed orders since the last run to the Parquet dataset."""
+    async with ReportSessionLocal() as db:
+        summary = await export_sales_facts(db)
+        await db.commit()
+    return summary
+
+
+@router.get("/sales-parquet")
+async def sales_parquet_status():
+    """Watermark and partitions of the Parquet sales dataset."""
+    root = Path(settings.PARQUET_EXPORT_DIR)
+    mark = load_watermark(root)
+    partitions = sorted(p.name.split("=", 1)[1] for p in root.glob("sale_date=*")) if root.is_dir() else []
+    return {
+        "output_dir": str(root),
+        "watermark": mark.as_of.isoformat() if mark else None,
+        "partitions": len(partitions),
+        "first_date": partitions[0] if partitions else None,
+        "last_date": partitions[-1] if partitions else None,
+    }
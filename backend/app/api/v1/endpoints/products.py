@@ -8,10 +8,8 @@ Product Management API
 import uuid
 import io
 import base64
-import aiofiles
-from pathlib import Path
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, func
 from pydantic import BaseModel, Field
@@ -19,39 +17,24 @@ from decimal import Decimal
 
 from app.db.database import get_db
 from app.models.models import Product, ProductImage, Stock, Warehouse, Category, Supplier
-from app.services.qr_service import generate_product_qr
+from app.services.qr_service import product_qr_payload, render_product_qr
+from app.services.cache_service import scan_cache, catalog_versions
+from app.services.conditional import check_etag, etag_headers
+from app.services.image_service import store_product_image
+from app.services.product_search import apply_product_search
+from app.services.pagination import apply_keyset, next_cursor, set_next_cursor
+from app.services.serializers import (
+    PRODUCT_FIELDS, PRODUCT_VIEWS, CATALOG_CHANGE_FIELDS, CATEGORY_FIELDS, select_fields,
+)
 from app.core.config import settings
+from app.core.serialization import ORJSONResponse
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
 def _product_dict(p: Product) -> dict:
-    """Serialize a Product SQLAlchemy model to a safe dict (no lazy-load)."""
-    return {
-        "id": str(p.id),
-        "code": p.code,
-        "barcode": p.barcode,
-        "name": p.name,
-        "name_en": p.name_en,
-        "category_id": str(p.category_id) if p.category_id else None,
-        "supplier_id": str(p.supplier_id) if p.supplier_id else None,
-        "unit": p.unit,
-        "unit_per_pack": float(p.unit_per_pack) if p.unit_per_pack is not None else 1,
-        "cost_price": float(p.cost_price) if p.cost_price is not None else 0,
-        "selling_price": float(p.selling_price) if p.selling_price is not None else 0,
-        "min_selling_price": float(p.min_selling_price) if p.min_selling_price is not None else None,
-        "tax_rate": float(p.tax_rate) if p.tax_rate is not None else 7.0,
-        "description": p.description,
-        "min_stock_level": p.min_stock_level,
-        "reorder_point": p.reorder_point,
-        "is_active": p.is_active,
-        "chemical_registration": p.chemical_registration,
-        "expiry_tracking": p.expiry_tracking,
-        "main_image_url": p.main_image_url,
-        "qr_code": p.qr_code,
-        "created_at": p.created_at.isoformat() if p.created_at else None,
-        "updated_at": p.updated_at.isoformat() if p.updated_at else None,
-    }
+    """Serialize a loaded Product (no lazy-load); values are encoded by ORJSONResponse."""
+    return PRODUCT_FIELDS.from_object(p)
 
 
 # ─── SCHEMAS ─────────────────────────────────────────────────
@@ -91,6 +74,7 @@ class ProductUpdate(BaseModel):
 # ─── ENDPOINTS ───────────────────────────────────────────────
 @router.get("")
 async def list_products(
+    request: Request,
     search: Optional[str] = None,
     category_id: Optional[str] = None,
     supplier_id: Optional[str] = None,
@@ -98,25 +82,43 @@ async def list_products(
     is_active: bool = True,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """List products with filters and pagination."""
-    query = select(Product).where(Product.is_active == is_active)
-    if search:
-        query = query.where(
-            or_(
-                Product.name.ilike(f"%{search}%"),
-                Product.code.ilike(f"%{search}%"),
-                Product.barcode.ilike(f"%{search}%"),
-            )
-        )
+    """
+    List products with filters and pagination.
+    Search results are ranked by relevance; passing ?cursor= switches to
+    keyset paging by (name, id) with X-Next-Cursor in the response.
+    ?view=pos|admin or ?fields=id,name,... limit the columns fetched.
+    Honours If-None-Match (weak ETag from the catalog version).
+    """
+    serializer = select_fields(PRODUCT_VIEWS, view, fields)
+    etag, not_modified = await check_etag(request, "products")
+    if not_modified:
+        return not_modified
+    keys = (Product.name, Product.id)
+    query = serializer.select(*keys).where(Product.is_active == is_active)
+    query, rank = apply_product_search(query, search)
     if category_id:
         query = query.where(Product.category_id == uuid.UUID(category_id))
     if supplier_id:
         query = query.where(Product.supplier_id == uuid.UUID(supplier_id))
 
-    result = await db.execute(query.order_by(Product.name).limit(limit).offset(offset))
-    return result.scalars().all()
+    if rank is not None and cursor is None:
+        query = query.order_by(rank.desc(), *keys)
+    else:
+        query = apply_keyset(query, keys, cursor)
+    query = query.limit(limit)
+    if not cursor:
+        query = query.offset(offset)
+
+    rows = (await db.execute(query)).all()
+    response = ORJSONResponse(serializer.rows(rows), headers=etag_headers(etag))
+    if rank is None or cursor is not None:
+        set_next_cursor(response, next_cursor(rows, keys, limit))
+    return response
 
 
 @router.post("", status_code=201)
@@ -148,9 +150,8 @@ async def create_product(payload: ProductCreate, db: AsyncSession = Depends(get_
     db.add(product)
     await db.flush()
 
-    # Generate product QR
-    qr_result = generate_product_qr(str(product.id), product.code)
-    product.qr_code = qr_result["qr_data"]
+    # Product QR content (the image is rendered on demand by /{id}/qr)
+    product.qr_code = product_qr_payload(str(product.id), product.code)
 
     # Initialize stock for all warehouses
     warehouses = await db.execute(select(Warehouse).where(Warehouse.is_active == True))
@@ -160,17 +161,63 @@ async def create_product(payload: ProductCreate, db: AsyncSession = Depends(get_
 
     await db.commit()
     await db.refresh(product)
+    await scan_cache.invalidate()
+    await catalog_versions.bump("products", "stock")
     return _product_dict(product)
 
 
+@router.get("/changes")
+async def product_changes(
+    since: int = 0,
+    limit: int = Query(default=1000, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Products changed after row_version `since`, in version order, for
+    client-side catalog replicas. Inactive products are included so
+    replicas can drop them. Pass the returned `version` back as `since`
+    until `has_more` is false.
+
+    Product writers serialize on an advisory lock and draw versions while
+    holding it (see bump_product_row_version), so versions become visible
+    in order: no transaction still in flight can commit a version below
+    one returned here.
+    """
+    query = (
+        CATALOG_CHANGE_FIELDS.select()
+        .where(Product.row_version > since)
+        .order_by(Product.row_version)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return ORJSONResponse({
+        "version": rows[-1].row_version if rows else since,
+        "has_more": has_more,
+        "products": CATALOG_CHANGE_FIELDS.rows(rows),
+    })
+
+
 @router.get("/scan")
 async def scan_product(
     code: str,  # barcode or QR code value
     db: AsyncSession = Depends(get_db)
 ):
     """Look up a product by scanning barcode or QR code."""
+    cached = await scan_cache.get(code)
+    if cached.hit:
+        return ORJSONResponse(cached.value)
+
+    # Product and its total stock in one round trip
+    total_stock = (
+        select(func.coalesce(func.sum(Stock.quantity), 0))
+        .where(Stock.product_id == Product.id)
+        .correlate(Product)
+        .scalar_subquery()
+    )
     result = await db.execute(
-        select(Product).where(
+        PRODUCT_FIELDS.select().add_columns(total_stock.label("total_stock")).where(
             or_(
                 Product.barcode == code,
                 Product.qr_code == code,
@@ -178,35 +225,36 @@ async def scan_product(
             )
         )
     )
-    product = result.scalar_one_or_none()
-    if not product:
+    row = result.one_or_none()
+    if not row:
         raise HTTPException(404, "Product not found for this code")
 
-    # Include current stock
-    stock_result = await db.execute(
-        select(Stock).where(Stock.product_id == product.id)
-    )
-    stocks = stock_result.scalars().all()
-    total_qty = sum(s.quantity for s in stocks)
-
-    return {
-        "product": _product_dict(product),
-        "total_stock": float(total_qty),
+    data = {
+        "product": PRODUCT_FIELDS.row(row[:-1]),
+        "total_stock": float(row.total_stock),
     }
+    await scan_cache.set(code, data, cached.version)
+    return ORJSONResponse(data)
+
+
+@router.get("/scan/cache-stats")
+async def scan_cache_stats():
+    """Hit/miss counters for the scan lookup cache."""
+    return scan_cache.stats()
 
 
 @router.get("/categories")
-async def list_categories(db: AsyncSession = Depends(get_db)):
-    """List all active product categories."""
+async def list_categories(request: Request, db: AsyncSession = Depends(get_db)):
+    """List all active product categories (honours If-None-Match)."""
+    etag, not_modified = await check_etag(request, "categories")
+    if not_modified:
+        return not_modified
     result = await db.execute(
-        select(Category)
+        CATEGORY_FIELDS.select()
         .where(Category.is_active == True)
         .order_by(Category.sort_order, Category.name)
     )
-    return [
-        {"id": str(c.id), "name": c.name, "name_en": c.name_en, "sort_order": c.sort_order}
-        for c in result.scalars().all()
-    ]
+    return ORJSONResponse(CATEGORY_FIELDS.rows(result.all()), headers=etag_headers(etag))
 
 
 @router.get("/{product_id}")
@@ -228,6 +276,8 @@ async def update_product(product_id: str, payload: ProductUpdate, db: AsyncSessi
         setattr(product, field, value)
     await db.commit()
     await db.refresh(product)
+    await scan_cache.invalidate()
+    await catalog_versions.bump("products")
     return _product_dict(product)
 
 
@@ -238,7 +288,10 @@ async def upload_product_image(
     is_primary: bool = Form(False),
     db: AsyncSession = Depends(get_db)
 ):
-    """Upload an image for a product. Stored in DB as bytea and as file."""
+    """
+    Upload an image for a product. The original and WebP thumbnails are
+    stored as content-hashed files; bytea copy only if STORE_IMAGE_BYTEA.
+    """
     product = await db.get(Product, uuid.UUID(product_id))
     if not product:
         raise HTTPException(404, "Product not found")
@@ -250,29 +303,26 @@ async def upload_product_image(
     if len(content) > settings.MAX_FILE_SIZE:
         raise HTTPException(400, "File too large")
 
-    # Save to disk
-    upload_path = Path(settings.UPLOAD_DIR) / "products" / product_id
-    upload_path.mkdir(parents=True, exist_ok=True)
-    filename = f"{uuid.uuid4().hex}_{file.filename}"
-    file_path = upload_path / filename
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
-
-    image_url = f"/uploads/products/{product_id}/{filename}"
+    image_url, thumbnails = await store_product_image(product_id, content, file.content_type)
 
     img = ProductImage(
         product_id=product.id,
         image_url=image_url,
-        image_data=content,
+        image_data=content if settings.STORE_IMAGE_BYTEA else None,
+        thumbnails=thumbnails,
         is_primary=is_primary,
     )
     db.add(img)
 
     if is_primary:
         product.main_image_url = image_url
+        product.thumbnails = thumbnails
 
     await db.commit()
-    return {"image_url": image_url, "is_primary": is_primary}
+    if is_primary:
+        await scan_cache.invalidate()
+        await catalog_versions.bump("products")
+    return {"image_url": image_url, "thumbnails": thumbnails, "is_primary": is_primary}
 
 
 @router.get("/{product_id}/qr")
@@ -281,5 +331,4 @@ async def get_product_qr(product_id: str, db: AsyncSession = Depends(get_db)):
     product = await db.get(Product, uuid.UUID(product_id))
     if not product:
         raise HTTPException(404, "Product not found")
-    qr_result = generate_product_qr(product_id, product.code)
-    return qr_result
+    return await render_product_qr(product_id, product.code)
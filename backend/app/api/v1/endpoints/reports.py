@@ -8,87 +8,110 @@ Reports & Analytics API
 import uuid
 from datetime import datetime, date, timedelta
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, cast, Date
+from sqlalchemy import select, func, and_, cast, Date, true
 
-from app.db.database import get_db
+from app.db.database import get_db, AsyncSessionLocal
+from app.core.security import CurrentUser, get_current_user
+from app.services.cache_service import dashboard_cache
+from app.services.date_range import between_days, local_date, shop_today
+from app.services.report_jobs import report_jobs
+from app.services.sales_analytics import sales_facts, SalesFacts
 from app.models.models import (
     SalesOrder, SalesOrderItem, Product, Customer,
-    Stock, CreditTransaction, PaymentTransaction, OrderStatus
+    Stock, CreditTransaction, PaymentTransaction, OrderStatus, DailySalesRollup
 )
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
+def _rollup_days(date_from: date, date_to: date):
+    return and_(DailySalesRollup.sale_date >= date_from, DailySalesRollup.sale_date <= date_to)
+
+
+def _default_range(date_from: Optional[date], date_to: Optional[date]):
+    return date_from or shop_today() - timedelta(days=30), date_to or shop_today()
+
+
+async def _columnar_facts(response: Response) -> SalesFacts:
+    """Loaded Parquet fact snapshot; X-Data-As-Of tells clients how fresh it is."""
+    facts = await sales_facts.get()
+    if facts.as_of:
+        response.headers["X-Data-As-Of"] = facts.as_of.isoformat()
+    return facts
+
+
 @router.get("/dashboard")
-async def dashboard_summary(db: AsyncSession = Depends(get_db)):
-    """Get today's dashboard KPIs."""
-    today = date.today()
+async def dashboard_summary(
+    source: str = Query(default="rollup", pattern="^(rollup|raw)$"),
+):
+    """Get today's dashboard KPIs (cached for DASHBOARD_CACHE_TTL seconds)."""
+    return await dashboard_cache.get_or_compute(source, lambda: _dashboard_kpis(source))
+
+
+async def _dashboard_kpis(source: str) -> dict:
+    """All dashboard KPIs in a single statement."""
+    today = shop_today()
     month_start = today.replace(day=1)
 
-    # Today's sales
-    today_result = await db.execute(
-        select(
-            func.count(SalesOrder.id).label("order_count"),
-            func.coalesce(func.sum(SalesOrder.total_amount), 0).label("total_sales"),
+    if source == "rollup":
+        # Today's and monthly sales from the daily rollup
+        is_today = DailySalesRollup.sale_date == today
+        sales = select(
+            func.coalesce(func.sum(DailySalesRollup.order_count).filter(is_today), 0).label("today_count"),
+            func.coalesce(func.sum(DailySalesRollup.total_amount).filter(is_today), 0).label("today_sales"),
+            func.coalesce(func.sum(DailySalesRollup.order_count), 0).label("month_count"),
+            func.coalesce(func.sum(DailySalesRollup.total_amount), 0).label("month_sales"),
+        ).where(_rollup_days(month_start, today))
+    else:
+        is_today = between_days(SalesOrder.order_date, today, today)
+        sales = select(
+            func.count(SalesOrder.id).filter(is_today).label("today_count"),
+            func.coalesce(func.sum(SalesOrder.total_amount).filter(is_today), 0).label("today_sales"),
+            func.count(SalesOrder.id).label("month_count"),
+            func.coalesce(func.sum(SalesOrder.total_amount), 0).label("month_sales"),
         ).where(
             and_(
-                func.date(SalesOrder.order_date) == today,
+                between_days(SalesOrder.order_date, month_start),
                 SalesOrder.status == OrderStatus.completed,
             )
         )
-    )
-    today_row = today_result.one()
+    sales = sales.cte("sales")
 
-    # Monthly sales
-    month_result = await db.execute(
-        select(
-            func.count(SalesOrder.id).label("order_count"),
-            func.coalesce(func.sum(SalesOrder.total_amount), 0).label("total_sales"),
-        ).where(
-            and_(
-                func.date(SalesOrder.order_date) >= month_start,
-                SalesOrder.status == OrderStatus.completed,
-            )
-        )
-    )
-    month_row = month_result.one()
+    # Outstanding and overdue credit
+    credit = select(
+        func.coalesce(func.sum(Customer.credit_balance), 0).label("total_credit"),
+        func.count(Customer.id).filter(Customer.credit_status == "overdue").label("overdue_count"),
+    ).cte("credit")
 
     # Low stock count
-    low_stock_result = await db.execute(
+    low_stock = (
         select(func.count()).select_from(Stock).join(Product).where(
             Stock.quantity <= Product.reorder_point
         )
-    )
-    low_stock_count = low_stock_result.scalar()
+    ).scalar_subquery()
 
-    # Outstanding credit
-    credit_result = await db.execute(
-        select(func.coalesce(func.sum(Customer.credit_balance), 0))
-    )
-    total_credit = credit_result.scalar()
-
-    # Overdue credit customers
-    overdue_result = await db.execute(
-        select(func.count()).select_from(Customer).where(
-            Customer.credit_status == "overdue"
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(sales, credit, low_stock.label("low_stock_count")).select_from(sales).join(credit, true())
         )
-    )
-    overdue_count = overdue_result.scalar()
+        row = result.one()
 
     return {
         "today": {
-            "order_count": today_row.order_count,
-            "total_sales": float(today_row.total_sales),
+            "order_count": int(row.today_count),
+            "total_sales": float(row.today_sales),
         },
         "this_month": {
-            "order_count": month_row.order_count,
-            "total_sales": float(month_row.total_sales),
+            "order_count": int(row.month_count),
+            "total_sales": float(row.month_sales),
         },
-        "low_stock_products": low_stock_count,
-        "total_outstanding_credit": float(total_credit),
-        "overdue_customers": overdue_count,
+        "low_stock_products": row.low_stock_count,
+        "total_outstanding_credit": float(row.total_credit),
+        "overdue_customers": row.overdue_count,
     }
 
 
@@ -96,38 +119,53 @@ async def dashboard_summary(db: AsyncSession = Depends(get_db)):
 async def daily_sales_report(
     date_from: date = Query(default=None),
     date_to: date = Query(default=None),
+    source: str = Query(default="rollup", pattern="^(rollup|raw)$"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Daily sales breakdown."""
+    """Daily sales breakdown. ?source=raw re-aggregates sales_orders for verification."""
     if not date_from:
-        date_from = date.today() - timedelta(days=30)
+        date_from = shop_today() - timedelta(days=30)
     if not date_to:
-        date_to = date.today()
+        date_to = shop_today()
 
-    result = await db.execute(
-        select(
-            func.date(SalesOrder.order_date).label("sale_date"),
-            func.count(SalesOrder.id).label("order_count"),
-            func.sum(SalesOrder.subtotal).label("subtotal"),
-            func.sum(SalesOrder.discount_amount).label("total_discount"),
-            func.sum(SalesOrder.tax_amount).label("total_tax"),
-            func.sum(SalesOrder.total_amount).label("total_sales"),
+    if source == "rollup":
+        sale_date = DailySalesRollup.sale_date
+        query = (
+            select(
+                sale_date.label("sale_date"),
+                func.sum(DailySalesRollup.order_count).label("order_count"),
+                func.sum(DailySalesRollup.subtotal).label("subtotal"),
+                func.sum(DailySalesRollup.discount_amount).label("total_discount"),
+                func.sum(DailySalesRollup.tax_amount).label("total_tax"),
+                func.sum(DailySalesRollup.total_amount).label("total_sales"),
+            )
+            .where(_rollup_days(date_from, date_to))
         )
-        .where(
-            and_(
-                func.date(SalesOrder.order_date) >= date_from,
-                func.date(SalesOrder.order_date) <= date_to,
-                SalesOrder.status == OrderStatus.completed,
+    else:
+        sale_date = local_date(SalesOrder.order_date)
+        query = (
+            select(
+                sale_date.label("sale_date"),
+                func.count(SalesOrder.id).label("order_count"),
+                func.sum(SalesOrder.subtotal).label("subtotal"),
+                func.sum(SalesOrder.discount_amount).label("total_discount"),
+                func.sum(SalesOrder.tax_amount).label("total_tax"),
+                func.sum(SalesOrder.total_amount).label("total_sales"),
+            )
+            .where(
+                and_(
+                    between_days(SalesOrder.order_date, date_from, date_to),
+                    SalesOrder.status == OrderStatus.completed,
+                )
             )
         )
-        .group_by(func.date(SalesOrder.order_date))
-        .order_by(func.date(SalesOrder.order_date))
-    )
+
+    result = await db.execute(query.group_by(sale_date).order_by(sale_date))
     rows = result.all()
     return [
         {
             "date": str(r.sale_date),
-            "order_count": r.order_count,
+            "order_count": int(r.order_count),
             "subtotal": float(r.subtotal or 0),
             "total_discount": float(r.total_discount or 0),
             "total_tax": float(r.total_tax or 0),
@@ -139,37 +177,46 @@ async def daily_sales_report(
 
 @router.get("/sales/top-products")
 async def top_products_report(
+    response: Response,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     limit: int = 20,
+    by: str = Query(default="revenue", pattern="^(revenue|quantity)$"),
+    engine: str = Query(default="sql", pattern="^(sql|columnar)$"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Top selling products by quantity and revenue."""
-    if not date_from:
-        date_from = date.today() - timedelta(days=30)
-    if not date_to:
-        date_to = date.today()
+    """
+    Top selling products by revenue or quantity.
+    ?engine=columnar answers from the Parquet snapshot instead of Postgres.
+    """
+    date_from, date_to = _default_range(date_from, date_to)
+    if engine == "columnar":
+        facts = await _columnar_facts(response)
+        return facts.top_products(date_from, date_to, limit, by)
 
+    total_qty = func.sum(SalesOrderItem.quantity)
+    total_revenue = func.sum(SalesOrderItem.total_amount)
     result = await db.execute(
         select(
             Product.id,
             Product.code,
             Product.name,
             Product.unit,
-            func.sum(SalesOrderItem.quantity).label("total_qty"),
-            func.sum(SalesOrderItem.total_amount).label("total_revenue"),
+            total_qty.label("total_qty"),
+            total_revenue.label("total_revenue"),
         )
         .join(SalesOrderItem, Product.id == SalesOrderItem.product_id)
         .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
         .where(
             and_(
-                func.date(SalesOrder.order_date) >= date_from,
-                func.date(SalesOrder.order_date) <= date_to,
+                between_days(SalesOrder.order_date, date_from, date_to),
                 SalesOrder.status == OrderStatus.completed,
             )
         )
         .group_by(Product.id, Product.code, Product.name, Product.unit)
-        .order_by(func.sum(SalesOrderItem.total_amount).desc())
+        .order_by(*[
+            col.desc() for col in ((total_revenue, total_qty) if by == "revenue" else (total_qty, total_revenue))
+        ], Product.id)
         .limit(limit)
     )
     rows = result.all()
@@ -186,9 +233,54 @@ async def top_products_report(
     ]
 
 
+@router.get("/sales/trend")
+async def sales_trend_report(
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    window: int = Query(default=7, ge=1, le=90),
+):
+    """Daily line revenue with a trailing moving average (Parquet snapshot)."""
+    date_from, date_to = _default_range(date_from, date_to)
+    facts = await _columnar_facts(response)
+    return facts.daily_trend(date_from, date_to, window)
+
+
+@router.get("/sales/abc")
+async def abc_analysis_report(
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    a_share: float = Query(default=0.8, gt=0, lt=1),
+    b_share: float = Query(default=0.95, gt=0, lt=1),
+):
+    """ABC classification of products by cumulative revenue share (Parquet snapshot)."""
+    if b_share <= a_share:
+        raise HTTPException(400, "b_share must be greater than a_share")
+    date_from, date_to = _default_range(date_from, date_to)
+    facts = await _columnar_facts(response)
+    return facts.abc_classes(date_from, date_to, a_share, b_share)
+
+
+@router.get("/sales/categories")
+async def category_sales_report(
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """Revenue and quantity per product category (Parquet snapshot)."""
+    date_from, date_to = _default_range(date_from, date_to)
+    facts = await _columnar_facts(response)
+    return facts.category_breakdown(date_from, date_to)
+
+
 @router.get("/credit/outstanding")
 async def outstanding_credit_report(db: AsyncSession = Depends(get_db)):
     """All customers with outstanding credit."""
+    return await _outstanding_credit(db)
+
+
+async def _outstanding_credit(db: AsyncSession) -> dict:
     result = await db.execute(
         select(Customer)
         .where(Customer.credit_balance > 0)
@@ -222,6 +314,10 @@ async def outstanding_credit_report(db: AsyncSession = Depends(get_db)):
 @router.get("/stock/valuation")
 async def stock_valuation_report(db: AsyncSession = Depends(get_db)):
     """Total stock value at cost price."""
+    return await _stock_valuation(db)
+
+
+async def _stock_valuation(db: AsyncSession) -> dict:
     result = await db.execute(
         select(
             Product.id,
@@ -262,3 +358,33 @@ async def stock_valuation_report(db: AsyncSession = Depends(get_db)):
             for r in rows
         ],
     }
+
+
+# ─── BACKGROUND JOBS ─────────────────────────────────────────
+report_jobs.register("outstanding_credit", _outstanding_credit)
+report_jobs.register("stock_valuation", _stock_valuation)
+
+
+class ReportJobCreate(BaseModel):
+    report: str
+
+
+@router.post("/jobs", status_code=202)
+async def create_report_job(payload: ReportJobCreate, user: CurrentUser = Depends(get_current_user)):
+    """Queue a heavy report; poll GET /reports/jobs/{id} for the result."""
+    return await report_jobs.submit(payload.report, str(user.id))
+
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(job_id: str, user: CurrentUser = Depends(get_current_user)):
+    """Job status while pending (202) or failed, or the stored result once done."""
+    job = await report_jobs.get(job_id)
+    # Other users' jobs look missing; admins can see every job
+    if not job or (job["requested_by"] != str(user.id) and user.role != "admin"):
+        raise HTTPException(404, "Report job not found")
+    if job["status"] == "done":
+        path = report_jobs.result_path(job["id"])
+        if not path.is_file():
+            raise HTTPException(410, "Report result has expired")
+        return FileResponse(path, media_type="application/json")
+    return JSONResponse(job, status_code=200 if job["status"] == "failed" else 202)
@@ -5,27 +5,35 @@ Sales Order API Endpoints
 - Process Payment (Cash, QR PromptPay)
 - Confirm Payment
 - Print Receipt
+- Idempotency-Key on order creation and payment, so tills can retry safely
+- Bulk ingestion of completed sales queued by offline terminals
 """
 import uuid
-from decimal import Decimal
-from datetime import datetime, date, timedelta
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime, date, timedelta, timezone
+from typing import Optional, List, Dict
+from fastapi import APIRouter, Depends, HTTPException, Header, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert
+from sqlalchemy.exc import DBAPIError
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.db.database import get_db
 from app.models.models import (
     SalesOrder, SalesOrderItem, PaymentTransaction, Product, Stock,
     Customer, CreditTransaction, OrderStatus, PaymentMethod, PaymentStatus
 )
-from app.services.qr_service import generate_promptpay_qr
-from app.core.security import decode_token
-from fastapi.security import OAuth2PasswordBearer
+from app.services.qr_service import render_promptpay_qr
+from app.services.stock_service import commit_sales_stock, default_warehouse_id
+from app.services.cache_service import catalog_versions
+from app.services import idempotency
+from app.services.sales_rollup import record_completed_orders
+from app.core.serialization import ORJSONResponse
+from app.services.pagination import apply_keyset, next_cursor, set_next_cursor
+from app.services.serializers import ORDER_FIELDS
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
 # ─── SCHEMAS ─────────────────────────────────────────────────
@@ -33,13 +41,13 @@ class OrderItemCreate(BaseModel):
     product_id: str
     quantity: Decimal = Field(gt=0)
     unit_price: Optional[Decimal] = None
-    discount_percent: Decimal = Field(default=0, ge=0, le=100)
+    discount_percent: Decimal = Field(default=Decimal("0"), ge=0, le=100)
 
 class OrderCreate(BaseModel):
     customer_id: Optional[str] = None
     warehouse_id: Optional[str] = None
     items: List[OrderItemCreate] = []
-    discount_percent: Decimal = Field(default=0, ge=0, le=100)
+    discount_percent: Decimal = Field(default=Decimal("0"), ge=0, le=100)
     notes: Optional[str] = None
     is_credit_sale: bool = False
 
@@ -48,6 +56,16 @@ class PaymentRequest(BaseModel):
     payment_method: PaymentMethod
     paid_amount: Optional[Decimal] = None  # for cash payment
 
+class BatchSale(OrderCreate):
+    """A sale completed at the till: order plus its cash or credit payment."""
+    idempotency_key: Optional[str] = Field(default=None, max_length=100)
+    payment_method: PaymentMethod = PaymentMethod.cash
+    paid_amount: Optional[Decimal] = None  # cash tendered; defaults to the total
+    sold_at: Optional[datetime] = None  # when the sale happened, for queued offline sales
+
+class BatchOrderRequest(BaseModel):
+    sales: List[BatchSale] = Field(min_length=1, max_length=settings.SALES_BATCH_MAX_ORDERS)
+
 class ConfirmPaymentRequest(BaseModel):
     transaction_ref: str
     bank_reference: Optional[str] = None
@@ -56,54 +74,292 @@ class ConfirmPaymentRequest(BaseModel):
 
 
 # ─── HELPERS ─────────────────────────────────────────────────
+CENTS = Decimal("0.01")
+# SQLSTATEs worth retrying: serialization failure, deadlock, lock timeout
+RETRYABLE_SQLSTATES = {"40001", "40P01", "55P03"}
+# SQLSTATE classes: connection, insufficient resources, operator intervention
+RETRYABLE_SQLSTATE_CLASSES = {"08", "53", "57"}
+
 def _generate_order_number() -> str:
     today = datetime.utcnow().strftime("%Y%m%d")
-    suffix = uuid.uuid4().hex[:4].upper()
+    suffix = uuid.uuid4().hex[:6].upper()
     return f"SO{today}{suffix}"
 
 def _generate_tx_ref() -> str:
     return f"TX{uuid.uuid4().hex[:12].upper()}"
 
+def _money(amount: Decimal) -> Decimal:
+    """Round to satang the way a Numeric(12, 2) column stores it."""
+    return amount.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+def _db_error_status(e: DBAPIError) -> int:
+    """
+    HTTP status for a database error on one sale: 503 for transient errors
+    the till should retry, 409/422 for sales the data refuses, else 500.
+    """
+    sqlstate = getattr(e.orig, "sqlstate", None) or ""
+    if e.connection_invalidated or sqlstate in RETRYABLE_SQLSTATES or sqlstate[:2] in RETRYABLE_SQLSTATE_CLASSES:
+        return 503
+    if sqlstate.startswith("23"):  # integrity constraint violation
+        return 409
+    if sqlstate.startswith("22"):  # data exception (out of range, bad value)
+        return 422
+    return 500
+
 async def _calculate_order_totals(items: list) -> dict:
     subtotal = sum(i["total_amount"] for i in items)
     tax_amount = sum(i["tax_amount"] for i in items)
     return {"subtotal": subtotal, "tax_amount": tax_amount}
 
-
-# ─── ENDPOINTS ───────────────────────────────────────────────
-@router.post("/orders", status_code=201)
-async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db)):
-    """Create a new sales order with items."""
-    order_items = []
+async def _apply_completion(db: AsyncSession, orders: List[SalesOrder]) -> None:
+    """
+    Side effects of completing orders, in the completing transaction.
+    Callers bump the "stock" catalog version once it has committed.
+    """
+    await commit_sales_stock(db, orders)
+    await record_completed_orders(db, orders)
+
+async def _load_products(db: AsyncSession, product_ids: List[str]) -> Dict[uuid.UUID, Product]:
+    """Resolve every product referenced by an order in a single query."""
+    ids = {uuid.UUID(pid) for pid in product_ids}
+    if not ids:
+        return {}
+    result = await db.execute(select(Product).where(Product.id.in_(ids)))
+    products = {p.id: p for p in result.scalars().all()}
+    missing = sorted(str(pid) for pid in ids - products.keys())
+    if missing:
+        raise HTTPException(404, f"Product(s) not found: {', '.join(missing)}")
+    return products
+
+def _price_items(items: List[OrderItemCreate], products: Dict[uuid.UUID, Product]) -> tuple:
+    """Price order lines. Returns (item row dicts, subtotal, tax total)."""
+    rows = []
     subtotal = Decimal("0")
     tax_total = Decimal("0")
-
-    for item in payload.items:
-        product = await db.get(Product, uuid.UUID(item.product_id))
-        if not product:
-            raise HTTPException(404, f"Product {item.product_id} not found")
-
+    for item in items:
+        product = products[uuid.UUID(item.product_id)]
         unit_price = item.unit_price or product.selling_price
         discount_amt = unit_price * item.quantity * (item.discount_percent / 100)
         taxable = unit_price * item.quantity - discount_amt
         tax_amt = taxable * (product.tax_rate / 100)
-        total = taxable + tax_amt
-
-        order_items.append(SalesOrderItem(
-            product_id=product.id,
-            quantity=item.quantity,
-            unit_price=unit_price,
-            discount_percent=item.discount_percent,
-            discount_amount=discount_amt,
-            tax_rate=product.tax_rate,
-            tax_amount=tax_amt,
-            total_amount=total,
-        ))
+        rows.append({
+            "id": uuid.uuid4(),
+            "product_id": product.id,
+            "quantity": item.quantity,
+            "unit_price": unit_price,
+            "discount_percent": item.discount_percent,
+            "discount_amount": discount_amt,
+            "tax_rate": product.tax_rate,
+            "tax_amount": tax_amt,
+            "total_amount": taxable + tax_amt,
+        })
         subtotal += taxable
         tax_total += tax_amt
+    return rows, subtotal, tax_total
+
+
+async def _new_order_numbers(db: AsyncSession, count: int) -> List[str]:
+    """
+    count order numbers unused in the batch and in sales_orders. The short
+    random suffix collides often once a day holds thousands of orders.
+    """
+    numbers: set = set()
+    while len(numbers) < count:
+        candidates = {_generate_order_number() for _ in range(count - len(numbers))} - numbers
+        taken = await db.execute(select(SalesOrder.order_number).where(SalesOrder.order_number.in_(candidates)))
+        numbers |= candidates - set(taken.scalars().all())
+    return list(numbers)
+
+def _batch_sale_rows(
+    sale: BatchSale,
+    products: Dict[uuid.UUID, tuple],
+    customers: Dict[uuid.UUID, Customer],
+    warehouse_id: uuid.UUID,
+    order_number: str,
+) -> tuple:
+    """
+    Rows for one completed batch sale: (order, items, payment, credit or
+    None, response body). Raises HTTPException if the sale is rejected.
+    """
+    try:
+        product_ids = [uuid.UUID(item.product_id) for item in sale.items]
+        customer_id = uuid.UUID(sale.customer_id) if sale.customer_id else None
+        order_warehouse = uuid.UUID(sale.warehouse_id) if sale.warehouse_id else warehouse_id
+    except ValueError:
+        raise HTTPException(400, "Invalid product, customer or warehouse id")
+    missing = sorted({str(pid) for pid in product_ids if pid not in products})
+    if missing:
+        raise HTTPException(404, f"Product(s) not found: {', '.join(missing)}")
+    if sale.payment_method not in (PaymentMethod.cash, PaymentMethod.credit):
+        raise HTTPException(400, "Batch sales must be paid by cash or credit")
+
+    item_rows, subtotal, tax_total = _price_items(sale.items, products)
+    discount_amount = subtotal * (sale.discount_percent / 100)
+    # Each column rounded as sales_orders stores it, so the response, the
+    # payment and the rollup carry exactly the stored amounts
+    total_amount = _money(subtotal - discount_amount + tax_total)
+    subtotal, discount_amount, tax_total = _money(subtotal), _money(discount_amount), _money(tax_total)
+    sold_at = sale.sold_at or datetime.now(timezone.utc)
+
+    order = {
+        "id": uuid.uuid4(),
+        "order_number": order_number,
+        "customer_id": customer_id,
+        "warehouse_id": order_warehouse,
+        "order_date": sold_at,
+        "status": OrderStatus.completed.value,
+        "subtotal": subtotal,
+        "discount_percent": sale.discount_percent,
+        "discount_amount": discount_amount,
+        "tax_amount": tax_total,
+        "total_amount": total_amount,
+        "paid_amount": total_amount,
+        "change_amount": Decimal("0"),
+        "payment_method": sale.payment_method.value,
+        "payment_status": PaymentStatus.confirmed.value,
+        "notes": sale.notes,
+        "is_credit_sale": sale.payment_method == PaymentMethod.credit,
+        "credit_due_date": None,
+    }
+    tx_ref = _generate_tx_ref()
+    body = {"order_id": str(order["id"]), "order_number": order_number,
+            "total_amount": float(total_amount), "transaction_ref": tx_ref}
+
+    credit = None
+    if sale.payment_method == PaymentMethod.cash:
+        paid = _money(sale.paid_amount or total_amount)
+        if paid < total_amount:
+            raise HTTPException(400, f"Insufficient payment. Required: {total_amount}")
+        order["paid_amount"] = paid
+        order["change_amount"] = paid - total_amount
+        body["change_amount"] = float(paid - total_amount)
+    else:
+        customer = customers.get(customer_id)
+        if customer is None:
+            raise HTTPException(400, "Credit sale requires a customer")
+        available_credit = customer.credit_limit - customer.credit_balance
+        if total_amount > available_credit:
+            raise HTTPException(400, f"Insufficient credit. Available: {available_credit}")
+        order["credit_due_date"] = sold_at.date() + timedelta(days=customer.credit_days)
+        credit = {
+            "id": uuid.uuid4(),
+            "customer_id": customer.id,
+            "order_id": order["id"],
+            "transaction_type": "charge",
+            "amount": total_amount,
+            "balance_before": customer.credit_balance,
+            "balance_after": customer.credit_balance + total_amount,
+            "due_date": order["credit_due_date"],
+        }
+        # Later sales in the chunk see the running balance
+        customer.credit_balance += total_amount
+        body["credit_balance"] = float(customer.credit_balance)
+
+    for row in item_rows:
+        row["order_id"] = order["id"]
+    payment = {
+        "id": uuid.uuid4(),
+        "order_id": order["id"],
+        "transaction_ref": tx_ref,
+        "payment_method": sale.payment_method.value,
+        "amount": total_amount,
+        "status": PaymentStatus.confirmed.value,
+        "confirmed_at": datetime.utcnow(),
+    }
+    return order, item_rows, payment, credit, body
+
+async def _ingest_chunk(
+    db: AsyncSession,
+    chunk: List[tuple],
+    products: Dict[uuid.UUID, tuple],
+    warehouse_id: uuid.UUID,
+) -> List[dict]:
+    """
+    Write one chunk of (index, sale) pairs in the current transaction with
+    one insert per table. Returns a result per sale; the caller commits.
+    """
+    stored = await idempotency.lookup(db, "sales", [s.idempotency_key for _, s in chunk if s.idempotency_key])
+    credit_ids = set()
+    for _, sale in chunk:
+        if sale.payment_method == PaymentMethod.credit and sale.customer_id:
+            try:
+                credit_ids.add(uuid.UUID(sale.customer_id))
+            except ValueError:
+                pass
+    customers = {}
+    if credit_ids:
+        result = await db.execute(
+            select(Customer).where(Customer.id.in_(credit_ids)).order_by(Customer.id)
+            .with_for_update().execution_options(populate_existing=True)
+        )
+        customers = {c.id: c for c in result.scalars().all()}
+
+    results = []
+    orders, items, payments, credits, remembered = [], [], [], [], []
+    fresh: Dict[str, tuple] = {}
+    order_numbers = iter(await _new_order_numbers(db, len(chunk)))
+    for index, sale in chunk:
+        key = sale.idempotency_key
+        previous = None
+        if key in stored:
+            previous = (stored[key].request_hash, stored[key].response)
+        elif key in fresh:
+            previous = fresh[key]
+        if previous:
+            if previous[0] != idempotency.request_hash(sale):
+                results.append({"index": index, "status": "error", "status_code": 422,
+                                "detail": "Idempotency-Key was already used for a different request"})
+            else:
+                results.append({"index": index, "status": "replayed", **previous[1]})
+            continue
+        try:
+            order, item_rows, payment, credit, body = _batch_sale_rows(
+                sale, products, customers, warehouse_id, next(order_numbers)
+            )
+        except HTTPException as e:
+            results.append({"index": index, "status": "error", "status_code": e.status_code, "detail": e.detail})
+            continue
+        orders.append(order)
+        items.extend(item_rows)
+        payments.append(payment)
+        if credit:
+            credits.append(credit)
+        if key:
+            fresh[key] = (idempotency.request_hash(sale), body)
+            remembered.append((key, sale, body, 201))
+        results.append({"index": index, "status": "created", **body})
+
+    if orders:
+        await db.execute(insert(SalesOrder), orders)
+        if items:
+            await db.execute(insert(SalesOrderItem), items)
+        await db.execute(insert(PaymentTransaction), payments)
+        if credits:
+            await db.execute(insert(CreditTransaction), credits)
+        # Plain carriers for the completion helpers; the rows are already inserted
+        await _apply_completion(db, [SalesOrder(**row) for row in orders])
+        await idempotency.remember_many(db, "sales", remembered)
+    return results
+
+
+# ─── ENDPOINTS ───────────────────────────────────────────────
+@router.post("/orders", status_code=201)
+async def create_order(
+    payload: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create a new sales order with items."""
+    replayed = await idempotency.replay(db, "orders", idempotency_key, payload)
+    if replayed:
+        return replayed
+    products = await _load_products(db, [item.product_id for item in payload.items])
+    item_rows, subtotal, tax_total = _price_items(payload.items, products)
 
     discount_amount = subtotal * (payload.discount_percent / 100)
-    total_amount = subtotal - discount_amount + tax_total
+    # Rounded as stored, so the response and its idempotent replay match the row
+    total_amount = _money(subtotal - discount_amount + tax_total)
+    subtotal, discount_amount, tax_total = _money(subtotal), _money(discount_amount), _money(tax_total)
 
     credit_due_date = None
     if payload.is_credit_sale and payload.customer_id:
@@ -112,6 +368,7 @@ async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db))
             credit_due_date = date.today() + timedelta(days=customer.credit_days)
 
     order = SalesOrder(
+        id=uuid.uuid4(),
         order_number=_generate_order_number(),
         customer_id=uuid.UUID(payload.customer_id) if payload.customer_id else None,
         warehouse_id=uuid.UUID(payload.warehouse_id) if payload.warehouse_id else None,
@@ -128,24 +385,93 @@ async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db))
     db.add(order)
     await db.flush()
 
-    for item in order_items:
-        item.order_id = order.id
-        db.add(item)
+    # All line items in one executemany round trip
+    if item_rows:
+        for row in item_rows:
+            row["order_id"] = order.id
+        await db.execute(insert(SalesOrderItem), item_rows)
 
+    body = {"order_id": str(order.id), "order_number": order.order_number, "total_amount": float(order.total_amount)}
+    await idempotency.remember(db, "orders", idempotency_key, payload, body, status_code=201)
     await db.commit()
-    await db.refresh(order)
-    return {"order_id": str(order.id), "order_number": order.order_number, "total_amount": float(order.total_amount)}
+    return body
+
+
+@router.post("/orders/batch")
+async def create_orders_batch(payload: BatchOrderRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Ingest completed cash/credit sales in bulk (terminal backlogs after an
+    outage). Products are priced from one fetch; sales are written in
+    transactions of SALES_BATCH_CHUNK_ORDERS with one insert per table.
+    A chunk that fails is retried sale by sale, so one bad sale only
+    rejects itself; a transient database error on a sale is a 503 the
+    till retries. Results come back per sale, in request order.
+    """
+    product_ids = set()
+    for sale in payload.sales:
+        for item in sale.items:
+            try:
+                product_ids.add(uuid.UUID(item.product_id))
+            except ValueError:
+                pass  # reported against the sale
+    products = {}
+    if product_ids:
+        result = await db.execute(
+            select(Product.id, Product.selling_price, Product.tax_rate).where(Product.id.in_(product_ids))
+        )
+        products = {row.id: row for row in result.all()}
+    warehouse_id = await default_warehouse_id(db)
+
+    indexed = list(enumerate(payload.sales))
+    size = settings.SALES_BATCH_CHUNK_ORDERS
+    pending = [indexed[i:i + size] for i in range(0, len(indexed), size)]
+    results: List[dict] = []
+    while pending:
+        chunk = pending.pop(0)
+        try:
+            chunk_results = await _ingest_chunk(db, chunk, products, warehouse_id)
+            await db.commit()
+        except (HTTPException, DBAPIError) as e:
+            await db.rollback()
+            if len(chunk) > 1:
+                pending[:0] = [[pair] for pair in chunk]
+                continue
+            if isinstance(e, HTTPException):
+                status_code, detail = e.status_code, e.detail
+            else:
+                # asyncpg errors read "<class ...>: message"
+                status_code, detail = _db_error_status(e), str(e.orig).splitlines()[0].split(": ", 1)[-1]
+            chunk_results = [{"index": chunk[0][0], "status": "error", "status_code": status_code, "detail": detail}]
+        results.extend(chunk_results)
+
+    results.sort(key=lambda r: r["index"])
+    created = sum(1 for r in results if r["status"] == "created")
+    if created:
+        await catalog_versions.bump("stock")
+    return ORJSONResponse({
+        "created": created,
+        "replayed": sum(1 for r in results if r["status"] == "replayed"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+    })
 
 
 @router.post("/payment/initiate")
-async def initiate_payment(payload: PaymentRequest, db: AsyncSession = Depends(get_db)):
+async def initiate_payment(
+    payload: PaymentRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=100),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Initiate payment for an order.
     - Cash: returns change calculation
     - QR PromptPay: generates QR code with amount
     - Credit: records credit transaction
     """
-    order = await db.get(SalesOrder, uuid.UUID(payload.order_id))
+    replayed = await idempotency.replay(db, "payments", idempotency_key, payload)
+    if replayed:
+        return replayed
+    order = await db.get(SalesOrder, uuid.UUID(payload.order_id), with_for_update=True)
     if not order:
         raise HTTPException(404, "Order not found")
     if order.status == OrderStatus.completed:
@@ -173,8 +499,12 @@ async def initiate_payment(payload: PaymentRequest, db: AsyncSession = Depends(g
         order.payment_method = PaymentMethod.cash
         order.payment_status = PaymentStatus.confirmed
         order.status = OrderStatus.completed
+        await _apply_completion(db, [order])
+        body = {"status": "confirmed", "change_amount": float(change), "transaction_ref": tx_ref}
+        await idempotency.remember(db, "payments", idempotency_key, payload, body)
         await db.commit()
-        return {"status": "confirmed", "change_amount": float(change), "transaction_ref": tx_ref}
+        await catalog_versions.bump("stock")
+        return body
 
     elif payload.payment_method == PaymentMethod.qr_promptpay:
         from app.models.models import BankAccount
@@ -183,7 +513,7 @@ async def initiate_payment(payload: PaymentRequest, db: AsyncSession = Depends(g
         if not bank or not bank.promptpay_id:
             raise HTTPException(400, "No PromptPay account configured")
 
-        qr_data = generate_promptpay_qr(
+        qr_data = await render_promptpay_qr(
             promptpay_id=bank.promptpay_id,
             amount=order.total_amount,
             order_ref=order.order_number,
@@ -199,14 +529,16 @@ async def initiate_payment(payload: PaymentRequest, db: AsyncSession = Depends(g
         db.add(tx)
         order.payment_method = PaymentMethod.qr_promptpay
         order.qr_reference = tx_ref
-        await db.commit()
-        return {
+        body = {
             "status": "pending",
             "transaction_ref": tx_ref,
             "amount": float(order.total_amount),
             "qr_data": qr_data["qr_data"],
             "qr_image": qr_data["qr_image_base64"],
         }
+        await idempotency.remember(db, "payments", idempotency_key, payload, body)
+        await db.commit()
+        return body
 
     elif payload.payment_method == PaymentMethod.credit:
         if not order.customer_id:
@@ -240,8 +572,12 @@ async def initiate_payment(payload: PaymentRequest, db: AsyncSession = Depends(g
         order.payment_method = PaymentMethod.credit
         order.payment_status = PaymentStatus.confirmed
         order.status = OrderStatus.completed
+        await _apply_completion(db, [order])
+        body = {"status": "confirmed", "transaction_ref": tx_ref, "credit_balance": float(customer.credit_balance)}
+        await idempotency.remember(db, "payments", idempotency_key, payload, body)
         await db.commit()
-        return {"status": "confirmed", "transaction_ref": tx_ref, "credit_balance": float(customer.credit_balance)}
+        await catalog_versions.bump("stock")
+        return body
 
     raise HTTPException(400, "Unsupported payment method")
 
@@ -263,12 +599,16 @@ async def confirm_qr_payment(payload: ConfirmPaymentRequest, db: AsyncSession =
     tx.bank_reference = payload.bank_reference
     tx.payer_name = payload.payer_name
 
-    order = await db.get(SalesOrder, tx.order_id)
+    order = await db.get(SalesOrder, tx.order_id, with_for_update=True)
+    if order.status == OrderStatus.completed:
+        raise HTTPException(400, "Order already completed")
     order.payment_status = PaymentStatus.confirmed
     order.status = OrderStatus.completed
     order.paid_amount = tx.amount
+    await _apply_completion(db, [order])
 
     await db.commit()
+    await catalog_versions.bump("stock")
     return {"status": "confirmed", "order_number": order.order_number, "amount": float(tx.amount)}
 
 
@@ -289,13 +629,23 @@ async def list_orders(
     status: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """List sales orders with filters."""
-    query = select(SalesOrder).order_by(SalesOrder.order_date.desc()).limit(limit).offset(offset)
+    """
+    List sales orders with filters, newest first.
+    The X-Next-Cursor response header can be passed back as ?cursor= to
+    fetch the next page without offset scanning.
+    """
+    keys = (SalesOrder.order_date, SalesOrder.id)
+    query = apply_keyset(ORDER_FIELDS.select(), keys, cursor, descending=True).limit(limit)
+    if not cursor:
+        query = query.offset(offset)
     if customer_id:
         query = query.where(SalesOrder.customer_id == uuid.UUID(customer_id))
     if status:
         query = query.where(SalesOrder.status == status)
-    result = await db.execute(query)
-    return result.scalars().all()
+    rows = (await db.execute(query)).all()
+    response = ORJSONResponse(ORDER_FIELDS.rows(rows))
+    set_next_cursor(response, next_cursor(rows, keys, limit))
+    return response
@@ -9,12 +9,17 @@ import uuid
 from datetime import datetime, date
 from typing import Optional, List
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from pydantic import BaseModel, Field
 
 from app.db.database import get_db
+from app.services.cache_service import scan_cache, catalog_versions
+from app.services.conditional import check_etag, etag_headers
+from app.core.serialization import ORJSONResponse
+from app.services.pagination import apply_keyset, next_cursor, set_next_cursor
+from app.services.serializers import STOCK_VIEWS, LOW_STOCK_FIELDS, STOCK_TRANSACTION_FIELDS, select_fields
 from app.models.models import (
     Stock, StockTransaction, StockTransactionType,
     PurchaseOrder, PurchaseOrderItem, Product, Warehouse, Supplier
@@ -64,16 +69,23 @@ def _generate_ref(prefix: str) -> str:
 # ─── ENDPOINTS ───────────────────────────────────────────────
 @router.get("")
 async def list_stock(
+    request: Request,
     warehouse_id: Optional[str] = None,
     product_id: Optional[str] = None,
     low_stock_only: bool = False,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get current stock levels."""
-    query = (
-        select(Stock, Product.name, Product.code, Product.unit, Product.min_stock_level, Product.reorder_point)
-        .join(Product, Stock.product_id == Product.id)
-    )
+    """
+    Get current stock levels (?view=pos|admin or ?fields= to narrow rows).
+    Honours If-None-Match (weak ETag from the stock and product versions).
+    """
+    serializer = select_fields(STOCK_VIEWS, view, fields)
+    etag, not_modified = await check_etag(request, "stock", "products")
+    if not_modified:
+        return not_modified
+    query = serializer.select().select_from(Stock).join(Product, Stock.product_id == Product.id)
     if warehouse_id:
         query = query.where(Stock.warehouse_id == uuid.UUID(warehouse_id))
     if product_id:
@@ -82,23 +94,7 @@ async def list_stock(
         query = query.where(Stock.quantity <= Product.reorder_point)
 
     result = await db.execute(query)
-    rows = result.all()
-    return [
-        {
-            "stock_id": str(r.Stock.id),
-            "product_id": str(r.Stock.product_id),
-            "product_name": r.name,
-            "product_code": r.code,
-            "unit": r.unit,
-            "quantity": float(r.Stock.quantity),
-            "reserved": float(r.Stock.reserved_quantity),
-            "available": float(r.Stock.quantity - r.Stock.reserved_quantity),
-            "min_stock_level": r.min_stock_level,
-            "reorder_point": r.reorder_point,
-            "is_low": r.Stock.quantity <= r.reorder_point,
-        }
-        for r in rows
-    ]
+    return ORJSONResponse(serializer.rows(result.all()), headers=etag_headers(etag))
 
 
 @router.post("/purchase-orders", status_code=201)
@@ -218,6 +214,8 @@ async def receive_goods(
     po.received_date = date.today()
 
     await db.commit()
+    await scan_cache.invalidate()
+    await catalog_versions.bump("stock")
     return {"status": po.status, "message": "Goods received successfully"}
 
 
@@ -249,6 +247,8 @@ async def adjust_stock(payload: StockAdjustment, db: AsyncSession = Depends(get_
     )
     db.add(tx)
     await db.commit()
+    await scan_cache.invalidate()
+    await catalog_versions.bump("stock")
     return {"message": "Stock adjusted", "new_quantity": float(stock.quantity)}
 
 
@@ -256,24 +256,13 @@ async def adjust_stock(payload: StockAdjustment, db: AsyncSession = Depends(get_
 async def low_stock_alerts(db: AsyncSession = Depends(get_db)):
     """Get products that are below reorder point."""
     query = (
-        select(Stock, Product)
+        LOW_STOCK_FIELDS.select()
         .join(Product, Stock.product_id == Product.id)
         .where(Stock.quantity <= Product.reorder_point)
         .where(Product.is_active == True)
     )
     result = await db.execute(query)
-    rows = result.all()
-    return [
-        {
-            "product_id": str(r.Product.id),
-            "product_code": r.Product.code,
-            "product_name": r.Product.name,
-            "current_stock": float(r.Stock.quantity),
-            "reorder_point": r.Product.reorder_point,
-            "min_stock_level": r.Product.min_stock_level,
-        }
-        for r in rows
-    ]
+    return ORJSONResponse(LOW_STOCK_FIELDS.rows(result.all()))
 
 
 @router.get("/transactions")
@@ -282,13 +271,19 @@ async def stock_transactions(
     transaction_type: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get stock transaction history."""
-    query = select(StockTransaction).order_by(StockTransaction.created_at.desc()).limit(limit).offset(offset)
+    """Get stock transaction history, newest first (keyset via ?cursor=)."""
+    keys = (StockTransaction.created_at, StockTransaction.id)
+    query = apply_keyset(STOCK_TRANSACTION_FIELDS.select(), keys, cursor, descending=True).limit(limit)
+    if not cursor:
+        query = query.offset(offset)
     if product_id:
         query = query.where(StockTransaction.product_id == uuid.UUID(product_id))
     if transaction_type:
         query = query.where(StockTransaction.transaction_type == transaction_type)
-    result = await db.execute(query)
-    return result.scalars().all()
+    rows = (await db.execute(query)).all()
+    response = ORJSONResponse(STOCK_TRANSACTION_FIELDS.rows(rows))
+    set_next_cursor(response, next_cursor(rows, keys, limit))
+    return response
@@ -0,0 +1,30 @@
+"""
+Export completed sales to the Parquet fact dataset (incremental).
+
+Run from the backend directory (or inside the backend container), e.g. from cron:
+    python -m app.commands.export_sales_parquet
+    python -m app.commands.export_sales_parquet --out /data/sales_facts
+"""
+import argparse
+import asyncio
+
+from app.db.database import ReportSessionLocal, report_engine
+from app.services.sales_parquet import export_sales_facts
+
+
+async def main(out_dir: str = None):
+    async with ReportSessionLocal() as db:
+        summary = await export_sales_facts(db, out_dir)
+        await db.commit()
+    await report_engine.dispose()
+    print(
+        f"Exported {summary['orders']} orders ({summary['lines']} lines) to {summary['output_dir']}; "
+        f"watermark {summary['watermark']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally export completed sales to Parquet")
+    parser.add_argument("--out", dest="out_dir", default=None, help="dataset directory (default PARQUET_EXPORT_DIR)")
+    args = parser.parse_args()
+    asyncio.run(main(args.out_dir))
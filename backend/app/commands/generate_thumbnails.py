@@ -0,0 +1,73 @@
+"""
+Generate WebP thumbnails for product images uploaded before thumbnails existed,
+and optionally drop bytea copies of originals that are on disk.
+
+Run from the backend directory (or inside the backend container):
+    python -m app.commands.generate_thumbnails
+    python -m app.commands.generate_thumbnails --drop-bytea   # then VACUUM product_images
+"""
+import argparse
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from app.db.database import AsyncSessionLocal, engine
+from app.models.models import Product, ProductImage
+from app.services.cache_service import scan_cache
+from app.services.image_service import store_product_image, upload_path
+
+
+async def main(drop_bytea: bool = False):
+    done = failed = dropped = 0
+    async with AsyncSessionLocal() as db:
+        missing = ProductImage.thumbnails.is_(None) | (ProductImage.thumbnails == {})
+        images = (await db.execute(select(ProductImage).where(missing))).scalars().all()
+        for img in images:
+            path = upload_path(img.image_url)
+            if path.is_file():
+                content = path.read_bytes()
+            else:
+                content = await db.scalar(select(ProductImage.image_data).where(ProductImage.id == img.id))
+            if not content:
+                print(f"skip {img.image_url}: original not found")
+                failed += 1
+                continue
+            try:
+                _, thumbnails = await store_product_image(str(img.product_id), content, None)
+            except HTTPException as exc:
+                print(f"skip {img.image_url}: {exc.detail}")
+                failed += 1
+                continue
+            img.thumbnails = thumbnails
+            if img.is_primary:
+                await db.execute(
+                    update(Product)
+                    .where(Product.id == img.product_id, Product.main_image_url == img.image_url)
+                    .values(thumbnails=thumbnails)
+                )
+            done += 1
+        await db.commit()
+        if done:
+            await scan_cache.invalidate()
+
+        if drop_bytea:
+            rows = (await db.execute(
+                select(ProductImage.id, ProductImage.image_url).where(ProductImage.image_data.is_not(None))
+            )).all()
+            on_disk = [r.id for r in rows if upload_path(r.image_url).is_file()]
+            if on_disk:
+                await db.execute(
+                    update(ProductImage).where(ProductImage.id.in_(on_disk)).values(image_data=None)
+                )
+                await db.commit()
+            dropped = len(on_disk)
+    await engine.dispose()
+    print(f"Thumbnails generated for {done} images ({failed} skipped); bytea dropped for {dropped}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill product image thumbnails")
+    parser.add_argument("--drop-bytea", action="store_true", help="clear image_data where the file is on disk")
+    args = parser.parse_args()
+    asyncio.run(main(args.drop_bytea))
@@ -0,0 +1,22 @@
+"""
+Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL_HOURS.
+
+Run from the backend directory (or inside the backend container), e.g. daily from cron:
+    python -m app.commands.purge_idempotency_keys
+"""
+import asyncio
+
+from app.db.database import AsyncSessionLocal, engine
+from app.services.idempotency import purge_expired
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        rows = await purge_expired(db)
+        await db.commit()
+    await engine.dispose()
+    print(f"Purged {rows} expired idempotency keys")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+"""
+Rebuild daily_sales_rollup from raw sales_orders.
+
+Run from the backend directory (or inside the backend container):
+    python -m app.commands.rebuild_sales_rollup                 # full backfill
+    python -m app.commands.rebuild_sales_rollup --from 2024-01-01 --to 2024-01-31
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from app.db.database import AsyncSessionLocal, engine
+from app.services.sales_rollup import rebuild_rollup
+
+
+async def main(date_from: date = None, date_to: date = None):
+    async with AsyncSessionLocal() as db:
+        rows = await rebuild_rollup(db, date_from, date_to)
+        await db.commit()
+    await engine.dispose()
+    scope = f"{date_from or 'beginning'} .. {date_to or 'today'}"
+    print(f"Rebuilt daily_sales_rollup for {scope}: {rows} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily sales rollup table")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.date_from, args.date_to))
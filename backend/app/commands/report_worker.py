@@ -0,0 +1,33 @@
+"""
+Run report job workers outside the API processes (REPORT_JOB_BACKEND=redis).
+
+Pops jobs queued by POST /reports/jobs from Redis and runs them on the
+report pool, REPORT_JOB_WORKERS at a time. Run from the backend directory
+(or inside the backend container):
+    python -m app.commands.report_worker
+"""
+import asyncio
+
+from app.core.config import settings
+from app.db.database import report_engine
+from app.services.report_jobs import report_jobs
+import app.api.v1.endpoints.reports  # noqa: F401  (registers the report builders)
+
+
+async def main():
+    if settings.REPORT_JOB_BACKEND != "redis":
+        raise SystemExit("REPORT_JOB_BACKEND must be 'redis' for a separate worker to receive jobs")
+    if report_jobs.workers < 1:
+        raise SystemExit("REPORT_JOB_WORKERS must be at least 1")
+    print(f"Running {report_jobs.workers} report worker(s) for: {', '.join(report_jobs.reports)}")
+    try:
+        await report_jobs.run_workers()
+    finally:
+        await report_engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
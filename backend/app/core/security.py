@@ -1,10 +1,19 @@
+import math
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from pydantic import BaseModel
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
+from app.services.cache_service import get_redis, mark_redis_down
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -15,6 +24,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+# bcrypt is deliberately slow CPU work (~250ms per call); keep it on its own
+# pool so a burst of logins cannot stall the event loop for other requests.
+_hash_pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -26,3 +43,163 @@ def decode_token(token: str) -> dict:
         return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+
+# ─── AUTHENTICATED USER ──────────────────────────────────────
+class CurrentUser(BaseModel):
+    id: uuid.UUID
+    role: str
+    exp: float
+
+
+class TokenCache:
+    """
+    Bounded cache of verified tokens keyed by SHA-256 digest, so repeat
+    requests skip JWT parsing and signature checks. Entries live until the
+    token's own exp. Revoked digests are stored in Redis until the same exp,
+    so a logout reaches every worker; a revocation made while Redis is down
+    is remembered in this process only.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+        self.total_seconds = 0.0
+        self._users: "OrderedDict[str, CurrentUser]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, digest: str) -> Optional[CurrentUser]:
+        user = self._users.get(digest)
+        if user is None:
+            return None
+        if user.exp <= time.time():
+            del self._users[digest]
+            return None
+        self._users.move_to_end(digest)
+        return user
+
+    def set(self, digest: str, user: CurrentUser) -> None:
+        self._users[digest] = user
+        self._users.move_to_end(digest)
+        while len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+
+    @staticmethod
+    def _revoked_key(digest: str) -> str:
+        return f"auth:revoked:{digest}"
+
+    async def is_revoked(self, digest: str) -> bool:
+        if digest in self._revoked:
+            return True
+        client = get_redis()
+        if client is None:
+            return False
+        try:
+            revoked = await client.exists(self._revoked_key(digest))
+        except Exception as exc:
+            mark_redis_down(exc)
+            return False
+        if revoked:
+            self._users.pop(digest, None)
+        return bool(revoked)
+
+    async def revoke(self, digest: str, exp: float) -> None:
+        self._users.pop(digest, None)
+        now = time.time()
+        client = get_redis()
+        if client is not None:
+            try:
+                # Expires with the token, which fails verification after that anyway
+                await client.set(self._revoked_key(digest), 1, ex=max(1, math.ceil(exp - now)))
+                return
+            except Exception as exc:
+                mark_redis_down(exc)
+        for d in [d for d, e in self._revoked.items() if e <= now]:
+            del self._revoked[d]
+        self._revoked[digest] = exp
+
+    def record(self, seconds: float) -> None:
+        self.requests += 1
+        self.total_seconds += seconds
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._users),
+            "revoked": len(self._revoked),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "requests": self.requests,
+            "avg_auth_us": round(self.total_seconds / self.requests * 1e6, 1) if self.requests else 0.0,
+        }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
+
+async def authenticate_token(token: str) -> CurrentUser:
+    """Resolve a bearer token to its user, verifying it only on cache miss."""
+    digest = token_cache.digest(token)
+    if await token_cache.is_revoked(digest):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    user = token_cache.get(digest)
+    if user is not None:
+        token_cache.hits += 1
+        return user
+    token_cache.misses += 1
+    claims = decode_token(token)
+    try:
+        user = CurrentUser(id=claims["sub"], role=claims["role"], exp=claims["exp"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    token_cache.set(digest, user)
+    return user
+
+
+async def revoke_token(token: str) -> None:
+    """Reject this token for the rest of its lifetime (logout hook)."""
+    user = await authenticate_token(token)
+    await token_cache.revoke(token_cache.digest(token), user.exp)
+
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    """Router dependency: the authenticated user for this request."""
+    started = time.perf_counter()
+    try:
+        return await authenticate_token(token)
+    finally:
+        elapsed = time.perf_counter() - started
+        token_cache.record(elapsed)
+        request.state.auth_seconds = elapsed
+
+
+class ServerTimingMiddleware:
+    """
+    Adds Server-Timing: auth;dur=<ms> to responses of authenticated requests.
+    Set here rather than in get_current_user so it also reaches endpoints
+    that build and return their own Response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        state = scope.setdefault("state", {})
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and "auth_seconds" in state:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", f"auth;dur={state['auth_seconds'] * 1000:.3f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
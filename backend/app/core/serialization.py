@@ -0,0 +1,86 @@
+"""
+JSON Serialization
+- orjson-backed response class (Decimal, UUID, datetime, enum, NumPy)
+- Column-projected row serializers for list endpoints
+
+FastAPI runs jsonable_encoder over anything an endpoint returns unless it
+is already a Response. List endpoints therefore return ORJSONResponse
+directly with plain dicts built by RowSerializer.
+"""
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    # asyncpg returns its own UUID subclass, which orjson does not take natively
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RowSerializer:
+    """
+    Explicit column projection for one kind of API row. select() fetches
+    only these columns; rows() zips result tuples with their keys. Values
+    stay native and are encoded by ORJSONResponse. `defaults` replaces
+    NULLs for the given keys. Result columns beyond the projection (such
+    as keyset keys appended by select()) are ignored.
+    """
+
+    def __init__(self, *columns, defaults: Optional[Dict[str, Any]] = None):
+        self.columns = columns
+        self.keys = tuple(c.key for c in columns)
+        self.defaults = defaults or {}
+
+    def extend(self, *columns, defaults: Optional[Dict[str, Any]] = None) -> "RowSerializer":
+        return RowSerializer(*self.columns, *columns, defaults={**self.defaults, **(defaults or {})})
+
+    def project(self, keys: Sequence[str]) -> "RowSerializer":
+        """Subset of this projection in the given order; KeyError on unknown keys."""
+        by_key = dict(zip(self.keys, self.columns))
+        keys = list(dict.fromkeys(keys))
+        return RowSerializer(
+            *(by_key[k] for k in keys),
+            defaults={k: v for k, v in self.defaults.items() if k in keys},
+        )
+
+    def select(self, *extra) -> Select:
+        """Select the projected columns, plus any `extra` ones not already in it."""
+        return select(*self.columns, *(c for c in extra if c.key not in self.keys))
+
+    def row(self, values: Iterable[Any]) -> dict:
+        data = dict(zip(self.keys, values))
+        for key, value in self.defaults.items():
+            if data[key] is None:
+                data[key] = value
+        return data
+
+    def rows(self, rows: Iterable[Iterable[Any]]) -> List[dict]:
+        if not self.defaults:
+            keys = self.keys
+            return [dict(zip(keys, r)) for r in rows]
+        return [self.row(r) for r in rows]
+
+    def from_object(self, obj: Any) -> dict:
+        return self.row([getattr(obj, key) for key in self.keys])
@@ -17,6 +17,24 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Separate small pool for background report jobs, so long-running report
+# queries never take connections from the tills and are cut off server-side.
+report_engine = create_async_engine(
+    settings.DATABASE_URL,
+    pool_size=settings.REPORT_DB_POOL_SIZE,
+    max_overflow=0,
+    echo=settings.DEBUG,
+    connect_args={"server_settings": {"statement_timeout": str(settings.REPORT_STATEMENT_TIMEOUT_MS)}},
+)
+
+ReportSessionLocal = async_sessionmaker(
+    report_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 class Base(DeclarativeBase):
     pass
 
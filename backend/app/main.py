@@ -3,14 +3,16 @@ AgriPOS System - Main Application Entry Point
 FastAPI Application for Agricultural POS System
 """
 import traceback
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from pathlib import Path
 
 from app.core.config import settings
-from app.api.v1.endpoints import auth, products, stock, sales, customers, reports
+from app.core.security import ServerTimingMiddleware, get_current_user
+from app.core.serialization import ORJSONResponse
+from app.services.image_service import UploadStaticFiles
+from app.api.v1.endpoints import auth, products, stock, sales, customers, reports, export
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -18,6 +20,7 @@ app = FastAPI(
     description="ระบบ POS สำหรับร้านจำหน่ายปุ๋ยเคมี สารเคมีเกษตร และเครื่องมือเกษตร",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -27,21 +30,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "X-Data-As-Of"],
 )
+app.add_middleware(ServerTimingMiddleware)
 
 # Static files (uploaded images)
 uploads_dir = Path(settings.UPLOAD_DIR)
 uploads_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=str(uploads_dir)), name="uploads")
 
 # API Routes
 PREFIX = "/api/v1"
+AUTHENTICATED = [Depends(get_current_user)]
 app.include_router(auth.router, prefix=PREFIX)
-app.include_router(products.router, prefix=PREFIX)
-app.include_router(stock.router, prefix=PREFIX)
-app.include_router(sales.router, prefix=PREFIX)
-app.include_router(customers.router, prefix=PREFIX)
-app.include_router(reports.router, prefix=PREFIX)
+app.include_router(products.router, prefix=PREFIX, dependencies=AUTHENTICATED)
+app.include_router(stock.router, prefix=PREFIX, dependencies=AUTHENTICATED)
+app.include_router(sales.router, prefix=PREFIX, dependencies=AUTHENTICATED)
+app.include_router(customers.router, prefix=PREFIX, dependencies=AUTHENTICATED)
+app.include_router(reports.router, prefix=PREFIX, dependencies=AUTHENTICATED)
+app.include_router(export.router, prefix=PREFIX, dependencies=AUTHENTICATED)
 
 
 @app.exception_handler(Exception)
@@ -1,11 +1,11 @@
 import uuid
 from datetime import datetime
 from sqlalchemy import (
-    Column, String, Boolean, DateTime, Numeric, Integer,
-    Text, ForeignKey, Date, LargeBinary,
+    Column, String, Boolean, DateTime, Numeric, Integer, BigInteger,
+    Text, ForeignKey, Date, LargeBinary, UniqueConstraint, FetchedValue,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ENUM as PGENUM
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.database import Base
 import enum
 
@@ -136,6 +136,7 @@ class Product(Base):
     description           = Column(Text)
     specifications        = Column(JSONB)
     main_image_url        = Column(Text)
+    thumbnails            = Column(JSONB, default=dict)
     image_urls            = Column(JSONB, default=list)
     min_stock_level       = Column(Integer, default=5)
     max_stock_level       = Column(Integer, default=1000)
@@ -144,6 +145,8 @@ class Product(Base):
     chemical_registration = Column(String(50))
     expiry_tracking       = Column(Boolean, default=False)
     created_by            = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    # Sequence default + trigger on update; see GET /products/changes
+    row_version           = Column(BigInteger, nullable=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
     created_at            = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at            = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     category    = relationship("Category", back_populates="products")
@@ -157,7 +160,8 @@ class ProductImage(Base):
     id         = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
     image_url  = Column(Text, nullable=False)
-    image_data = Column(LargeBinary)
+    image_data = deferred(Column(LargeBinary))  # optional copy of the original (STORE_IMAGE_BYTEA)
+    thumbnails = Column(JSONB, default=dict)
     is_primary = Column(Boolean, default=False)
     sort_order = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
@@ -264,6 +268,8 @@ class SalesOrder(Base):
     receipt_url      = Column(Text)
     created_at       = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at       = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Writing transaction's id, set by trigger; see services/sales_parquet
+    xact_id          = Column(BigInteger, nullable=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
     customer = relationship("Customer", back_populates="orders")
     cashier  = relationship("User", foreign_keys=[cashier_id])
     items    = relationship("SalesOrderItem", back_populates="order", cascade="all, delete-orphan")
@@ -311,6 +317,33 @@ class PaymentTransaction(Base):
     updated_at      = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     order = relationship("SalesOrder", back_populates="payments")
 
+# ─── DAILY SALES ROLLUP ───────────────────────────────────────────────────────
+class DailySalesRollup(Base):
+    """Completed-order totals per shop-local day, warehouse and payment method."""
+    __tablename__ = "daily_sales_rollup"
+    __table_args__ = (UniqueConstraint("sale_date", "warehouse_id", "payment_method"),)
+    id              = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sale_date       = Column(Date, nullable=False)
+    warehouse_id    = Column(UUID(as_uuid=True), ForeignKey("warehouses.id"), nullable=False)
+    payment_method  = Column(_payment_method, nullable=False)
+    order_count     = Column(Integer, nullable=False, default=0)
+    subtotal        = Column(Numeric(14, 2), nullable=False, default=0)
+    discount_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    tax_amount      = Column(Numeric(14, 2), nullable=False, default=0)
+    total_amount    = Column(Numeric(14, 2), nullable=False, default=0)
+    updated_at      = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# ─── IDEMPOTENCY KEY ──────────────────────────────────────────────────────────
+class IdempotencyKey(Base):
+    """Stored response of a request made with an Idempotency-Key header."""
+    __tablename__ = "idempotency_keys"
+    scope           = Column(String(50), primary_key=True)
+    key             = Column(String(100), primary_key=True)
+    request_hash    = Column(String(64), nullable=False)
+    status_code     = Column(Integer, nullable=False)
+    response        = Column(JSONB, nullable=False)
+    created_at      = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
 # ─── CREDIT TRANSACTION ───────────────────────────────────────────────────────
 class CreditTransaction(Base):
     __tablename__ = "credit_transactions"
@@ -0,0 +1,300 @@
+"""
+Cache Service
+- Redis-backed read-through cache with version-based invalidation
+- In-process LRU fallback when Redis is unreachable
+- Short-TTL result cache with single-flight request deduplication
+- Per-collection change counters for ETags
+- Hit/miss counters
+"""
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Optional, Callable, Awaitable, Dict, List, NamedTuple, Set, Tuple
+
+import orjson
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before trying Redis again after a connection failure
+REDIS_RETRY_INTERVAL = 30
+
+_redis: Optional[aioredis.Redis] = None
+_redis_down_until = 0.0
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """Shared Redis client, or None while Redis is marked unreachable."""
+    global _redis
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        _redis = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=0.25,
+            socket_timeout=0.25,
+        )
+    return _redis
+
+
+def mark_redis_down(exc: Exception) -> None:
+    global _redis_down_until
+    if time.monotonic() >= _redis_down_until:
+        logger.warning("Redis unavailable, using in-process cache: %s", exc)
+    _redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+
+
+class LRUCache:
+    """Small in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class CacheLookup(NamedTuple):
+    """
+    VersionedCache.get result: the value on a hit, and on a miss the
+    (backend, version) that was current when the miss was read. Pass it
+    back to set() so the value is tagged with that version, not a later one.
+    """
+    value: Any
+    version: Tuple[str, int]
+
+    @property
+    def hit(self) -> bool:
+        return self.value is not None
+
+
+class VersionedCache:
+    """
+    Read-through cache for one namespace. Every entry is stored together
+    with the namespace version it was computed under; bumping the version
+    invalidates the whole namespace without scanning keys. A value computed
+    after a miss is tagged with the version read at the miss, so an
+    invalidate() in between leaves it stale instead of current.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_local_entries: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = LRUCache(max_local_entries)
+        # Random start so a restarted worker never reuses an old version
+        self._local_version = random.getrandbits(32)
+
+    @property
+    def _version_key(self) -> str:
+        return f"{self.namespace}:version"
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:item:{key}"
+
+    async def get(self, key: str) -> CacheLookup:
+        client = get_redis()
+        if client is not None:
+            try:
+                version, raw = await client.mget(self._version_key, self._key(key))
+                version = int(version or 0)
+                if raw is not None:
+                    entry = orjson.loads(raw)
+                    if entry["v"] == version:
+                        self.hits += 1
+                        return CacheLookup(entry["data"], ("redis", version))
+                self.misses += 1
+                return CacheLookup(None, ("redis", version))
+            except Exception as exc:
+                mark_redis_down(exc)
+
+        version = self._local_version
+        entry = self._local.get(self._key(key))
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return CacheLookup(entry[1], ("local", version))
+        self.misses += 1
+        return CacheLookup(None, ("local", version))
+
+    async def set(self, key: str, value: Any, version: Tuple[str, int]) -> None:
+        """Store value computed after the miss that returned version."""
+        backend, number = version
+        if backend == "redis":
+            client = get_redis()
+            if client is None:
+                return  # Redis went down since the miss; its version means nothing locally
+            try:
+                await client.set(
+                    self._key(key), dumps({"v": number, "data": value}), ex=self.ttl
+                )
+            except Exception as exc:
+                mark_redis_down(exc)
+            return
+        if number == self._local_version:
+            self._local.set(self._key(key), (number, value), self.ttl)
+
+    async def invalidate(self) -> None:
+        """Bump the namespace version so every cached entry becomes stale."""
+        self._local_version += 1
+        self._local.clear()
+        client = get_redis()
+        if client is not None:
+            try:
+                await client.incr(self._version_key)
+            except Exception as exc:
+                mark_redis_down(exc)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "backend": "redis" if get_redis() is not None else "local",
+        }
+
+
+class SingleFlightCache:
+    """
+    In-process cache for expensive, briefly-stale-tolerant results.
+    Concurrent misses for the same key share one computation, so a burst
+    of polling clients causes a single database hit per TTL window.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._values: Dict[str, tuple] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get_or_compute(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._values.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[0]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._store(k, t))
+        else:
+            self.hits += 1
+        # Shield so one cancelled client does not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def _store(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._values[key] = (task.result(), time.monotonic() + self.ttl)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class CollectionVersions:
+    """
+    Change counters for rarely-changing collections, shared by all workers
+    through Redis. Writers bump a collection after committing; readers
+    fold the counters into a weak ETag. Without Redis there is no shared
+    counter, so versions() returns None and no ETag is issued. Bumps that
+    fail while Redis is down are replayed on the next successful call, and
+    a random epoch changes whenever Redis loses the counters, so an ETag
+    handed out earlier is never reused for changed data.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._pending: Set[str] = set()
+
+    def _key(self, collection: str) -> str:
+        return f"{self.namespace}:{collection}:version"
+
+    @property
+    def _epoch_key(self) -> str:
+        return f"{self.namespace}:epoch"
+
+    async def _flush(self, client: aioredis.Redis, collections: Set[str]) -> None:
+        pipe = client.pipeline(transaction=False)
+        for collection in collections:
+            pipe.incr(self._key(collection))
+        await pipe.execute()
+
+    async def bump(self, *collections: str) -> None:
+        todo = self._pending | set(collections)
+        client = get_redis()
+        if client is not None:
+            try:
+                await self._flush(client, todo)
+                self._pending.clear()
+                return
+            except Exception as exc:
+                mark_redis_down(exc)
+        self._pending = todo
+
+    async def versions(self, *collections: str) -> Optional[List[int]]:
+        """[epoch, *counters], or None while Redis is unavailable."""
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            if self._pending:
+                await self._flush(client, self._pending)
+                self._pending.clear()
+            epoch, *values = await client.mget([self._epoch_key, *(self._key(c) for c in collections)])
+            if epoch is None:
+                await client.set(self._epoch_key, random.getrandbits(32), nx=True)
+                epoch, *values = await client.mget([self._epoch_key, *(self._key(c) for c in collections)])
+        except Exception as exc:
+            mark_redis_down(exc)
+            return None
+        return [int(epoch), *(int(v or 0) for v in values)]
+
+    async def etag(self, *collections: str) -> Optional[str]:
+        """Weak ETag for a response built from these collections, or None."""
+        versions = await self.versions(*collections)
+        if versions is None:
+            return None
+        epoch, *counters = versions
+        return f'W/"{epoch:x}-' + ".".join(f"{c}-{v}" for c, v in zip(collections, counters)) + '"'
+
+
+# Product lookups by barcode / QR / product code at the till
+scan_cache = VersionedCache(
+    "scan",
+    ttl=settings.SCAN_CACHE_TTL,
+    max_local_entries=settings.SCAN_CACHE_LOCAL_SIZE,
+)
+
+# Dashboard KPIs polled by every terminal
+dashboard_cache = SingleFlightCache(ttl=settings.DASHBOARD_CACHE_TTL)
+
+# Catalog collections behind the conditional GET endpoints
+catalog_versions = CollectionVersions("catalog")
@@ -0,0 +1,37 @@
+"""
+Conditional GET
+- Weak ETags from catalog change counters
+- 304 Not Modified answered before any database work
+"""
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.services.cache_service import catalog_versions
+
+
+def _matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+async def check_etag(request: Request, *collections: str) -> Tuple[Optional[str], Optional[Response]]:
+    """
+    (etag, not_modified_response). etag is None when versions are
+    unavailable; the 304 response is None unless If-None-Match matches.
+    """
+    etag = await catalog_versions.etag(*collections)
+    if etag is None:
+        return None, None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(etag, if_none_match):
+        return etag, Response(status_code=304, headers=etag_headers(etag))
+    return etag, None
+
+
+def etag_headers(etag: Optional[str]) -> dict:
+    # no-cache: clients may store the body but must revalidate every time
+    return {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else {}
@@ -0,0 +1,58 @@
+"""
+Date Range Helpers
+- Convert report dates (shop local calendar days) into half-open
+  timestamp ranges so filters on timestamptz columns stay index-friendly
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import and_, func, true, literal_column
+
+from app.core.config import settings
+
+SHOP_TZ = ZoneInfo(settings.TIMEZONE)
+
+
+def shop_today() -> date:
+    """Current calendar date in the shop's timezone."""
+    return datetime.now(SHOP_TZ).date()
+
+
+def to_shop_date(dt: Optional[datetime]) -> date:
+    """Shop-local calendar date of a timestamp (naive values are UTC)."""
+    if dt is None:
+        return shop_today()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(SHOP_TZ).date()
+
+
+def day_start(d: date) -> datetime:
+    """Midnight of a shop-local calendar day as an aware datetime."""
+    return datetime.combine(d, time.min, tzinfo=SHOP_TZ)
+
+
+def day_range(date_from: Optional[date], date_to: Optional[date] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """[start of date_from, start of the day after date_to) in shop time."""
+    start = day_start(date_from) if date_from else None
+    end = day_start(date_to + timedelta(days=1)) if date_to else None
+    return start, end
+
+
+def between_days(column, date_from: Optional[date], date_to: Optional[date] = None):
+    """Sargable filter: column >= start AND column < end (no function on column)."""
+    start, end = day_range(date_from, date_to)
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return and_(true(), *conditions)
+
+
+def local_date(column):
+    """Shop-local calendar date of a timestamptz column, for grouping/output."""
+    # Inline the zone name: a bind parameter would differ between the SELECT
+    # list and GROUP BY, and PostgreSQL would reject the grouping.
+    tz = literal_column("'" + settings.TIMEZONE.replace("'", "''") + "'")
+    return func.date(func.timezone(tz, column))
@@ -0,0 +1,103 @@
+"""
+EMVCo Merchant-Presented QR Payloads
+- Table-driven CRC-16/CCITT-FALSE (binascii.crc_hqx fast path)
+- TLV payload builder
+- Payload parser / validator
+"""
+import binascii
+from typing import Dict, Iterable, List, Tuple
+
+CRC_TAG = "63"
+
+
+class EMVCoError(ValueError):
+    """Raised for malformed payloads or checksum mismatches."""
+
+
+def _build_crc_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+            crc &= 0xFFFF
+        table.append(crc)
+    return table
+
+
+CRC16_TABLE = _build_crc_table()
+
+
+def crc16_table(data: str) -> int:
+    """CRC-16/CCITT-FALSE over the low byte of each character, one table lookup per character."""
+    crc = 0xFFFF
+    table = CRC16_TABLE
+    for char in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ ord(char)) & 0xFF]
+    return crc
+
+
+def crc16(data: str) -> str:
+    """Checksum as the 4 uppercase hex digits used in tag 63."""
+    try:
+        # C implementation of the same polynomial; covers every ASCII payload
+        crc = binascii.crc_hqx(data.encode("latin-1"), 0xFFFF)
+    except UnicodeEncodeError:
+        crc = crc16_table(data)
+    return format(crc, "04X")
+
+
+def tlv(tag: str, value: str) -> str:
+    """Encode one ID-length-value field."""
+    if len(tag) != 2 or not tag.isdigit():
+        raise EMVCoError(f"Invalid tag {tag!r}")
+    if len(value) > 99:
+        raise EMVCoError(f"Value for tag {tag} exceeds 99 characters")
+    return f"{tag}{len(value):02d}{value}"
+
+
+def build_payload(fields: Iterable[Tuple[str, str]]) -> str:
+    """Concatenate fields in order and append the CRC field (tag 63)."""
+    body = "".join(tlv(tag, value) for tag, value in fields) + CRC_TAG + "04"
+    return body + crc16(body)
+
+
+def parse_fields(data: str) -> List[Tuple[str, str]]:
+    """Split a TLV string into (tag, value) pairs without checksum checks."""
+    fields = []
+    pos = 0
+    while pos < len(data):
+        if pos + 4 > len(data):
+            raise EMVCoError(f"Truncated field header at position {pos}")
+        tag, length = data[pos:pos + 2], data[pos + 2:pos + 4]
+        if not (tag.isdigit() and length.isdigit()):
+            raise EMVCoError(f"Invalid field header {data[pos:pos + 4]!r} at position {pos}")
+        end = pos + 4 + int(length)
+        if end > len(data):
+            raise EMVCoError(f"Field {tag} overruns payload")
+        fields.append((tag, data[pos + 4:end]))
+        pos = end
+    return fields
+
+
+def parse_payload(payload: str) -> Dict[str, str]:
+    """
+    Validate and decode a top-level payload.
+    Checks the format indicator, that tag 63 is last, and the CRC.
+    Template fields (e.g. 29, 62) are returned raw; decode with parse_fields.
+    """
+    fields = parse_fields(payload)
+    if not fields or fields[0] != ("00", "01"):
+        raise EMVCoError("Payload must start with format indicator 000201")
+    tag, checksum = fields[-1]
+    if tag != CRC_TAG or len(checksum) != 4:
+        raise EMVCoError("Payload must end with a 4-digit CRC field (tag 63)")
+    expected = crc16(payload[:-4])
+    if checksum.upper() != expected:
+        raise EMVCoError(f"CRC mismatch: payload has {checksum}, expected {expected}")
+    decoded = {}
+    for tag, value in fields:
+        if tag in decoded:
+            raise EMVCoError(f"Duplicate tag {tag}")
+        decoded[tag] = value
+    return decoded
@@ -0,0 +1,122 @@
+"""
+Export Service
+- Stream query rows from a server-side cursor as CSV or NDJSON
+- Constant memory: rows are fetched and encoded one partition at a time
+- Report-pool connection taken before the response starts; 503 when busy
+"""
+import io
+import csv
+import json
+import uuid
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, AsyncIterator, Sequence
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.db.database import report_engine
+from app.services.date_range import SHOP_TZ, shop_today
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _plain(value: Any) -> Any:
+    """Normalise driver values shared by both formats."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(SHOP_TZ).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _csv_chunk(rows: Sequence[Sequence[Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        # Decimal's str() keeps the exact amount for accounting imports
+        [("" if v is None else _plain(v)) for v in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    lines = []
+    for row in rows:
+        record = {
+            col: float(v) if isinstance(v, Decimal) else _plain(v)
+            for col, v in zip(columns, row)
+        }
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+
+async def _iter_export(conn: AsyncConnection, query: Select, fmt: str) -> AsyncIterator[str]:
+    result = await conn.stream(query.execution_options(yield_per=settings.EXPORT_CHUNK_ROWS))
+    try:
+        columns = list(result.keys())
+        if fmt == "csv":
+            # BOM so Excel opens Thai text as UTF-8
+            yield "\ufeff" + _csv_chunk([columns])
+        async for rows in result.partitions():
+            yield _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(columns, rows)
+    except Exception:
+        # Headers are already sent; all we can do is cut the body short
+        logger.exception("Export stream aborted")
+        raise
+    finally:
+        await result.close()
+
+
+class ExportResponse(StreamingResponse):
+    """Streams the export and returns its connection however the response ends."""
+
+    def __init__(self, conn: AsyncConnection, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.conn = conn
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Client disconnects leave the generator suspended (or never started)
+            await self.body_iterator.aclose()
+            await self.conn.close()
+
+
+async def stream_export(query: Select, fmt: str, name: str) -> StreamingResponse:
+    """
+    Chunked response streaming every row of query as CSV or NDJSON.
+    The export gets its own report-pool connection (the request's session is
+    closed before the body is sent, and long exports must not hold till
+    connections). It is checked out here, so a busy pool is a 503 rather
+    than a 200 whose body fails later.
+    """
+    try:
+        conn = await asyncio.wait_for(report_engine.connect(), settings.EXPORT_POOL_WAIT)
+    except (asyncio.TimeoutError, sa_exc.TimeoutError):
+        raise HTTPException(503, "All report connections are busy, try again shortly", headers={"Retry-After": "5"})
+    filename = f"{name}_{shop_today():%Y%m%d}.{fmt}"
+    return ExportResponse(
+        conn,
+        _iter_export(conn, query, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,116 @@
+"""
+Idempotency Keys
+- Requests sent with an Idempotency-Key header run once; a retry with the
+  same key gets the stored response instead of creating a second order
+- The stored response is written in the same transaction as the work, so
+  a failed request leaves nothing behind and can simply be retried
+- Concurrent requests with one key are serialised on an advisory lock
+- Bulk variants for batch ingestion: one lock round trip and one lookup
+  for a whole chunk of keys
+"""
+import hashlib
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import select, func, delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.serialization import ORJSONResponse
+from app.models.models import IdempotencyKey
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def request_hash(payload: BaseModel) -> str:
+    body = orjson.dumps(payload.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(body).hexdigest()
+
+
+def _lock_id(scope: str, key: str) -> int:
+    digest = hashlib.sha256(f"{scope}:{key}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+async def lookup(db: AsyncSession, scope: str, keys: Sequence[str]) -> Dict[str, IdempotencyKey]:
+    """
+    Unexpired stored responses for keys, after locking every key until the
+    caller's transaction ends. Locks are taken in sorted order, so two
+    batches sharing keys cannot deadlock.
+    """
+    if not keys:
+        return {}
+    lock_ids = sorted({_lock_id(scope, key) for key in keys})
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(id) FROM unnest(CAST(:ids AS bigint[])) WITH ORDINALITY AS t(id, n) ORDER BY n"),
+        {"ids": lock_ids},
+    )
+    result = await db.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key.in_(set(keys)),
+            IdempotencyKey.created_at > func.now() - _ttl(),
+        )
+    )
+    return {stored.key: stored for stored in result.scalars().all()}
+
+
+async def replay(db: AsyncSession, scope: str, key: Optional[str], payload: BaseModel) -> Optional[Response]:
+    """
+    Stored response for (scope, key), or None when the request should run.
+    Holds a transaction-scoped lock on the key until the caller commits.
+    """
+    if not key:
+        return None
+    stored = (await lookup(db, scope, [key])).get(key)
+    if stored is None:
+        return None
+    if stored.request_hash != request_hash(payload):
+        raise HTTPException(422, "Idempotency-Key was already used for a different request")
+    return ORJSONResponse(stored.response, status_code=stored.status_code, headers={REPLAYED_HEADER: "true"})
+
+
+async def remember(
+    db: AsyncSession, scope: str, key: Optional[str], payload: BaseModel, body: Any, status_code: int = 200
+) -> None:
+    """Store the response for a keyed request; call before the work commits."""
+    if key:
+        await remember_many(db, scope, [(key, payload, body, status_code)])
+
+
+async def remember_many(db: AsyncSession, scope: str, entries: List[Tuple[str, BaseModel, Any, int]]) -> None:
+    """Store (key, payload, body, status_code) responses with one statement."""
+    if not entries:
+        return
+    rows = [
+        {
+            "scope": scope,
+            "key": key,
+            "request_hash": request_hash(payload),
+            "status_code": status_code,
+            "response": body,
+            "created_at": func.now(),
+        }
+        for key, payload, body, status_code in entries
+    ]
+    stmt = insert(IdempotencyKey).values(rows)
+    # Only an expired row can exist here; replay() returned it otherwise
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+        set_={k: stmt.excluded[k] for k in ("request_hash", "status_code", "response", "created_at")},
+    )
+    await db.execute(stmt)
+
+
+async def purge_expired(db: AsyncSession) -> int:
+    """Delete stored responses past IDEMPOTENCY_KEY_TTL_HOURS; returns rows removed."""
+    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at <= func.now() - _ttl()))
+    return result.rowcount
@@ -0,0 +1,111 @@
+"""
+Product Image Service
+- WebP thumbnails at fixed sizes (card, list, detail) rendered with Pillow
+  on a worker pool, never on the event loop
+- Content-hash filenames: a URL always names the same bytes, so clients
+  and proxies may cache it forever
+- Static file mount that marks hashed files immutable
+"""
+import re
+import io
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.staticfiles import StaticFiles
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+
+# <16 hex digest>.<ext> originals and <size>-<16 hex digest>.webp thumbnails
+_HASHED_NAME = re.compile(r"^(?:[a-z]+-)?[0-9a-f]{16}\.[a-z]+$")
+
+_render_pool = ThreadPoolExecutor(max_workers=settings.IMAGE_RENDER_WORKERS, thread_name_prefix="img-render")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _write(path: Path, data: bytes) -> None:
+    # Same name means same bytes, so an existing file is already correct
+    if path.exists():
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def render_thumbnails(content: bytes) -> Dict[str, bytes]:
+    """WebP bytes per configured size name; longest edge fits the size."""
+    try:
+        with Image.open(io.BytesIO(content)) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    except (UnidentifiedImageError, OSError) as exc:
+        raise ValueError("Unreadable or unsupported image file") from exc
+
+    thumbnails = {}
+    for name, size in settings.THUMBNAIL_SIZES.items():
+        thumb = image.copy()
+        thumb.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumb.save(buffer, "WEBP", quality=settings.THUMBNAIL_QUALITY, method=4)
+        thumbnails[name] = buffer.getvalue()
+    return thumbnails
+
+
+def _store(
+    content: bytes, content_type: Optional[str], directory: Path, url_prefix: str
+) -> Tuple[Optional[str], Dict[str, str]]:
+    thumbnails = render_thumbnails(content)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    original = None
+    if content_type is not None:
+        original = f"{_digest(content)}{_EXTENSIONS.get(content_type, '')}"
+        _write(directory / original, content)
+    urls = {}
+    for name, data in thumbnails.items():
+        filename = f"{name}-{_digest(data)}.webp"
+        _write(directory / filename, data)
+        urls[name] = f"{url_prefix}/{filename}"
+    return (f"{url_prefix}/{original}" if original else None), urls
+
+
+async def store_product_image(
+    product_id: str, content: bytes, content_type: Optional[str]
+) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    Save the original and its thumbnails under UPLOAD_DIR/products/<id>/.
+    Returns (original URL, {size name: thumbnail URL}); with content_type
+    None only thumbnails are written (backfill of an existing original).
+    """
+    directory = Path(settings.UPLOAD_DIR) / "products" / product_id
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _render_pool, _store, content, content_type, directory, f"/uploads/products/{product_id}"
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
+def upload_path(url: str) -> Path:
+    """Disk path of an /uploads/... URL."""
+    return Path(settings.UPLOAD_DIR) / url.removeprefix("/uploads/")
+
+
+class UploadStaticFiles(StaticFiles):
+    """Serves /uploads; content-hashed files get a one-year immutable Cache-Control."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if _HASHED_NAME.match(Path(full_path).name):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
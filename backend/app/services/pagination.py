@@ -0,0 +1,73 @@
+"""
+Keyset (cursor) Pagination
+- Opaque cursors encoding the sort key of the last row on a page
+- Row-value comparison so deep pages cost the same as the first one
+"""
+import json
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(column, raw: Any) -> Any:
+    python_type = column.type.python_type
+    if raw is None or isinstance(raw, python_type):
+        return raw
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    return python_type(raw)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(raw) != len(columns):
+            raise ValueError("cursor length mismatch")
+        return tuple(_decode_value(col, v) for col, v in zip(columns, raw))
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def apply_keyset(query: Select, columns: Sequence, cursor: Optional[str], descending: bool = False) -> Select:
+    """
+    Order by `columns` (the last one must be unique, e.g. id) and, when a
+    cursor is given, continue strictly after the row it points at.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        keys = tuple_(*columns)
+        query = query.where(keys < tuple_(*values) if descending else keys > tuple_(*values))
+    return query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+
+def next_cursor(rows: Sequence, columns: Sequence, limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this is the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
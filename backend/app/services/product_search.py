@@ -0,0 +1,64 @@
+"""
+Product Search
+- Trigram (pg_trgm) matching on name / name_en / code, ranked by similarity
+- Case-insensitive prefix fast path for code and barcode lookups, with
+  substring matches on code / barcode ranked below it
+"""
+import re
+from typing import Optional, Tuple
+from sqlalchemy import or_, func, case, literal
+from sqlalchemy.sql import Select
+
+from app.models.models import Product
+
+# Terms that look like a product code or barcode (contain a digit, no spaces)
+_CODE_LIKE = re.compile(r"^(?=.*\d)[A-Za-z0-9\-_.]+$")
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_product_search(query: Select, search: Optional[str]) -> Tuple[Select, Optional[object]]:
+    """
+    Add a search filter to a products query.
+    Returns (query, rank) where rank is an expression to order by
+    (higher is better), or None when there is no search term.
+    """
+    term = (search or "").strip()
+    if not term:
+        return query, None
+
+    pattern = f"%{_escape_like(term)}%"
+    name_match = or_(
+        Product.name.ilike(pattern),
+        Product.name_en.ilike(pattern),
+        Product.name.op("%")(term),
+        Product.name_en.op("%")(term),
+    )
+    similarity = func.greatest(
+        func.similarity(Product.name, term),
+        func.coalesce(func.similarity(Product.name_en, term), 0),
+        func.similarity(Product.code, term),
+    )
+
+    if _CODE_LIKE.match(term):
+        # Codes and barcodes are typed/scanned from the start: exact and
+        # prefix hits come first through the lower() text_pattern_ops
+        # indexes; anywhere-in-the-code matches (trigram indexes) follow.
+        lowered = term.lower()
+        prefix = f"{_escape_like(lowered)}%"
+        code, barcode = func.lower(Product.code), func.lower(Product.barcode)
+        code_prefix = or_(code.like(prefix), barcode.like(prefix))
+        code_substring = or_(Product.code.ilike(pattern), Product.barcode.ilike(pattern))
+        query = query.where(or_(code_prefix, code_substring, name_match))
+        rank = case(
+            (or_(code == lowered, barcode == lowered), literal(3.0)),
+            (code_prefix, literal(2.0)),
+            (code_substring, literal(1.0)),
+            else_=similarity,
+        )
+        return query, rank
+
+    query = query.where(or_(name_match, Product.code.ilike(pattern)))
+    return query, similarity
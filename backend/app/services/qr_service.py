@@ -7,34 +7,25 @@ QR Code Service
 import qrcode
 import io
 import base64
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional
 from PIL import Image
 
+from app.core.config import settings
+from app.services.emvco import build_payload, tlv
 
-def _promptpay_checksum(data: str) -> str:
-    """Calculate CRC-16/CCITT-FALSE checksum for PromptPay QR."""
-    crc = 0xFFFF
-    for char in data:
-        crc ^= ord(char) << 8
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc <<= 1
-            crc &= 0xFFFF
-    return format(crc, '04X')
 
-
-def generate_promptpay_qr(
+@lru_cache(maxsize=4096)
+def promptpay_payload(
     promptpay_id: str,
     amount: Optional[Decimal] = None,
     order_ref: Optional[str] = None
-) -> dict:
-    """
-    Generate PromptPay QR Code payload (EMVCo format).
-    Returns dict with qr_data (string) and qr_image_base64.
-    """
+) -> str:
+    """Build (and memoize) the PromptPay EMVCo payload string."""
     # Clean PromptPay ID (phone or tax ID)
     pid = promptpay_id.replace("-", "").replace(" ", "")
     if pid.startswith("0") and len(pid) == 10:
@@ -42,44 +33,53 @@ def generate_promptpay_qr(
 
     # Build EMVCo payload
     merchant_id = f"0016A000000677010111{len(pid):02d}{pid}"
-    payload_body = (
-        f"000201"                          # Payload Format Indicator
-        f"010212"                          # Point of Initiation Method (12=dynamic)
-        f"29{len(merchant_id):02d}{merchant_id}"  # Merchant Account Info
-        f"5303764"                         # Transaction Currency (764=THB)
-    )
+    fields = [
+        ("00", "01"),                      # Payload Format Indicator
+        ("01", "12"),                      # Point of Initiation Method (12=dynamic)
+        ("29", merchant_id),               # Merchant Account Info
+        ("53", "764"),                     # Transaction Currency (764=THB)
+    ]
 
     if amount is not None and amount > 0:
-        amount_str = f"{amount:.2f}"
-        payload_body += f"54{len(amount_str):02d}{amount_str}"
+        fields.append(("54", f"{amount:.2f}"))
 
     if order_ref:
-        ref_field = f"05{len(order_ref):02d}{order_ref}"
-        additional = f"62{len(ref_field):02d}{ref_field}"
-        payload_body += additional
-
-    payload_body += "6304"
-    checksum = _promptpay_checksum(payload_body)
-    qr_data = payload_body + checksum
-
-    # Generate QR image
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(qr_data)
+        fields.append(("62", tlv("05", order_ref)))  # Additional Data: reference
+
+    return build_payload(fields)
+
+
+def product_qr_payload(product_id: str, product_code: str) -> str:
+    """Content encoded in a product's QR label."""
+    return f"AGRIPOS:PRODUCT:{product_code}:{product_id}"
+
+
+def _render_png_base64(data: str, error_correction: int, box_size: int) -> str:
+    """Build the QR matrix and encode it as a PNG data URI (CPU bound)."""
+    qr = qrcode.QRCode(version=1, error_correction=error_correction, box_size=box_size, border=4)
+    qr.add_data(data)
     qr.make(fit=True)
     img = qr.make_image(fill_color="black", back_color="white")
-
     buffer = io.BytesIO()
     img.save(buffer, format="PNG")
     qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/png;base64,{qr_base64}"
+
 
+def generate_promptpay_qr(
+    promptpay_id: str,
+    amount: Optional[Decimal] = None,
+    order_ref: Optional[str] = None
+) -> dict:
+    """
+    Generate PromptPay QR Code payload (EMVCo format).
+    Returns dict with qr_data (string) and qr_image_base64.
+    Blocking; async handlers should use render_promptpay_qr.
+    """
+    qr_data = promptpay_payload(promptpay_id, amount, order_ref)
     return {
         "qr_data": qr_data,
-        "qr_image_base64": f"data:image/png;base64,{qr_base64}",
+        "qr_image_base64": _render_png_base64(qr_data, qrcode.constants.ERROR_CORRECT_M, 10),
         "amount": float(amount) if amount else None,
         "promptpay_id": promptpay_id,
     }
@@ -87,15 +87,77 @@ def generate_promptpay_qr(
 
 def generate_product_qr(product_id: str, product_code: str) -> dict:
     """Generate QR code for a product (for scanning at POS)."""
-    qr_content = f"AGRIPOS:PRODUCT:{product_code}:{product_id}"
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=8, border=4)
-    qr.add_data(qr_content)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    qr_content = product_qr_payload(product_id, product_code)
+    return {
+        "qr_data": qr_content,
+        "qr_image_base64": _render_png_base64(qr_content, qrcode.constants.ERROR_CORRECT_L, 8),
+    }
+
+
+# ─── ASYNC RENDERING ─────────────────────────────────────────
+# QR matrix building and PNG encoding are CPU bound; run them on a small
+# dedicated pool so request handlers never block the event loop.
+_render_pool = ThreadPoolExecutor(max_workers=settings.QR_RENDER_WORKERS, thread_name_prefix="qr-render")
+
+
+class _ImageCache:
+    """LRU of rendered images bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: "OrderedDict[tuple, str]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[str]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: tuple, value: str) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._data:
+            self.size -= len(self._data.pop(key))
+        self._data[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted)
+
+
+_product_images = _ImageCache(settings.QR_IMAGE_CACHE_BYTES)
+
+
+async def _render(data: str, error_correction: int, box_size: int) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_render_pool, _render_png_base64, data, error_correction, box_size)
+
+
+async def render_promptpay_qr(
+    promptpay_id: str,
+    amount: Optional[Decimal] = None,
+    order_ref: Optional[str] = None
+) -> dict:
+    """Async generate_promptpay_qr: rendering runs on the QR pool."""
+    qr_data = promptpay_payload(promptpay_id, amount, order_ref)
+    return {
+        "qr_data": qr_data,
+        "qr_image_base64": await _render(qr_data, qrcode.constants.ERROR_CORRECT_M, 10),
+        "amount": float(amount) if amount else None,
+        "promptpay_id": promptpay_id,
+    }
+
+
+async def render_product_qr(product_id: str, product_code: str) -> dict:
+    """Async generate_product_qr; images are cached since they never change."""
+    qr_content = product_qr_payload(product_id, product_code)
+    key = (product_id, product_code)
+    image = _product_images.get(key)
+    if image is None:
+        image = await _render(qr_content, qrcode.constants.ERROR_CORRECT_L, 8)
+        _product_images.set(key, image)
     return {
         "qr_data": qr_content,
-        "qr_image_base64": f"data:image/png;base64,{qr_base64}",
+        "qr_image_base64": image,
     }
@@ -0,0 +1,245 @@
+"""
+Report Job Service
+- Queue heavy reports and run them in the background on the report pool
+- Store finished results on disk for download
+- In-process queue, or a Redis list consumed by any API process or by
+  python -m app.commands.report_worker
+"""
+import json
+import time
+import uuid
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.db.database import ReportSessionLocal
+from app.services.cache_service import REDIS_RETRY_INTERVAL, get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "report_jobs:queue"
+# Seconds a worker blocks on the Redis list before checking the local queue
+POP_TIMEOUT = 1
+
+ReportBuilder = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class JobStore:
+    """Job status records; Redis when configured and reachable, else local."""
+
+    def __init__(self, use_redis: bool, retention: int):
+        self.use_redis = use_redis
+        self.retention = retention
+        self._local: Dict[str, dict] = {}
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"report_job:{job_id}"
+
+    async def save(self, job: dict) -> None:
+        if self.use_redis:
+            client = get_redis()
+            if client is not None:
+                try:
+                    await client.set(self._key(job["id"]), json.dumps(job), ex=self.retention)
+                    return
+                except Exception as exc:
+                    mark_redis_down(exc)
+        self._local[job["id"]] = job
+
+    async def load(self, job_id: str) -> Optional[dict]:
+        if self.use_redis:
+            client = get_redis()
+            if client is not None:
+                try:
+                    raw = await client.get(self._key(job_id))
+                    if raw is not None:
+                        return json.loads(raw)
+                except Exception as exc:
+                    mark_redis_down(exc)
+        return self._local.get(job_id)
+
+    def purge_local(self, before: float) -> None:
+        for job_id in [j for j, job in self._local.items() if job["created_at"] < before]:
+            del self._local[job_id]
+
+
+class ReportJobQueue:
+    """
+    Queue of report jobs. Workers start lazily on the first submit (or via
+    run_workers) and run one builder at a time each, using ReportSessionLocal
+    so the query is bounded by REPORT_STATEMENT_TIMEOUT_MS and never
+    competes for the request pool.
+
+    With the Redis backend, job ids are pushed to a Redis list that every
+    worker pops from, so a job runs once on whichever process is free. Jobs
+    submitted while Redis is unreachable go to the in-process queue; an API
+    process without workers of its own (REPORT_JOB_WORKERS=0) starts a
+    temporary one that drains that queue and exits.
+    """
+
+    def __init__(self, workers: int, result_dir: str, retention: int, use_redis: bool):
+        self.workers = workers
+        self.result_dir = Path(result_dir)
+        self.retention = retention
+        self.store = JobStore(use_redis, retention)
+        self._builders: Dict[str, ReportBuilder] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._fallback_task: Optional[asyncio.Task] = None
+        self._blocking_redis: Optional[aioredis.Redis] = None
+
+    def register(self, name: str, builder: ReportBuilder) -> None:
+        self._builders[name] = builder
+
+    @property
+    def reports(self) -> List[str]:
+        return sorted(self._builders)
+
+    def result_path(self, job_id: str) -> Path:
+        return self.result_dir / f"{job_id}.json"
+
+    async def submit(self, report: str, requested_by: Optional[str] = None) -> dict:
+        if report not in self._builders:
+            raise HTTPException(400, f"Unknown report '{report}'. Available: {', '.join(self.reports)}")
+        self._purge_expired()
+        job = {
+            "id": uuid.uuid4().hex,
+            "report": report,
+            "status": "queued",
+            "requested_by": requested_by,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        await self.store.save(job)
+        self._ensure_workers()
+        if not await self._push(job):
+            self._queue.put_nowait(job)
+            self._ensure_fallback_worker()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        try:
+            job_id = uuid.UUID(job_id).hex
+        except ValueError:
+            return None
+        return await self.store.load(job_id)
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    def _ensure_fallback_worker(self) -> None:
+        # Without workers here nothing else would ever read the local queue
+        if self.workers == 0 and (self._fallback_task is None or self._fallback_task.done()):
+            self._fallback_task = asyncio.create_task(self._drain_local())
+
+    async def _drain_local(self) -> None:
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await self._run(job)
+
+    async def run_workers(self) -> None:
+        """Run the workers until cancelled (standalone worker process)."""
+        self._ensure_workers()
+        await asyncio.gather(*self._tasks)
+
+    def _redis_for_pop(self) -> Optional[aioredis.Redis]:
+        # BRPOP blocks longer than the shared client's socket timeout allows
+        if not self.store.use_redis or get_redis() is None:
+            return None
+        if self._blocking_redis is None:
+            self._blocking_redis = aioredis.from_url(
+                settings.REDIS_URL, socket_connect_timeout=0.25, socket_timeout=POP_TIMEOUT + 5,
+            )
+        return self._blocking_redis
+
+    async def _push(self, job: dict) -> bool:
+        client = get_redis() if self.store.use_redis else None
+        if client is None:
+            return False
+        try:
+            await client.lpush(QUEUE_KEY, job["id"])
+            return True
+        except Exception as exc:
+            mark_redis_down(exc)
+            return False
+
+    async def _next_job(self) -> Optional[dict]:
+        client = self._redis_for_pop()
+        if client is None:
+            if not self.store.use_redis:
+                return await self._queue.get()
+            try:
+                return await asyncio.wait_for(self._queue.get(), REDIS_RETRY_INTERVAL)
+            except asyncio.TimeoutError:
+                return None
+        try:
+            popped = await client.brpop(QUEUE_KEY, timeout=POP_TIMEOUT)
+        except Exception as exc:
+            mark_redis_down(exc)
+            popped = None
+        if popped is not None:
+            return await self.store.load(popped[1].decode())
+        # Jobs queued locally while Redis was down
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._next_job()
+            if job is not None:
+                await self._run(job)
+
+    async def _run(self, job: dict) -> None:
+        job.update(status="running", started_at=time.time())
+        await self.store.save(job)
+        try:
+            async with ReportSessionLocal() as db:
+                data = await self._builders[job["report"]](db)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_result, job["id"], data)
+            job.update(status="done")
+        except Exception as exc:
+            logger.exception("Report job %s (%s) failed", job["id"], job["report"])
+            job.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+        job["finished_at"] = time.time()
+        await self.store.save(job)
+
+    def _write_result(self, job_id: str, data: Any) -> None:
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        path = self.result_path(job_id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, default=str), encoding="utf-8")
+        tmp.replace(path)  # pollers never see a half-written file
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.retention
+        self.store.purge_local(cutoff)
+        if self.result_dir.is_dir():
+            for path in self.result_dir.glob("*.json"):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+
+
+report_jobs = ReportJobQueue(
+    workers=settings.REPORT_JOB_WORKERS,
+    result_dir=settings.REPORT_JOB_DIR,
+    retention=settings.REPORT_JOB_RETENTION,
+    use_redis=settings.REPORT_JOB_BACKEND == "redis",
+)
@@ -0,0 +1,239 @@
+"""
+Columnar Sales Analytics
+- Load the Parquet sales fact dataset into NumPy arrays (reloaded when the
+  export watermark moves)
+- Top-N products, daily trend with moving average, ABC classification and
+  category breakdown via vectorised group-bys (bincount over dictionary codes)
+
+Figures are line-level (after line discounts, including tax) and reflect
+orders up to the last Parquet export.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.sales_parquet import FACT_SCHEMA, WATERMARK_FILE, load_watermark
+
+_EPOCH = date(1970, 1, 1)
+_COLUMNS = [
+    "sale_date", "order_id", "order_updated_at", "product_id", "product_code",
+    "product_name", "unit", "category", "quantity", "total_amount",
+]
+
+
+# order_id is read dictionary-encoded so ids are never materialised per row
+_READ_SCHEMA = pa.schema([
+    pa.field(f.name, pa.dictionary(pa.int32(), pa.string())) if f.name == "order_id" else f
+    for f in FACT_SCHEMA
+])
+
+
+def _encode(column: pa.ChunkedArray) -> Tuple[np.ndarray, np.ndarray]:
+    """Unify a dictionary column into (int32 codes, values); nulls get the last code."""
+    encoded = column.unify_dictionaries().combine_chunks()
+    values = encoded.dictionary.to_numpy(zero_copy_only=False)
+    codes = encoded.indices.fill_null(len(values)).to_numpy()
+    return codes.astype(np.int32), np.append(values, None)
+
+
+class SalesFacts:
+    """One immutable columnar snapshot of the fact dataset, sorted by day."""
+
+    def __init__(self, table: pa.Table, as_of: Optional[datetime]):
+        self.as_of = as_of
+
+        # Re-exported orders appear once per export; keep each order's latest copy
+        order, _ = _encode(table.column("order_id"))
+        updated = table.column("order_updated_at").cast(pa.int64()).to_numpy()
+        latest = np.full(order.max() + 1 if len(order) else 0, np.iinfo(np.int64).min)
+        np.maximum.at(latest, order, updated)
+        keep = updated == latest[order]
+
+        day = table.column("sale_date").cast(pa.int32()).to_numpy()[keep]
+        sort = np.argsort(day, kind="stable")
+        self.day = day[sort]
+        # Each order falls on one day, so flagging its first line lets
+        # per-day order counts be a plain weighted bincount
+        order = order[keep][sort]
+        self.first_line = np.zeros(len(order), dtype=bool)
+        self.first_line[np.unique(order, return_index=True)[1]] = True
+        self.quantity = table.column("quantity").to_numpy()[keep][sort]
+        self.revenue = table.column("total_amount").to_numpy()[keep][sort]
+
+        product, self.product_ids = _encode(table.column("product_id"))
+        self.product = product[keep][sort]
+        category, self.category_names = _encode(table.column("category"))
+        self.category = category[keep][sort]
+
+        # Product attributes from each product's most recent row
+        self.n_products = len(self.product_ids)
+        newest_first = np.flatnonzero(keep)[::-1]
+        seen, first = np.unique(product[newest_first], return_index=True)
+        last_rows = np.zeros(self.n_products, dtype=np.int64)
+        last_rows[seen] = newest_first[first]
+        if table.num_rows:
+            take = pa.array(last_rows)
+            self.product_codes = table.column("product_code").take(take).cast(pa.string()).to_pylist()
+            self.product_names = table.column("product_name").take(take).cast(pa.string()).to_pylist()
+            self.product_units = table.column("unit").take(take).cast(pa.string()).to_pylist()
+        else:
+            # Exports so far held only orders without lines
+            self.product_codes = self.product_names = self.product_units = [None] * self.n_products
+
+        # Final tie-break for rankings: product id order, as ORDER BY products.id
+        self.product_rank = np.empty(self.n_products, dtype=np.int64)
+        self.product_rank[np.argsort([p or "" for p in self.product_ids], kind="stable")] = np.arange(self.n_products)
+
+    def _slice(self, date_from: date, date_to: date) -> slice:
+        lo = np.searchsorted(self.day, (date_from - _EPOCH).days, side="left")
+        hi = np.searchsorted(self.day, (date_to - _EPOCH).days, side="right")
+        return slice(lo, hi)
+
+    def _product_totals(self, date_from: date, date_to: date) -> Tuple[np.ndarray, np.ndarray]:
+        s = self._slice(date_from, date_to)
+        revenue = np.bincount(self.product[s], weights=self.revenue[s], minlength=self.n_products)
+        quantity = np.bincount(self.product[s], weights=self.quantity[s], minlength=self.n_products)
+        return revenue, quantity
+
+    def _product_row(self, i: int, revenue: np.ndarray, quantity: np.ndarray) -> dict:
+        return {
+            "product_id": self.product_ids[i],
+            "product_code": self.product_codes[i],
+            "product_name": self.product_names[i],
+            "unit": self.product_units[i],
+            "total_qty": round(float(quantity[i]), 3),
+            "total_revenue": round(float(revenue[i]), 2),
+        }
+
+    def top_products(self, date_from: date, date_to: date, limit: int, by: str = "revenue") -> List[dict]:
+        revenue, quantity = self._product_totals(date_from, date_to)
+        key, tie = (revenue, quantity) if by == "revenue" else (quantity, revenue)
+        sold = np.flatnonzero(quantity != 0)
+        top = sold[np.lexsort((self.product_rank[sold], -tie[sold], -key[sold]))[:limit]]
+        return [self._product_row(i, revenue, quantity) for i in top]
+
+    def daily_trend(self, date_from: date, date_to: date, window: int) -> List[dict]:
+        # Start early so the first days already have a full averaging window
+        start = date_from - timedelta(days=window - 1)
+        s = self._slice(start, date_to)
+        n_days = (date_to - start).days + 1
+        offset = self.day[s] - (start - _EPOCH).days
+        revenue = np.bincount(offset, weights=self.revenue[s], minlength=n_days)
+        quantity = np.bincount(offset, weights=self.quantity[s], minlength=n_days)
+        lines = np.bincount(offset, minlength=n_days)
+        orders = np.bincount(offset, weights=self.first_line[s], minlength=n_days)
+        csum = np.concatenate(([0.0], np.cumsum(revenue)))
+        moving = (csum[window:] - csum[:-window]) / window
+
+        return [
+            {
+                "date": str(start + timedelta(days=d)),
+                "order_count": int(orders[d]),
+                "line_count": int(lines[d]),
+                "total_qty": round(float(quantity[d]), 3),
+                "total_sales": round(float(revenue[d]), 2),
+                "moving_avg_sales": round(float(moving[d - window + 1]), 2),
+            }
+            for d in range(window - 1, n_days)
+        ]
+
+    def abc_classes(self, date_from: date, date_to: date, a_share: float, b_share: float) -> dict:
+        revenue, quantity = self._product_totals(date_from, date_to)
+        sold = np.flatnonzero(quantity != 0)
+        ranked = sold[np.lexsort((self.product_rank[sold], -revenue[sold]))]
+        total = float(revenue[ranked].sum())
+        cumulative = np.cumsum(revenue[ranked]) / total if total else np.zeros(len(ranked))
+        # Class by the share reached before the product, so the top seller is always A
+        before = cumulative - (revenue[ranked] / total if total else 0)
+        classes = np.where(before < a_share, "A", np.where(before < b_share, "B", "C"))
+
+        items = []
+        for i, cls, cum in zip(ranked, classes, cumulative):
+            row = self._product_row(i, revenue, quantity)
+            row["revenue_share"] = round(float(revenue[i] / total), 4) if total else 0.0
+            row["cumulative_share"] = round(float(cum), 4)
+            row["class"] = str(cls)
+            items.append(row)
+        return {
+            "total_revenue": round(total, 2),
+            "summary": {c: int((classes == c).sum()) for c in "ABC"},
+            "items": items,
+        }
+
+    def category_breakdown(self, date_from: date, date_to: date) -> List[dict]:
+        s = self._slice(date_from, date_to)
+        n = len(self.category_names)
+        revenue = np.bincount(self.category[s], weights=self.revenue[s], minlength=n)
+        quantity = np.bincount(self.category[s], weights=self.quantity[s], minlength=n)
+        lines = np.bincount(self.category[s], minlength=n)
+        # Distinct products per category from a dense (category, product) count
+        pairs = np.bincount(
+            self.category[s].astype(np.int64) * self.n_products + self.product[s],
+            minlength=n * self.n_products,
+        )
+        products = np.count_nonzero(pairs.reshape(n, self.n_products), axis=1)
+        total = float(revenue.sum())
+        order = np.argsort(-revenue, kind="stable")
+        return [
+            {
+                "category": self.category_names[c],
+                "line_count": int(lines[c]),
+                "product_count": int(products[c]),
+                "total_qty": round(float(quantity[c]), 3),
+                "total_revenue": round(float(revenue[c]), 2),
+                "revenue_share": round(float(revenue[c]) / total, 4) if total else 0.0,
+            }
+            for c in order if lines[c]
+        ]
+
+
+def _load(root: Path) -> SalesFacts:
+    dataset = ds.dataset(
+        root,
+        format=ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=["order_id"])),
+        schema=_READ_SCHEMA,
+        partitioning=ds.partitioning(pa.schema([("sale_date", pa.date32())]), flavor="hive"),
+        exclude_invalid_files=True,
+    )
+    mark = load_watermark(root)
+    return SalesFacts(dataset.to_table(columns=_COLUMNS), mark.as_of if mark else None)
+
+
+class FactCache:
+    """Holds the loaded snapshot; reloads off the event loop after each export."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._facts: Optional[SalesFacts] = None
+        self._signature = None
+        self._lock = asyncio.Lock()
+
+    def _current_signature(self):
+        try:
+            return (self.root / WATERMARK_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    async def get(self) -> SalesFacts:
+        signature = self._current_signature()
+        if signature is None:
+            raise HTTPException(503, "Sales Parquet dataset not found; run the sales Parquet export first")
+        if self._facts is not None and signature == self._signature:
+            return self._facts
+        async with self._lock:
+            if self._facts is None or signature != self._signature:
+                loop = asyncio.get_running_loop()
+                self._facts = await loop.run_in_executor(None, _load, self.root)
+                self._signature = signature
+        return self._facts
+
+
+sales_facts = FactCache(settings.PARQUET_EXPORT_DIR)
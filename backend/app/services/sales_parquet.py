@@ -0,0 +1,212 @@
+"""
+Sales Fact Parquet Export
+- Incrementally export completed order lines since the last watermark
+- Denormalised fact rows (product, category, customer, warehouse)
+- Hive-style sale_date=YYYY-MM-DD partitions with dictionary-encoded dimensions
+
+Orders are picked up by (xact_id, updated_at, id), xact_id being the
+transaction that last wrote the order. A run only reads orders whose
+xact_id is below its snapshot's xmin, so a slow transaction still open
+holds the watermark back instead of committing behind it. An order edited
+after it was exported is exported again; readers should keep the row with
+the latest order_updated_at per line_id. cost_price is the product cost at
+export time.
+"""
+import json
+import asyncio
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import HTTPException
+from sqlalchemy import select, func, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import (
+    SalesOrder, SalesOrderItem, Product, Category, Customer, Warehouse, OrderStatus,
+)
+from app.services.date_range import local_date
+
+WATERMARK_FILE = "_watermark.json"
+
+# Serialises runs across API workers and the command
+_ADVISORY_LOCK_KEY = 5_841_503
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+FACT_SCHEMA = pa.schema([
+    ("sale_date", pa.date32()),
+    ("order_id", pa.string()),
+    ("line_id", pa.string()),
+    ("order_number", pa.string()),
+    ("order_date", pa.timestamp("us", tz="UTC")),
+    ("order_updated_at", pa.timestamp("us", tz="UTC")),
+    ("warehouse_code", _DICT),
+    ("payment_method", _DICT),
+    ("is_credit_sale", pa.bool_()),
+    ("customer_code", _DICT),
+    ("customer_type", _DICT),
+    ("product_id", _DICT),
+    ("product_code", _DICT),
+    ("product_name", _DICT),
+    ("category", _DICT),
+    ("unit", _DICT),
+    ("quantity", pa.float64()),
+    ("unit_price", pa.float64()),
+    ("cost_price", pa.float64()),
+    ("discount_amount", pa.float64()),
+    ("tax_amount", pa.float64()),
+    ("total_amount", pa.float64()),
+])
+
+_UUID_COLUMNS = {"order_id", "line_id", "product_id"}
+_FLOAT_COLUMNS = {f.name for f in FACT_SCHEMA if pa.types.is_floating(f.type)}
+
+
+class Watermark(NamedTuple):
+    xact_id: int
+    updated_at: datetime
+    order_id: uuid.UUID
+    as_of: datetime  # latest order_updated_at exported so far
+
+
+def load_watermark(out_dir: Path) -> Optional[Watermark]:
+    path = out_dir / WATERMARK_FILE
+    if not path.is_file():
+        return None
+    data = json.loads(path.read_text())
+    updated_at = datetime.fromisoformat(data["updated_at"])
+    # Files from before xact_id mark a position among the xact_id 0 orders
+    return Watermark(
+        data.get("xact_id", 0), updated_at, uuid.UUID(data["order_id"]),
+        datetime.fromisoformat(data.get("as_of", data["updated_at"])),
+    )
+
+
+def _save_watermark(out_dir: Path, mark: Watermark) -> None:
+    path = out_dir / WATERMARK_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({
+        "xact_id": mark.xact_id, "updated_at": mark.updated_at.isoformat(),
+        "order_id": str(mark.order_id), "as_of": mark.as_of.isoformat(),
+    }))
+    tmp.replace(path)
+
+
+def _fact_query(order_ids: Sequence[uuid.UUID]):
+    return (
+        select(
+            local_date(SalesOrder.order_date).label("sale_date"),
+            SalesOrder.id.label("order_id"),
+            SalesOrderItem.id.label("line_id"),
+            SalesOrder.order_number,
+            SalesOrder.order_date,
+            SalesOrder.updated_at.label("order_updated_at"),
+            Warehouse.code.label("warehouse_code"),
+            SalesOrder.payment_method,
+            SalesOrder.is_credit_sale,
+            Customer.code.label("customer_code"),
+            Customer.customer_type,
+            Product.id.label("product_id"),
+            Product.code.label("product_code"),
+            Product.name.label("product_name"),
+            Category.name.label("category"),
+            Product.unit,
+            SalesOrderItem.quantity,
+            SalesOrderItem.unit_price,
+            Product.cost_price,
+            SalesOrderItem.discount_amount,
+            SalesOrderItem.tax_amount,
+            SalesOrderItem.total_amount,
+        )
+        .join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id)
+        .join(Product, SalesOrderItem.product_id == Product.id)
+        .outerjoin(Category, Product.category_id == Category.id)
+        .outerjoin(Customer, SalesOrder.customer_id == Customer.id)
+        .outerjoin(Warehouse, SalesOrder.warehouse_id == Warehouse.id)
+        .where(SalesOrderItem.order_id.in_(order_ids))
+        .order_by(SalesOrder.order_date, SalesOrderItem.id)
+    )
+
+
+def _write_batch(rows: List, out_dir: Path, basename: str) -> None:
+    """Build the Arrow table for one batch and write its date partitions."""
+    columns = {}
+    for i, field in enumerate(FACT_SCHEMA):
+        values = [r[i] for r in rows]
+        if field.name in _UUID_COLUMNS:
+            values = [str(v) for v in values]
+        elif field.name in _FLOAT_COLUMNS:
+            values = [None if v is None else float(v) for v in values]
+        elif field.name in ("payment_method", "unit"):
+            values = [getattr(v, "value", v) for v in values]
+        columns[field.name] = values
+    table = pa.Table.from_pydict(columns, schema=FACT_SCHEMA)
+    pq.write_to_dataset(
+        table,
+        root_path=str(out_dir),
+        partition_cols=["sale_date"],
+        # Deterministic per batch, so a rerun after a crash overwrites instead of duplicating
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        use_dictionary=True,
+        compression="zstd",
+    )
+
+
+async def export_sales_facts(db: AsyncSession, out_dir: Optional[str] = None) -> dict:
+    """
+    Append completed orders written since the watermark to the Parquet
+    dataset. Orders from transactions that were still running when the
+    run started are left for the next run.
+    """
+    root = Path(out_dir or settings.PARQUET_EXPORT_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+
+    locked = await db.scalar(select(func.pg_try_advisory_xact_lock(_ADVISORY_LOCK_KEY)))
+    if not locked:
+        raise HTTPException(409, "A sales Parquet export is already running")
+
+    mark = load_watermark(root)
+    # Every transaction below this id has committed or rolled back
+    horizon = await db.scalar(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+    loop = asyncio.get_running_loop()
+    orders = lines = 0
+    while True:
+        query = (
+            select(SalesOrder.id, SalesOrder.updated_at, SalesOrder.xact_id)
+            .where(SalesOrder.status == OrderStatus.completed, SalesOrder.xact_id < horizon)
+            .order_by(SalesOrder.xact_id, SalesOrder.updated_at, SalesOrder.id)
+            .limit(settings.PARQUET_EXPORT_BATCH_ORDERS)
+        )
+        if mark:
+            query = query.where(
+                tuple_(SalesOrder.xact_id, SalesOrder.updated_at, SalesOrder.id)
+                > tuple_(mark.xact_id, mark.updated_at, mark.order_id)
+            )
+        batch = (await db.execute(query)).all()
+        if not batch:
+            break
+
+        rows = (await db.execute(_fact_query([o.id for o in batch]))).all()
+        first = batch[0]
+        basename = f"part-{first.xact_id:012d}-{first.updated_at:%Y%m%dT%H%M%S%f}-{first.id.hex[:8]}"
+        if rows:
+            await loop.run_in_executor(None, _write_batch, rows, root, basename)
+        last = batch[-1]
+        latest = max(o.updated_at for o in batch)
+        mark = Watermark(last.xact_id, last.updated_at, last.id, max(mark.as_of, latest) if mark else latest)
+        _save_watermark(root, mark)
+        orders += len(batch)
+        lines += len(rows)
+
+    return {
+        "output_dir": str(root),
+        "orders": orders,
+        "lines": lines,
+        "watermark": mark.as_of.isoformat() if mark else None,
+    }
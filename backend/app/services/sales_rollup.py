@@ -0,0 +1,104 @@
+"""
+Sales Rollup Service
+- Incrementally maintain daily_sales_rollup as orders complete
+- Rebuild the rollup from raw sales_orders (backfill / verification)
+"""
+import uuid
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Optional, Sequence
+from sqlalchemy import select, delete, func, literal, and_, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import DailySalesRollup, SalesOrder, OrderStatus
+from app.services.date_range import between_days, local_date, to_shop_date
+from app.services.stock_service import default_warehouse_id
+
+_SUM_COLUMNS = ("subtotal", "discount_amount", "tax_amount", "total_amount")
+
+
+async def record_completed_orders(db: AsyncSession, orders: Sequence[SalesOrder]) -> None:
+    """
+    Add completed orders to the rollup inside the caller's transaction.
+    Orders must already have warehouse_id and payment_method set.
+    """
+    buckets = defaultdict(lambda: {"order_count": 0, **{c: Decimal("0") for c in _SUM_COLUMNS}})
+    for order in orders:
+        method = getattr(order.payment_method, "value", order.payment_method)
+        bucket = buckets[(to_shop_date(order.order_date), order.warehouse_id, method)]
+        bucket["order_count"] += 1
+        for col in _SUM_COLUMNS:
+            bucket[col] += getattr(order, col) or Decimal("0")
+    if not buckets:
+        return
+
+    rows = [
+        {"id": uuid.uuid4(), "sale_date": d, "warehouse_id": wh, "payment_method": pm, **totals}
+        for (d, wh, pm), totals in sorted(buckets.items(), key=lambda kv: (kv[0][0], str(kv[0][1]), kv[0][2]))
+    ]
+    stmt = pg_insert(DailySalesRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["sale_date", "warehouse_id", "payment_method"],
+        set_={
+            "order_count": DailySalesRollup.order_count + stmt.excluded.order_count,
+            **{c: getattr(DailySalesRollup, c) + getattr(stmt.excluded, c) for c in _SUM_COLUMNS},
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_rollup(
+    db: AsyncSession,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> int:
+    """
+    Recompute the rollup for [date_from, date_to] (whole history when
+    omitted) from raw completed orders. Returns the number of rollup rows.
+    """
+    range_filter = [true()]
+    if date_from:
+        range_filter.append(DailySalesRollup.sale_date >= date_from)
+    if date_to:
+        range_filter.append(DailySalesRollup.sale_date <= date_to)
+    await db.execute(delete(DailySalesRollup).where(and_(*range_filter)))
+
+    # Orders created before warehouses were mandatory roll up under the default one
+    fallback_wh = literal(await default_warehouse_id(db), DailySalesRollup.warehouse_id.type)
+    orders = (
+        select(
+            local_date(SalesOrder.order_date).label("sale_date"),
+            func.coalesce(SalesOrder.warehouse_id, fallback_wh).label("warehouse_id"),
+            SalesOrder.payment_method,
+            *[getattr(SalesOrder, c) for c in _SUM_COLUMNS],
+        )
+        .where(
+            SalesOrder.status == OrderStatus.completed,
+            SalesOrder.payment_method.isnot(None),
+            between_days(SalesOrder.order_date, date_from, date_to),
+        )
+        .subquery()
+    )
+    source = (
+        select(
+            func.uuid_generate_v4(),
+            orders.c.sale_date,
+            orders.c.warehouse_id,
+            orders.c.payment_method,
+            func.count(),
+            *[func.coalesce(func.sum(orders.c[c]), 0) for c in _SUM_COLUMNS],
+        )
+        .group_by(orders.c.sale_date, orders.c.warehouse_id, orders.c.payment_method)
+    )
+    result = await db.execute(
+        pg_insert(DailySalesRollup)
+        .from_select(
+            ["id", "sale_date", "warehouse_id", "payment_method", "order_count", *_SUM_COLUMNS],
+            source,
+        )
+        .returning(DailySalesRollup.id)
+    )
+    return len(result.all())
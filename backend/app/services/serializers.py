@@ -0,0 +1,240 @@
+"""
+Row Serializers
+- Column projections shared by the list endpoints
+- Each one names exactly the columns an API row carries; queries select
+  those columns instead of whole ORM objects
+- Named views (?view=pos|admin) and ?fields= narrow list rows further
+"""
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func
+
+from app.core.serialization import RowSerializer
+from app.models.models import (
+    Product, Category, Customer, SalesOrder, Stock, StockTransaction, CreditTransaction,
+)
+
+_reserved = func.coalesce(Stock.reserved_quantity, 0)
+
+# Single product (detail, scan, create/update responses)
+PRODUCT_FIELDS = RowSerializer(
+    Product.id,
+    Product.code,
+    Product.barcode,
+    Product.name,
+    Product.name_en,
+    Product.category_id,
+    Product.supplier_id,
+    Product.unit,
+    Product.unit_per_pack,
+    Product.cost_price,
+    Product.selling_price,
+    Product.min_selling_price,
+    Product.tax_rate,
+    Product.description,
+    Product.min_stock_level,
+    Product.reorder_point,
+    Product.is_active,
+    Product.chemical_registration,
+    Product.expiry_tracking,
+    Product.main_image_url,
+    Product.thumbnails,
+    Product.qr_code,
+    Product.created_at,
+    Product.updated_at,
+    defaults={
+        "unit_per_pack": 1, "cost_price": 0, "selling_price": 0, "tax_rate": 7.0, "thumbnails": {},
+    },
+)
+
+# GET /products rows keep every column the endpoint has always returned
+PRODUCT_LIST_FIELDS = PRODUCT_FIELDS.extend(
+    Product.specifications,
+    Product.image_urls,
+    Product.max_stock_level,
+    Product.created_by,
+)
+
+# GET /products/changes rows: what a till replica needs to search, scan and price
+CATALOG_CHANGE_FIELDS = PRODUCT_FIELDS.project([
+    "id", "code", "barcode", "qr_code", "name", "name_en", "category_id", "unit",
+    "selling_price", "min_selling_price", "tax_rate", "main_image_url", "thumbnails", "is_active",
+]).extend(Product.row_version)
+
+CATEGORY_FIELDS = RowSerializer(
+    Category.id,
+    Category.name,
+    Category.name_en,
+    Category.sort_order,
+)
+
+CUSTOMER_FIELDS = RowSerializer(
+    Customer.id,
+    Customer.code,
+    Customer.customer_type,
+    Customer.name,
+    Customer.phone,
+    Customer.email,
+    Customer.address,
+    Customer.district,
+    Customer.province,
+    Customer.postal_code,
+    Customer.tax_id,
+    Customer.farm_area_rai,
+    Customer.crop_types,
+    Customer.credit_limit,
+    Customer.credit_balance,
+    Customer.credit_days,
+    Customer.credit_status,
+    Customer.loyalty_points,
+    Customer.total_purchases,
+    Customer.is_active,
+    Customer.notes,
+    Customer.created_at,
+    Customer.updated_at,
+    defaults={
+        "crop_types": [], "credit_limit": 0, "credit_balance": 0,
+        "credit_status": "active", "total_purchases": 0,
+    },
+)
+
+CUSTOMER_LIST_FIELDS = CUSTOMER_FIELDS.extend(
+    Customer.avatar_url,
+    Customer.created_by,
+)
+
+# Stock rows select from Stock joined to Product
+STOCK_LEVEL_FIELDS = RowSerializer(
+    Stock.id.label("stock_id"),
+    Stock.product_id,
+    Product.name.label("product_name"),
+    Product.code.label("product_code"),
+    Product.unit,
+    Stock.quantity,
+    _reserved.label("reserved"),
+    (Stock.quantity - _reserved).label("available"),
+    Product.min_stock_level,
+    Product.reorder_point,
+    (Stock.quantity <= Product.reorder_point).label("is_low"),
+)
+
+LOW_STOCK_FIELDS = RowSerializer(
+    Product.id.label("product_id"),
+    Product.code.label("product_code"),
+    Product.name.label("product_name"),
+    Stock.quantity.label("current_stock"),
+    Product.reorder_point,
+    Product.min_stock_level,
+)
+
+ORDER_FIELDS = RowSerializer(
+    SalesOrder.id,
+    SalesOrder.order_number,
+    SalesOrder.customer_id,
+    SalesOrder.cashier_id,
+    SalesOrder.warehouse_id,
+    SalesOrder.order_date,
+    SalesOrder.status,
+    SalesOrder.subtotal,
+    SalesOrder.discount_percent,
+    SalesOrder.discount_amount,
+    SalesOrder.tax_amount,
+    SalesOrder.total_amount,
+    SalesOrder.paid_amount,
+    SalesOrder.change_amount,
+    SalesOrder.payment_method,
+    SalesOrder.payment_status,
+    SalesOrder.qr_reference,
+    SalesOrder.notes,
+    SalesOrder.is_credit_sale,
+    SalesOrder.credit_due_date,
+    SalesOrder.receipt_url,
+    SalesOrder.created_at,
+    SalesOrder.updated_at,
+)
+
+STOCK_TRANSACTION_FIELDS = RowSerializer(
+    StockTransaction.id,
+    StockTransaction.transaction_type,
+    StockTransaction.reference_no,
+    StockTransaction.product_id,
+    StockTransaction.warehouse_id,
+    StockTransaction.quantity,
+    StockTransaction.unit_cost,
+    StockTransaction.total_cost,
+    StockTransaction.before_quantity,
+    StockTransaction.after_quantity,
+    StockTransaction.lot_number,
+    StockTransaction.expiry_date,
+    StockTransaction.notes,
+    StockTransaction.reference_id,
+    StockTransaction.created_by,
+    StockTransaction.created_at,
+)
+
+CREDIT_TRANSACTION_FIELDS = RowSerializer(
+    CreditTransaction.id,
+    CreditTransaction.customer_id,
+    CreditTransaction.order_id,
+    CreditTransaction.transaction_type,
+    CreditTransaction.amount,
+    CreditTransaction.balance_before,
+    CreditTransaction.balance_after,
+    CreditTransaction.due_date,
+    CreditTransaction.paid_date,
+    CreditTransaction.notes,
+    CreditTransaction.created_by,
+    CreditTransaction.created_at,
+)
+
+
+# ─── VIEWS ───────────────────────────────────────────────────
+# "admin" is always the full row; "pos" is what the till screens render
+PRODUCT_VIEWS = {
+    "pos": PRODUCT_LIST_FIELDS.project([
+        "id", "code", "name", "unit", "selling_price", "tax_rate", "main_image_url", "thumbnails",
+    ]),
+    "admin": PRODUCT_LIST_FIELDS,
+}
+
+CUSTOMER_VIEWS = {
+    "pos": CUSTOMER_LIST_FIELDS.project([
+        "id", "code", "name", "phone", "customer_type",
+        "credit_limit", "credit_balance", "credit_status",
+    ]),
+    "admin": CUSTOMER_LIST_FIELDS,
+}
+
+STOCK_VIEWS = {
+    "pos": STOCK_LEVEL_FIELDS.project([
+        "product_id", "product_code", "product_name", "unit", "available", "is_low",
+    ]),
+    "admin": STOCK_LEVEL_FIELDS,
+}
+
+
+def select_fields(
+    views: Dict[str, RowSerializer],
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> RowSerializer:
+    """
+    Projection for a list request: ?fields=a,b,c picks columns from the
+    full (admin) row, otherwise ?view= picks a named set. Defaults to admin.
+    """
+    if fields:
+        keys = [f.strip() for f in fields.split(",") if f.strip()]
+        full = views["admin"]
+        unknown = [k for k in keys if k not in full.keys]
+        if unknown or not keys:
+            raise HTTPException(
+                400, f"Unknown fields: {', '.join(unknown) or '(none given)'}; "
+                     f"available: {', '.join(full.keys)}"
+            )
+        return full.project(keys)
+    if view is None:
+        return views["admin"]
+    if view not in views:
+        raise HTTPException(400, f"Unknown view '{view}'; available: {', '.join(views)}")
+    return views[view]
@@ -0,0 +1,129 @@
+"""
+Stock Service
+- Commit sold quantities against warehouse stock on order completion
+- Write the matching sale rows to the stock ledger
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Sequence, Dict, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select, update, insert, values, column, func, tuple_, Numeric
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import (
+    SalesOrder, SalesOrderItem, Product, Stock, StockTransaction,
+    StockTransactionType, Warehouse,
+)
+
+
+async def default_warehouse_id(db: AsyncSession) -> uuid.UUID:
+    """Warehouse used for orders created without an explicit warehouse."""
+    result = await db.execute(
+        select(Warehouse.id)
+        .where(Warehouse.is_active == True)
+        .order_by(Warehouse.code)
+        .limit(1)
+    )
+    warehouse_id = result.scalar_one_or_none()
+    if warehouse_id is None:
+        raise HTTPException(400, "No active warehouse configured")
+    return warehouse_id
+
+
+async def commit_sales_stock(db: AsyncSession, orders: Sequence[SalesOrder]) -> None:
+    """
+    Decrement stock for completed orders and record the sale ledger rows.
+
+    Runs inside the caller's transaction:
+    1. Locks the affected stock rows in (warehouse, product) order so
+       concurrent tills always acquire locks in the same sequence.
+    2. Decrements all rows with one UPDATE ... FROM (VALUES ...).
+    3. Inserts every StockTransaction with one executemany insert.
+    """
+    if not orders:
+        return
+
+    fallback_wh = None
+    for order in orders:
+        if order.warehouse_id is None:
+            fallback_wh = fallback_wh or await default_warehouse_id(db)
+            order.warehouse_id = fallback_wh
+    orders_by_id = {o.id: o for o in orders}
+
+    item_result = await db.execute(
+        select(
+            SalesOrderItem.order_id,
+            SalesOrderItem.product_id,
+            SalesOrderItem.quantity,
+            Product.cost_price,
+        )
+        .join(Product, SalesOrderItem.product_id == Product.id)
+        .where(SalesOrderItem.order_id.in_(orders_by_id.keys()))
+        .order_by(SalesOrderItem.order_id, SalesOrderItem.product_id)
+    )
+    lines = item_result.all()
+    if not lines:
+        return
+
+    totals: Dict[Tuple[uuid.UUID, uuid.UUID], Decimal] = defaultdict(Decimal)
+    for line in lines:
+        totals[(orders_by_id[line.order_id].warehouse_id, line.product_id)] += line.quantity
+    keys = sorted(totals)
+
+    # Make sure every (warehouse, product) pair has a stock row to decrement
+    await db.execute(
+        pg_insert(Stock)
+        .values([
+            {"id": uuid.uuid4(), "warehouse_id": wh, "product_id": pid, "quantity": 0}
+            for wh, pid in keys
+        ])
+        .on_conflict_do_nothing(index_elements=["product_id", "warehouse_id"])
+    )
+
+    locked = await db.execute(
+        select(Stock.warehouse_id, Stock.product_id, Stock.quantity)
+        .where(tuple_(Stock.warehouse_id, Stock.product_id).in_(keys))
+        .order_by(Stock.warehouse_id, Stock.product_id)
+        .with_for_update()
+    )
+    running = {(r.warehouse_id, r.product_id): r.quantity for r in locked.all()}
+
+    sold = values(
+        column("warehouse_id", UUID(as_uuid=True)),
+        column("product_id", UUID(as_uuid=True)),
+        column("qty", Numeric(12, 3)),
+        name="sold",
+    ).data([(wh, pid, totals[(wh, pid)]) for wh, pid in keys])
+    await db.execute(
+        update(Stock)
+        .where(Stock.warehouse_id == sold.c.warehouse_id, Stock.product_id == sold.c.product_id)
+        .values(quantity=Stock.quantity - sold.c.qty, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+    ledger = []
+    seq: Dict[uuid.UUID, int] = defaultdict(int)
+    for line in lines:
+        order = orders_by_id[line.order_id]
+        key = (order.warehouse_id, line.product_id)
+        before_qty = running[key]
+        running[key] = before_qty - line.quantity
+        seq[order.id] += 1
+        unit_cost = line.cost_price or Decimal("0")
+        ledger.append({
+            "id": uuid.uuid4(),
+            "transaction_type": StockTransactionType.sale.value,
+            "reference_no": f"{order.order_number}-{seq[order.id]:03d}",
+            "product_id": line.product_id,
+            "warehouse_id": order.warehouse_id,
+            "quantity": -line.quantity,
+            "unit_cost": unit_cost,
+            "total_cost": unit_cost * line.quantity,
+            "before_quantity": before_qty,
+            "after_quantity": running[key],
+            "reference_id": order.id,
+            "created_by": order.cashier_id,
+        })
+    await db.execute(insert(StockTransaction), ledger)
@@ -0,0 +1,101 @@
+"""
+Shared test fixtures
+- Database tests run against DATABASE_URL, which needs database/01_schema.sql
+  and 02_seed.sql applied. They commit rows, so point it at a scratch
+  database. They are skipped when the database cannot be reached.
+- Redis is never required: the cache and version counters fall back to
+  their in-process implementations when REDIS_URL is unreachable.
+"""
+import uuid
+from decimal import Decimal
+from typing import List
+
+import httpx
+import pytest
+from sqlalchemy import insert, select, text
+
+from app.core.security import create_access_token
+from app.db.database import AsyncSessionLocal, engine, report_engine
+from app.models.models import Product, Stock, User, Warehouse
+
+_database_error = None
+_database_checked = False
+
+
+@pytest.fixture
+async def database():
+    """Skip unless DATABASE_URL answers; dispose the pools after the test."""
+    global _database_checked, _database_error
+    if not _database_checked:
+        _database_checked = True
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1 FROM products LIMIT 1"))
+        except Exception as e:  # unreachable server, missing schema, bad credentials
+            _database_error = e
+    if _database_error is not None:
+        pytest.skip(f"database not available: {_database_error}")
+    yield engine
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+    await report_engine.dispose()
+
+
+@pytest.fixture
+async def db(database):
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def warehouse_id(db) -> uuid.UUID:
+    result = await db.execute(
+        select(Warehouse.id).where(Warehouse.is_active == True).order_by(Warehouse.code).limit(1)
+    )
+    return result.scalar_one()
+
+
+@pytest.fixture
+def make_products(db, warehouse_id):
+    """Factory: count fresh products with stock rows in the default warehouse."""
+
+    async def make(count: int, stock: Decimal = Decimal("1000"), **fields) -> List[uuid.UUID]:
+        tag = uuid.uuid4().hex[:8].upper()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "code": f"T{tag}-{i:04d}",
+                "name": f"สินค้าทดสอบ {tag} {i}",
+                "unit": "piece",
+                "cost_price": Decimal("10"),
+                "selling_price": Decimal("25"),
+                "tax_rate": Decimal("7"),
+                **fields,
+            }
+            for i in range(count)
+        ]
+        await db.execute(insert(Product), rows)
+        await db.execute(insert(Stock), [
+            {"id": uuid.uuid4(), "product_id": r["id"], "warehouse_id": warehouse_id, "quantity": stock}
+            for r in rows
+        ])
+        await db.commit()
+        return [r["id"] for r in rows]
+
+    return make
+
+
+@pytest.fixture
+async def client(db):
+    """API client authenticated as the seed admin."""
+    from app.main import app
+
+    admin_id = (await db.execute(select(User.id).where(User.username == "admin"))).scalar_one()
+    token = create_access_token({"sub": str(admin_id), "role": "admin"})
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test/api/v1",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as c:
+        yield c
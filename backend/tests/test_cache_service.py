@@ -0,0 +1,80 @@
+"""
+VersionedCache: hits, misses and invalidation, on Redis and the local fallback
+"""
+import pytest
+
+from app.services import cache_service
+from app.services.cache_service import VersionedCache
+
+
+class FakeRedis:
+    """The slice of redis.asyncio.Redis that VersionedCache uses, in memory."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def mget(self, *keys):
+        return [self.data.get(k) for k in keys]
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b"0")) + 1).encode()
+        return int(self.data[key])
+
+
+@pytest.fixture(params=["redis", "local"])
+def cache(request, monkeypatch):
+    fake = FakeRedis() if request.param == "redis" else None
+    monkeypatch.setattr(cache_service, "get_redis", lambda: fake)
+    return VersionedCache("test", ttl=30, max_local_entries=100)
+
+
+async def test_read_through(cache):
+    miss = await cache.get("8850001")
+    assert not miss.hit
+    await cache.set("8850001", {"name": "ปุ๋ย 16-16-16"}, miss.version)
+
+    hit = await cache.get("8850001")
+    assert hit.hit and hit.value == {"name": "ปุ๋ย 16-16-16"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_invalidate_drops_entries(cache):
+    miss = await cache.get("8850001")
+    await cache.set("8850001", {"price": 100}, miss.version)
+    await cache.invalidate()
+    assert not (await cache.get("8850001")).hit
+
+
+async def test_invalidate_during_miss_does_not_cache_stale_value(cache):
+    # Request A misses and reads the product from the database...
+    miss = await cache.get("8850001")
+    stale = {"price": 100}
+    # ...meanwhile update_product commits price 120 and invalidates...
+    await cache.invalidate()
+    # ...then A stores what it read before the update
+    await cache.set("8850001", stale, miss.version)
+
+    assert not (await cache.get("8850001")).hit
+
+    # The next miss reads under the new version and is cached normally
+    fresh = await cache.get("8850001")
+    await cache.set("8850001", {"price": 120}, fresh.version)
+    assert (await cache.get("8850001")).value == {"price": 120}
+
+
+async def test_value_read_under_redis_is_not_stored_locally(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache_service, "get_redis", lambda: fake)
+    cache = VersionedCache("test", ttl=30, max_local_entries=100)
+    miss = await cache.get("8850001")
+
+    # Redis drops out before the value is stored
+    monkeypatch.setattr(cache_service, "get_redis", lambda: None)
+    await cache.set("8850001", {"price": 100}, miss.version)
+    assert not (await cache.get("8850001")).hit
@@ -0,0 +1,56 @@
+"""
+EMVCo CRC: the table-driven and crc_hqx paths must match the original
+bitwise CRC-16/CCITT-FALSE for every payload, including Thai text
+"""
+import random
+
+import pytest
+
+from app.services.emvco import EMVCoError, build_payload, crc16, crc16_table, parse_payload
+
+ALPHABETS = {
+    "ascii": [chr(c) for c in range(32, 127)],
+    "latin1": [chr(c) for c in range(256)],
+    "thai": [chr(c) for c in range(32, 127)] + [chr(c) for c in range(0x0E01, 0x0E5C)],
+}
+
+
+def bitwise_crc16(data: str) -> str:
+    """qr_service.crc16_ccitt as it was before the table-driven version."""
+    crc = 0xFFFF
+    for char in data:
+        crc ^= ord(char) << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc <<= 1
+            crc &= 0xFFFF
+    return format(crc, '04X')
+
+
+def random_strings(alphabet, count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choices(alphabet, k=rng.randint(0, 120)))
+
+
+def test_known_check_value():
+    # CRC-16/CCITT-FALSE catalogue check value
+    assert crc16("123456789") == bitwise_crc16("123456789") == "29B1"
+
+
+@pytest.mark.parametrize("alphabet", ALPHABETS)
+def test_matches_bitwise_crc(alphabet):
+    for data in random_strings(ALPHABETS[alphabet], 20_000, seed=alphabet):
+        expected = bitwise_crc16(data)
+        assert crc16(data) == expected, data
+        assert format(crc16_table(data), "04X") == expected, data
+
+
+def test_payload_round_trip():
+    payload = build_payload([("00", "01"), ("01", "12"), ("54", "150.00"), ("58", "TH"), ("59", "ร้านเกษตร")])
+    assert payload[-4:] == bitwise_crc16(payload[:-4])
+    assert parse_payload(payload)["59"] == "ร้านเกษตร"
+    with pytest.raises(EMVCoError):
+        parse_payload(payload[:-1] + ("0" if payload[-1] != "0" else "1"))
@@ -0,0 +1,121 @@
+"""
+Streaming exports: a busy report pool is a 503 before any body is sent,
+the connection goes back to the pool afterwards, and a large export runs in
+constant memory. EXPORT_TEST_ROWS sets the RSS test size (default 2,000,000).
+"""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.database import report_engine
+
+ROWS = int(os.getenv("EXPORT_TEST_ROWS", "2000000"))
+RSS_CEILING_MB = int(os.getenv("EXPORT_TEST_RSS_MB", "150"))
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+async def test_busy_report_pool_returns_503(client, make_products, monkeypatch):
+    product_id = (await make_products(1))[0]
+    monkeypatch.setattr(settings, "EXPORT_POOL_WAIT", 0.2)
+    async with AsyncExitStack() as held:
+        for _ in range(settings.REPORT_DB_POOL_SIZE):
+            await held.enter_async_context(report_engine.connect())
+        r = await client.get("/export/stock-ledger", params={"product_id": str(product_id)})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "5"
+
+
+async def test_export_returns_its_connection(client, make_products):
+    product_id = (await make_products(1))[0]
+    for _ in range(settings.REPORT_DB_POOL_SIZE + 1):
+        r = await client.get("/export/stock-ledger", params={"product_id": str(product_id)})
+        assert r.status_code == 200
+        assert r.text.lstrip("﻿").startswith("created_at,reference_no")
+    assert report_engine.pool.checkedout() == 0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        return int(next(line for line in f if line.startswith("VmRSS")).split()[1])
+
+
+@pytest.fixture
+async def ledger_rows(db, make_products, warehouse_id):
+    """ROWS committed stock transactions for one product, deleted afterwards."""
+    product_id = (await make_products(1))[0]
+    await db.execute(text("""
+        INSERT INTO stock_transactions (id, transaction_type, reference_no, product_id, warehouse_id,
+                                        quantity, before_quantity, after_quantity, notes, created_at)
+        SELECT gen_random_uuid(), 'adjustment', 'RSS-' || :tag || '-' || g, :product_id, :warehouse_id,
+               1, g - 1, g, 'ปรับยอดทดสอบการส่งออก', NOW() - g * INTERVAL '1 second'
+        FROM generate_series(1, CAST(:n AS INTEGER)) AS g
+    """), {"tag": str(product_id)[:8], "product_id": product_id, "warehouse_id": warehouse_id, "n": ROWS})
+    await db.commit()
+    yield product_id
+    await db.execute(text("DELETE FROM stock_transactions WHERE product_id = :p"), {"p": product_id})
+    await db.execute(text("DELETE FROM stock WHERE product_id = :p"), {"p": product_id})
+    await db.execute(text("DELETE FROM products WHERE id = :p"), {"p": product_id})
+    await db.commit()
+
+
+def test_large_export_stays_under_rss_ceiling(ledger_rows, client):
+    """Stream the whole ledger from a real server (ASGITransport buffers bodies)."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    base = f"http://127.0.0.1:{port}"
+    peak, stop = [0], threading.Event()
+
+    def sample():
+        while not stop.is_set():
+            peak[0] = max(peak[0], _rss_kb(server.pid))
+            time.sleep(0.1)
+
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base}/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        token = client.headers["Authorization"]
+        # Warm up imports and pools before taking the baseline
+        httpx.get(f"{base}/api/v1/export/stock-ledger", params={"product_id": "00000000-0000-0000-0000-000000000000"},
+                  headers={"Authorization": token}).raise_for_status()
+        baseline = _rss_kb(server.pid)
+        threading.Thread(target=sample, daemon=True).start()
+
+        lines = 0
+        with httpx.stream("GET", f"{base}/api/v1/export/stock-ledger", params={"product_id": str(ledger_rows)},
+                          headers={"Authorization": token}, timeout=None) as r:
+            assert r.status_code == 200
+            assert "content-length" not in r.headers
+            for _ in r.iter_lines():
+                lines += 1
+    finally:
+        stop.set()
+        server.terminate()
+        server.wait(10)
+
+    assert lines == ROWS + 1  # header row
+    growth_mb = (peak[0] - baseline) / 1024
+    assert growth_mb < RSS_CEILING_MB, f"RSS grew {growth_mb:.0f} MB exporting {ROWS:,} rows"
@@ -0,0 +1,86 @@
+"""
+Idempotency keys: a retried order or batch sale returns the first response
+instead of writing a second order, until the key expires
+"""
+import uuid
+
+from sqlalchemy import func, select, text
+
+from app.core.config import settings
+from app.models.models import SalesOrder
+from app.services.idempotency import REPLAYED_HEADER
+
+
+def _sale(product_id, key, quantity=1):
+    return {"idempotency_key": key, "paid_amount": 100,
+            "items": [{"product_id": str(product_id), "quantity": quantity}]}
+
+
+async def _batch(client, *sales):
+    r = await client.post("/sales/orders/batch", json={"sales": list(sales)})
+    assert r.status_code == 200, r.text
+    return r.json()["results"]
+
+
+async def _orders_numbered(db, order_number):
+    return (await db.execute(
+        select(func.count()).select_from(SalesOrder).where(SalesOrder.order_number == order_number)
+    )).scalar_one()
+
+
+async def test_batch_sale_replays_its_first_result(client, db, make_products):
+    product_id = (await make_products(1))[0]
+    key = str(uuid.uuid4())
+
+    first = (await _batch(client, _sale(product_id, key)))[0]
+    again = (await _batch(client, _sale(product_id, key)))[0]
+
+    assert first["status"] == "created" and again["status"] == "replayed"
+    assert again["order_id"] == first["order_id"]
+    assert await _orders_numbered(db, first["order_number"]) == 1
+
+
+async def test_repeated_key_within_one_batch(client, make_products):
+    product_id = (await make_products(1))[0]
+    key = str(uuid.uuid4())
+    first, second = await _batch(client, _sale(product_id, key), _sale(product_id, key))
+    assert first["status"] == "created"
+    assert second["status"] == "replayed" and second["order_id"] == first["order_id"]
+
+
+async def test_key_reused_for_a_different_sale(client, make_products):
+    product_id = (await make_products(1))[0]
+    key = str(uuid.uuid4())
+    await _batch(client, _sale(product_id, key))
+    result = (await _batch(client, _sale(product_id, key, quantity=2)))[0]
+    assert result["status"] == "error" and result["status_code"] == 422
+
+
+async def test_order_create_replays_with_header(client, make_products):
+    product_id = (await make_products(1))[0]
+    body = {"items": [{"product_id": str(product_id), "quantity": 1}]}
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = await client.post("/sales/orders", json=body, headers=headers)
+    again = await client.post("/sales/orders", json=body, headers=headers)
+
+    assert first.status_code == again.status_code == 201
+    assert again.json() == first.json()
+    assert again.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+
+
+async def test_expired_key_no_longer_protects(client, db, make_products):
+    """Why the till holds sales it could not send within its replay window."""
+    product_id = (await make_products(1))[0]
+    key = str(uuid.uuid4())
+    first = (await _batch(client, _sale(product_id, key)))[0]
+    await db.execute(
+        text("UPDATE idempotency_keys SET created_at = NOW() - make_interval(hours => :h) "
+             "WHERE scope = 'sales' AND key = :key"),
+        {"h": settings.IDEMPOTENCY_KEY_TTL_HOURS + 1, "key": key},
+    )
+    await db.commit()
+
+    again = (await _batch(client, _sale(product_id, key)))[0]
+    assert again["status"] == "created" and again["order_id"] != first["order_id"]
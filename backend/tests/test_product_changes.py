@@ -0,0 +1,86 @@
+"""
+GET /products/changes: version-ordered paging for catalog replicas, and no
+change skipped when product writers commit out of order
+"""
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.db.database import engine
+
+
+async def _changes(client, since, limit=1000):
+    r = await client.get("/products/changes", params={"since": since, "limit": limit})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+async def _sync(client, since, limit=1000):
+    """Replay pages the way CatalogReplica.sync does; returns (ids in order, version)."""
+    seen = []
+    while True:
+        page = await _changes(client, since, limit)
+        seen += [p["id"] for p in page["products"]]
+        since = page["version"]
+        if not page["has_more"]:
+            return seen, since
+
+
+async def _current_version(client):
+    _, version = await _sync(client, 0, limit=5000)
+    return version
+
+
+async def test_pages_in_version_order(client, make_products):
+    since = await _current_version(client)
+    ids = [str(p) for p in await make_products(5)]
+
+    page = await _changes(client, since, limit=2)
+    assert page["has_more"]
+    assert [p["id"] for p in page["products"]] == ids[:2]
+    versions = [p["row_version"] for p in page["products"]]
+    assert versions == sorted(versions) and page["version"] == versions[-1]
+
+    seen, _ = await _sync(client, since, limit=2)
+    assert seen == ids
+
+
+async def test_update_moves_product_to_the_end(client, db, make_products):
+    first, second = await make_products(2)
+    since = await _current_version(client)
+    await db.execute(text("UPDATE products SET selling_price = 30 WHERE id = :id"), {"id": first})
+    await db.commit()
+
+    seen, _ = await _sync(client, since)
+    assert seen == [str(first)]
+    page = await _changes(client, since)
+    assert page["products"][0]["selling_price"] == 30
+
+
+async def test_slow_writer_is_not_skipped(client, make_products):
+    slow_id, fast_id = await make_products(2)
+    since = await _current_version(client)
+
+    async with engine.connect() as slow, engine.connect() as fast:
+        # The slow transaction writes first and stays open...
+        await slow.execute(text("UPDATE products SET selling_price = 31 WHERE id = :id"), {"id": slow_id})
+        # ...so a second writer waits instead of committing a later version first
+        fast_write = asyncio.ensure_future(fast.execute(
+            text("UPDATE products SET selling_price = 32 WHERE id = :id"), {"id": fast_id}
+        ))
+        await asyncio.sleep(0.3)
+        assert not fast_write.done()
+
+        # A replica syncing now sees neither change and keeps its cursor
+        seen, version = await _sync(client, since)
+        assert seen == [] and version == since
+
+        await slow.commit()
+        await fast_write
+        await fast.commit()
+
+    seen, _ = await _sync(client, version)
+    assert seen == [str(slow_id), str(fast_id)]
+    prices = {p["id"]: p["selling_price"] for p in (await _changes(client, since))["products"]}
+    assert prices == {str(slow_id): float(Decimal("31")), str(fast_id): float(Decimal("32"))}
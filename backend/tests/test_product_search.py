@@ -0,0 +1,43 @@
+"""
+GET /products?search= for code-like terms: case-insensitive, exact and
+prefix hits first, substrings of a code still found
+"""
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+async def trigram(db):
+    available = (await db.execute(text("SELECT to_regprocedure('similarity(text,text)') IS NOT NULL"))).scalar()
+    if not available:
+        pytest.skip("pg_trgm is not installed in this database")
+
+
+@pytest.fixture
+async def codes(trigram, make_products):
+    """An exact, a prefix and a substring match for the same code."""
+    tag = uuid.uuid4().hex[:6].upper()
+    codes = {"exact": f"Q{tag}F001", "prefix": f"Q{tag}F0019", "substring": f"ZZQ{tag}F001"}
+    for code in codes.values():
+        await make_products(1, code=code)
+    return tag, codes
+
+
+async def _search(client, term):
+    r = await client.get("/products", params={"search": term, "view": "pos"})
+    assert r.status_code == 200, r.text
+    return [p["code"] for p in r.json()]
+
+
+async def test_code_search_is_case_insensitive_and_ranked(client, codes):
+    tag, codes = codes
+    found = await _search(client, f"q{tag.lower()}f001")
+    assert found[:3] == [codes["exact"], codes["prefix"], codes["substring"]]
+
+
+async def test_part_of_a_code_is_found(client, codes):
+    tag, codes = codes
+    found = await _search(client, f"{tag}F00")
+    assert set(codes.values()) <= set(found)
@@ -0,0 +1,141 @@
+"""
+Report jobs: queued through Redis to whichever worker is free, run locally
+without it, and only visible to the user who requested them
+"""
+import asyncio
+import uuid
+
+import pytest
+
+from app.api.v1.endpoints import reports
+from app.core.security import create_access_token
+from app.services import report_jobs as report_jobs_module
+from app.services.report_jobs import QUEUE_KEY, ReportJobQueue
+
+
+class FakeRedis:
+    """The slice of redis.asyncio.Redis the job queue uses, in memory."""
+
+    def __init__(self):
+        self.data = {}
+        self.lists = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    async def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value.encode())
+
+    async def brpop(self, key, timeout=0):
+        items = self.lists.get(key)
+        if items:
+            return key.encode(), items.pop()
+        await asyncio.sleep(0.01)
+        return None
+
+
+async def _build(db):
+    return {"rows": 3}
+
+
+def _queue(tmp_path, use_redis, workers=1, redis=None):
+    queue = ReportJobQueue(workers=workers, result_dir=str(tmp_path), retention=60, use_redis=use_redis)
+    queue.register("demo", _build)
+    queue._blocking_redis = redis
+    return queue
+
+
+async def _wait_done(queue, job_id):
+    for _ in range(200):
+        job = await queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never finished")
+
+
+def _stop(*queues):
+    for queue in queues:
+        for task in [*queue._tasks, queue._fallback_task]:
+            if task is not None:
+                task.cancel()
+
+
+async def test_redis_job_runs_on_another_process(tmp_path, monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(report_jobs_module, "get_redis", lambda: redis)
+    api = _queue(tmp_path, use_redis=True, workers=0, redis=redis)
+    worker = _queue(tmp_path, use_redis=True, redis=redis)
+
+    job = await api.submit("demo", "user-1")
+    assert redis.lists[QUEUE_KEY] == [job["id"].encode()]
+    assert api._queue.empty()
+
+    worker._ensure_workers()
+    try:
+        done = await _wait_done(api, job["id"])
+    finally:
+        _stop(api, worker)
+    assert done["status"] == "done"
+    assert api.result_path(job["id"]).read_text(encoding="utf-8") == '{"rows": 3}'
+
+
+async def test_local_queue_when_redis_is_down(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_jobs_module, "get_redis", lambda: None)
+    queue = _queue(tmp_path, use_redis=True)
+    job = await queue.submit("demo", "user-1")
+    try:
+        assert (await _wait_done(queue, job["id"]))["status"] == "done"
+    finally:
+        _stop(queue)
+
+
+async def test_api_without_workers_runs_local_jobs_while_redis_is_down(tmp_path, monkeypatch):
+    """REPORT_JOB_WORKERS=0 API process: no Redis worker can see these jobs."""
+    monkeypatch.setattr(report_jobs_module, "get_redis", lambda: None)
+    api = _queue(tmp_path, use_redis=True, workers=0)
+    first = await api.submit("demo", "user-1")
+    second = await api.submit("demo", "user-1")
+    try:
+        assert (await _wait_done(api, first["id"]))["status"] == "done"
+        assert (await _wait_done(api, second["id"]))["status"] == "done"
+        await asyncio.sleep(0.01)
+        # Temporary: it exits once the local queue is empty
+        assert api._fallback_task.done() and api._tasks == []
+    finally:
+        _stop(api)
+
+
+@pytest.fixture
+def stored_job(monkeypatch):
+    owner = str(uuid.uuid4())
+    job = {"id": uuid.uuid4().hex, "report": "demo", "status": "queued", "requested_by": owner}
+
+    async def get(job_id):
+        return job if job_id == job["id"] else None
+
+    monkeypatch.setattr(reports.report_jobs, "get", get)
+    return job
+
+
+def _auth(user_id, role):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id, 'role': role})}"}
+
+
+async def test_job_visible_to_its_requester(client, stored_job):
+    r = await client.get(f"/reports/jobs/{stored_job['id']}", headers=_auth(stored_job["requested_by"], "manager"))
+    assert r.status_code == 202
+
+
+async def test_job_hidden_from_other_users(client, stored_job):
+    r = await client.get(f"/reports/jobs/{stored_job['id']}", headers=_auth(str(uuid.uuid4()), "manager"))
+    assert r.status_code == 404
+
+
+async def test_admin_sees_every_job(client, stored_job):
+    # client is authenticated as the seed admin
+    r = await client.get(f"/reports/jobs/{stored_job['id']}")
+    assert r.status_code == 202
@@ -0,0 +1,82 @@
+"""
+Sales analytics: the columnar snapshot with no fact rows yet, and ties in
+product rankings broken by product id in both engines
+"""
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.models import OrderStatus, SalesOrder, SalesOrderItem
+from app.services.sales_analytics import _load
+from app.services.sales_parquet import FACT_SCHEMA, Watermark, _save_watermark, _write_batch
+
+DAY = date(2001, 1, 1)
+NOW = datetime(2001, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def _fact(product_id: str, quantity: float, total: float) -> tuple:
+    row = {
+        "sale_date": DAY, "order_id": uuid.uuid4(), "line_id": uuid.uuid4(), "order_number": "SO-TEST",
+        "order_date": NOW, "order_updated_at": NOW, "warehouse_code": "WH01", "payment_method": "cash",
+        "is_credit_sale": False, "customer_code": None, "customer_type": None, "product_id": product_id,
+        "product_code": f"P-{product_id[:4]}", "product_name": "สินค้า", "category": "ปุ๋ย", "unit": "bag",
+        "quantity": quantity, "unit_price": total / quantity, "cost_price": 1.0, "discount_amount": 0.0,
+        "tax_amount": 0.0, "total_amount": total,
+    }
+    return tuple(row[f.name] for f in FACT_SCHEMA)
+
+
+def test_watermark_without_fact_rows(tmp_path):
+    # An export whose batches only held orders without lines saves a
+    # watermark but writes no Parquet files
+    _save_watermark(tmp_path, Watermark(1, NOW, uuid.uuid4(), NOW))
+    facts = _load(tmp_path)
+
+    assert facts.top_products(DAY, DAY, 10) == []
+    assert facts.abc_classes(DAY, DAY, 0.8, 0.95)["items"] == []
+    assert facts.category_breakdown(DAY, DAY) == []
+    assert [d["total_sales"] for d in facts.daily_trend(DAY, DAY, 1)] == [0.0]
+
+
+def test_columnar_ties_break_by_product_id(tmp_path):
+    ids = [str(uuid.uuid4()) for _ in range(4)]
+    # Written in reverse id order so the writer's order cannot pass for a tie-break
+    rows = [_fact(pid, 2.0, 100.0) for pid in sorted(ids, reverse=True)]
+    _write_batch(rows, tmp_path, "part-test")
+    _save_watermark(tmp_path, Watermark(1, NOW, uuid.uuid4(), NOW))
+    facts = _load(tmp_path)
+
+    assert [r["product_id"] for r in facts.top_products(DAY, DAY, 10)] == sorted(ids)
+    assert [r["product_id"] for r in facts.top_products(DAY, DAY, 10, by="quantity")] == sorted(ids)
+    assert [r["product_id"] for r in facts.abc_classes(DAY, DAY, 0.8, 0.95)["items"]] == sorted(ids)
+
+
+@pytest.fixture
+async def tied_sales(db, make_products, warehouse_id):
+    """Four products with identical completed sales on DAY."""
+    product_ids = await make_products(4)
+    for product_id in reversed(product_ids):
+        order_id = uuid.uuid4()
+        await db.execute(insert(SalesOrder).values(
+            id=order_id, order_number=f"TIE-{order_id.hex[:12]}", order_date=NOW, status=OrderStatus.completed,
+            warehouse_id=warehouse_id, subtotal=Decimal("100"), tax_amount=0, total_amount=Decimal("100"),
+        ))
+        await db.execute(insert(SalesOrderItem).values(
+            id=uuid.uuid4(), order_id=order_id, product_id=product_id, quantity=Decimal("2"),
+            unit_price=Decimal("50"), total_amount=Decimal("100"),
+        ))
+    await db.commit()
+    return [str(p) for p in product_ids]
+
+
+@pytest.mark.parametrize("by", ["revenue", "quantity"])
+async def test_sql_ties_break_by_product_id(client, tied_sales, by):
+    r = await client.get("/reports/sales/top-products", params={
+        "date_from": str(DAY), "date_to": str(DAY), "limit": 1000, "by": by,
+    })
+    assert r.status_code == 200
+    ours = [row["product_id"] for row in r.json() if row["product_id"] in tied_sales]
+    assert ours == sorted(tied_sales)
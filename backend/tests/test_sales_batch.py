@@ -0,0 +1,95 @@
+"""
+Batch sales ingestion: stored, returned and rolled-up totals agree to the
+satang, and database errors map to statuses a till can act on; single
+orders return the total as stored too
+"""
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+
+from app.api.v1.endpoints import sales
+from app.models.models import DailySalesRollup, SalesOrder
+
+SOLD_AT = datetime(2002, 2, 2, 5, tzinfo=timezone.utc)
+
+
+async def _rollup_total(db):
+    result = await db.execute(
+        select(func.coalesce(func.sum(DailySalesRollup.total_amount), 0))
+        .where(DailySalesRollup.sale_date == SOLD_AT.date())
+    )
+    return result.scalar_one()
+
+
+async def test_batch_totals_are_rounded_like_stored_orders(client, db, make_products):
+    # 0.35 + 7% VAT = 0.3745 a sale: stored as 0.37 each
+    product_id = (await make_products(1, selling_price=Decimal("0.35")))[0]
+    before = await _rollup_total(db)
+    r = await client.post("/sales/orders/batch", json={"sales": [
+        {"sold_at": SOLD_AT.isoformat(), "items": [{"product_id": str(product_id), "quantity": 1}]}
+        for _ in range(3)
+    ]})
+    results = r.json()["results"]
+    assert [res["total_amount"] for res in results] == [0.37] * 3
+
+    stored = (await db.execute(
+        select(func.sum(SalesOrder.total_amount))
+        .where(SalesOrder.id.in_([uuid.UUID(res["order_id"]) for res in results]))
+    )).scalar_one()
+    db.expire_all()
+    assert stored == Decimal("1.11")
+    assert await _rollup_total(db) - before == stored
+
+
+def _db_error(sqlstate=None, connection_invalidated=False):
+    orig = Exception("<class 'asyncpg.exceptions.PostgresError'>: failed")
+    orig.sqlstate = sqlstate
+    return DBAPIError("INSERT ...", {}, orig, connection_invalidated=connection_invalidated)
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (_db_error("40001"), 503),
+    (_db_error("40P01"), 503),
+    (_db_error("08006"), 503),
+    (_db_error("57P01"), 503),
+    (_db_error(connection_invalidated=True), 503),
+    (_db_error("23505"), 409),
+    (_db_error("23503"), 409),
+    (_db_error("22003"), 422),
+    (_db_error("42P01"), 500),
+    (_db_error(), 500),
+])
+def test_db_error_status(error, status_code):
+    assert sales._db_error_status(error) == status_code
+
+
+async def test_transient_error_is_retryable(client, make_products, monkeypatch):
+    product_id = (await make_products(1))[0]
+
+    async def deadlocked(*args, **kwargs):
+        raise _db_error("40P01")
+
+    monkeypatch.setattr(sales, "_ingest_chunk", deadlocked)
+    r = await client.post("/sales/orders/batch", json={"sales": [
+        {"items": [{"product_id": str(product_id), "quantity": 1}]}
+    ]})
+    [result] = r.json()["results"]
+    assert result["status"] == "error" and result["status_code"] == 503
+    assert result["detail"] == "failed"
+
+
+async def test_created_order_returns_the_stored_total(client, db, make_products):
+    # 0.35 + 7% VAT = 0.3745, stored as 0.37
+    product_id = (await make_products(1, selling_price=Decimal("0.35")))[0]
+    body = {"items": [{"product_id": str(product_id), "quantity": 1}]}
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = (await client.post("/sales/orders", json=body, headers=headers)).json()
+    replayed = (await client.post("/sales/orders", json=body, headers=headers)).json()
+
+    stored = await db.get(SalesOrder, uuid.UUID(first["order_id"]))
+    assert stored.total_amount == Decimal("0.37")
+    assert first["total_amount"] == replayed["total_amount"] == 0.37
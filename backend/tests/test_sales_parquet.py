@@ -0,0 +1,89 @@
+"""
+Parquet sales export: the watermark follows writing transactions, so an
+order committed late by a slow transaction is still exported
+"""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pyarrow.dataset as ds
+import pytest
+from sqlalchemy import text
+
+from app.db.database import engine
+from app.services.sales_parquet import Watermark, _save_watermark, export_sales_facts, load_watermark
+
+NOW = datetime(2003, 3, 3, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def export_dir(db, tmp_path):
+    """A dataset whose watermark is past every completed order so far."""
+    newest = await db.scalar(text("SELECT COALESCE(MAX(xact_id), 0) FROM sales_orders"))
+    _save_watermark(tmp_path, Watermark(newest, datetime.max.replace(tzinfo=timezone.utc), uuid.UUID(int=2**128 - 1), NOW))
+    return tmp_path
+
+
+async def _complete_order(conn, product_id, warehouse_id) -> uuid.UUID:
+    order_id = uuid.uuid4()
+    await conn.execute(text("""
+        INSERT INTO sales_orders (id, order_number, order_date, status, warehouse_id, payment_method,
+                                  subtotal, total_amount)
+        VALUES (:id, :number, :day, 'completed', :wh, 'cash', 25, 25)
+    """), {"id": order_id, "number": f"PQ-{order_id.hex[:12]}", "day": NOW, "wh": warehouse_id})
+    await conn.execute(text("""
+        INSERT INTO sales_order_items (id, order_id, product_id, quantity, unit_price, total_amount)
+        VALUES (:id, :order_id, :product_id, 1, 25, 25)
+    """), {"id": uuid.uuid4(), "order_id": order_id, "product_id": product_id})
+    return order_id
+
+
+async def _export(db, root):
+    summary = await export_sales_facts(db, str(root))
+    await db.commit()
+    return summary
+
+
+def _exported_orders(root) -> set:
+    files = [str(f) for f in root.glob("sale_date=*/*.parquet")]
+    if not files:
+        return set()
+    return set(ds.dataset(files, format="parquet").to_table(columns=["order_id"]).column("order_id").to_pylist())
+
+
+async def test_slow_writer_is_not_skipped(db, export_dir, make_products, warehouse_id):
+    product_id = (await make_products(1))[0]
+
+    async with engine.connect() as slow, engine.connect() as fast:
+        slow_order = await _complete_order(slow, product_id, warehouse_id)
+        fast_order = await _complete_order(fast, product_id, warehouse_id)
+        await fast.commit()
+
+        # The slow transaction is still open: nothing after it may be exported yet
+        assert (await _export(db, export_dir))["orders"] == 0
+        assert _exported_orders(export_dir) == set()
+
+        await slow.commit()
+
+    await _export(db, export_dir)
+    assert _exported_orders(export_dir) == {str(slow_order), str(fast_order)}
+    assert (await _export(db, export_dir))["orders"] == 0
+
+
+async def test_legacy_watermark_continues_by_updated_at(db, tmp_path, make_products, warehouse_id):
+    """Orders from before the upgrade keep xact_id 0 and a pre-upgrade watermark still applies to them."""
+    product_id = (await make_products(1))[0]
+    async with engine.connect() as conn:
+        old_order = await _complete_order(conn, product_id, warehouse_id)
+        await conn.commit()
+    newest = await db.scalar(text("SELECT COALESCE(MAX(xact_id), 0) FROM sales_orders"))
+    (tmp_path / "_watermark.json").write_text(
+        '{"updated_at": "9999-01-01T00:00:00+00:00", "order_id": "%s"}' % uuid.UUID(int=2**128 - 1)
+    )
+    mark = load_watermark(tmp_path)
+    assert mark.xact_id == 0 and mark.as_of == mark.updated_at
+
+    await _export(db, tmp_path)
+    exported = _exported_orders(tmp_path)
+    assert str(old_order) in exported
+    assert load_watermark(tmp_path).xact_id == newest
@@ -0,0 +1,82 @@
+"""
+Server-Timing auth header on authenticated responses; token revocation
+shared through Redis, with the in-process fallback
+"""
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import TokenCache, authenticate_token, create_access_token, revoke_token, token_cache
+
+
+class FakeRedis:
+    """The slice of redis.asyncio.Redis that TokenCache uses, in memory."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttl = {}
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = str(value).encode()
+        self.ttl[key] = ex
+
+
+def _token() -> str:
+    return create_access_token({"sub": str(uuid.uuid4()), "role": "cashier"})
+
+
+async def test_server_timing_on_direct_orjson_response(client, make_products):
+    # scan_product builds and returns its own ORJSONResponse
+    barcode = f"885{uuid.uuid4().int % 10**10:010d}"
+    await make_products(1, barcode=barcode)
+    r = await client.get("/products/scan", params={"code": barcode})
+    assert r.status_code == 200
+    assert r.headers["Server-Timing"].startswith("auth;dur=")
+
+
+async def test_server_timing_on_model_response(client):
+    r = await client.get("/auth/token-cache-stats")
+    assert r.status_code == 200
+    assert r.headers["Server-Timing"].startswith("auth;dur=")
+
+
+async def test_no_server_timing_without_auth(client):
+    r = await client.get("http://test/health")
+    assert "Server-Timing" not in r.headers
+
+
+async def test_revocation_by_another_worker_rejects_a_cached_token(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(security, "get_redis", lambda: redis)
+    token = _token()
+    user = await authenticate_token(token)
+    assert token_cache.get(token_cache.digest(token)) is not None
+
+    # Logout handled by another process: its own cache, the same Redis
+    await TokenCache(10).revoke(token_cache.digest(token), user.exp)
+
+    with pytest.raises(HTTPException) as exc:
+        await authenticate_token(token)
+    assert exc.value.status_code == 401
+    assert token_cache.get(token_cache.digest(token)) is None
+    (ttl,) = redis.ttl.values()
+    assert 0 < ttl <= user.exp - time.time() + 1
+
+
+async def test_revocation_falls_back_to_the_process_while_redis_is_down(monkeypatch):
+    monkeypatch.setattr(security, "get_redis", lambda: None)
+    token = _token()
+    await revoke_token(token)
+    with pytest.raises(HTTPException):
+        await authenticate_token(token)
+
+    # Still rejected here once Redis is back, though Redis never saw it
+    monkeypatch.setattr(security, "get_redis", lambda: FakeRedis())
+    with pytest.raises(HTTPException):
+        await authenticate_token(token)
@@ -0,0 +1,62 @@
+"""
+Stock commit on order completion under concurrent checkouts
+"""
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.models.models import Stock, StockTransaction, SalesOrder
+
+CHECKOUTS = 50
+
+
+async def _create_order(client, product_ids, quantity):
+    r = await client.post("/sales/orders", json={
+        "items": [{"product_id": str(pid), "quantity": str(quantity)} for pid in product_ids],
+    })
+    assert r.status_code == 201, r.text
+    return r.json()["order_id"]
+
+
+async def test_parallel_checkouts_on_same_skus(client, db, make_products, warehouse_id):
+    skus = await make_products(3, stock=Decimal("1000"))
+    quantity = Decimal("2")
+    # Every order holds the same SKUs, listed in a different order, so lock
+    # ordering (not item order) decides who waits for whom
+    order_ids = [
+        await _create_order(client, skus[i % 3:] + skus[:i % 3], quantity)
+        for i in range(CHECKOUTS)
+    ]
+
+    responses = await asyncio.gather(*[
+        client.post("/sales/payment/initiate", json={"order_id": oid, "payment_method": "cash"})
+        for oid in order_ids
+    ])
+    assert [r.status_code for r in responses] == [200] * CHECKOUTS, [r.text for r in responses if r.status_code != 200]
+
+    db.expire_all()
+    stock = dict((await db.execute(
+        select(Stock.product_id, Stock.quantity)
+        .where(Stock.product_id.in_(skus), Stock.warehouse_id == warehouse_id)
+    )).all())
+    assert stock == {pid: Decimal("1000") - CHECKOUTS * quantity for pid in skus}
+
+    completed = (await db.execute(
+        select(SalesOrder.status).where(SalesOrder.id.in_(order_ids))
+    )).scalars().all()
+    assert {getattr(s, "value", s) for s in completed} == {"completed"}
+
+    for pid in skus:
+        ledger = (await db.execute(
+            select(StockTransaction.before_quantity, StockTransaction.after_quantity, StockTransaction.quantity)
+            .where(StockTransaction.product_id == pid)
+            .order_by(StockTransaction.before_quantity.desc())
+        )).all()
+        assert len(ledger) == CHECKOUTS
+        # One unbroken chain 1000 -> 900: no lost update, no double count
+        assert ledger[0].before_quantity == Decimal("1000")
+        assert ledger[-1].after_quantity == Decimal("1000") - CHECKOUTS * quantity
+        for prev, row in zip(ledger, ledger[1:]):
+            assert row.before_quantity == prev.after_quantity
+        assert all(row.quantity == -quantity for row in ledger)
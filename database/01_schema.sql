@@ -7,6 +7,7 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
 
 -- ============================================================
 -- ENUMS
@@ -78,6 +79,9 @@ CREATE TABLE suppliers (
 -- ============================================================
 -- PRODUCTS
 -- ============================================================
+-- Catalog change counter; every insert/update of a product takes the next value
+CREATE SEQUENCE products_row_version_seq;
+
 CREATE TABLE products (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     code VARCHAR(50) UNIQUE NOT NULL,
@@ -96,6 +100,7 @@ CREATE TABLE products (
     description TEXT,
     specifications JSONB,
     main_image_url TEXT,
+    thumbnails JSONB DEFAULT '{}',          -- thumbnails of the primary image
     image_urls JSONB DEFAULT '[]',
     min_stock_level INTEGER DEFAULT 5,
     max_stock_level INTEGER DEFAULT 1000,
@@ -105,9 +110,11 @@ CREATE TABLE products (
     chemical_registration VARCHAR(50),
     expiry_tracking BOOLEAN DEFAULT FALSE,
     created_by UUID REFERENCES users(id),
+    row_version BIGINT NOT NULL DEFAULT nextval('products_row_version_seq'),
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
+ALTER SEQUENCE products_row_version_seq OWNED BY products.row_version;
 
 -- ============================================================
 -- PRODUCT IMAGES (separate table for multiple images)
@@ -116,7 +123,8 @@ CREATE TABLE product_images (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     product_id UUID NOT NULL REFERENCES products(id) ON DELETE CASCADE,
     image_url TEXT NOT NULL,
-    image_data BYTEA,
+    image_data BYTEA,                    -- optional copy of the original; files on disk are authoritative
+    thumbnails JSONB DEFAULT '{}',       -- {"list"|"card"|"detail": "/uploads/...webp"}
     is_primary BOOLEAN DEFAULT FALSE,
     sort_order INTEGER DEFAULT 0,
     created_at TIMESTAMPTZ DEFAULT NOW()
@@ -267,7 +275,8 @@ CREATE TABLE sales_orders (
     credit_due_date DATE,
     receipt_url TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
-    updated_at TIMESTAMPTZ DEFAULT NOW()
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    xact_id BIGINT NOT NULL DEFAULT 0  -- transaction that last wrote the row (set by trigger)
 );
 
 CREATE TABLE sales_order_items (
@@ -310,6 +319,36 @@ CREATE TABLE payment_transactions (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- ============================================================
+-- DAILY SALES ROLLUP (maintained when orders complete)
+-- ============================================================
+CREATE TABLE daily_sales_rollup (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    sale_date DATE NOT NULL,
+    warehouse_id UUID NOT NULL REFERENCES warehouses(id),
+    payment_method payment_method NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    subtotal DECIMAL(14,2) NOT NULL DEFAULT 0,
+    discount_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    tax_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(sale_date, warehouse_id, payment_method)
+);
+
+-- ============================================================
+-- IDEMPOTENCY KEYS (safe retries of order/payment requests)
+-- ============================================================
+CREATE TABLE idempotency_keys (
+    scope VARCHAR(50) NOT NULL,
+    key VARCHAR(100) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code INTEGER NOT NULL,
+    response JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (scope, key)
+);
+
 -- ============================================================
 -- CREDIT TRANSACTIONS (Customer Credit System)
 -- ============================================================
@@ -378,21 +417,37 @@ CREATE TABLE audit_logs (
 -- ============================================================
 CREATE INDEX idx_products_code ON products(code);
 CREATE INDEX idx_products_barcode ON products(barcode);
+CREATE INDEX idx_products_code_prefix ON products(lower(code) text_pattern_ops);
+CREATE INDEX idx_products_barcode_prefix ON products(lower(barcode) text_pattern_ops);
+CREATE INDEX idx_products_name_trgm ON products USING gin (name gin_trgm_ops);
+CREATE INDEX idx_products_name_en_trgm ON products USING gin (name_en gin_trgm_ops);
+CREATE INDEX idx_products_code_trgm ON products USING gin (code gin_trgm_ops);
+CREATE INDEX idx_products_barcode_trgm ON products USING gin (barcode gin_trgm_ops);
 CREATE INDEX idx_products_category ON products(category_id);
+CREATE INDEX idx_products_name_id ON products(name, id);
 CREATE INDEX idx_products_supplier ON products(supplier_id);
+CREATE INDEX idx_products_row_version ON products(row_version);
 CREATE INDEX idx_stock_product ON stock(product_id);
 CREATE INDEX idx_stock_warehouse ON stock(warehouse_id);
 CREATE INDEX idx_stock_transactions_product ON stock_transactions(product_id);
 CREATE INDEX idx_stock_transactions_created ON stock_transactions(created_at);
+CREATE INDEX idx_stock_transactions_created_id ON stock_transactions(created_at, id);
 CREATE INDEX idx_sales_orders_customer ON sales_orders(customer_id);
+CREATE INDEX idx_sales_orders_customer_date ON sales_orders(customer_id, order_date, id);
 CREATE INDEX idx_sales_orders_date ON sales_orders(order_date);
+CREATE INDEX idx_sales_orders_date_id ON sales_orders(order_date, id);
 CREATE INDEX idx_sales_orders_status ON sales_orders(status);
+CREATE INDEX idx_sales_orders_status_date ON sales_orders(status, order_date);
+CREATE INDEX idx_sales_orders_completed_xact ON sales_orders(xact_id, updated_at, id) WHERE status = 'completed';
+CREATE INDEX idx_sales_order_items_order ON sales_order_items(order_id);
 CREATE INDEX idx_payment_transactions_order ON payment_transactions(order_id);
 CREATE INDEX idx_credit_transactions_customer ON credit_transactions(customer_id);
 CREATE INDEX idx_customers_phone ON customers(phone);
 CREATE INDEX idx_customers_code ON customers(code);
+CREATE INDEX idx_customers_name_id ON customers(name, id);
 CREATE INDEX idx_audit_logs_user ON audit_logs(user_id);
 CREATE INDEX idx_audit_logs_table ON audit_logs(table_name, record_id);
+CREATE INDEX idx_idempotency_keys_created ON idempotency_keys(created_at);
 
 -- ============================================================
 -- FUNCTIONS & TRIGGERS
@@ -409,8 +464,46 @@ $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER trg_users_updated BEFORE UPDATE ON users FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 CREATE TRIGGER trg_products_updated BEFORE UPDATE ON products FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+-- Feeds GET /products/changes?since= (desktop catalog replicas).
+-- Product writers take one transaction-scoped advisory lock per statement,
+-- before any row is locked, and draw row versions only while holding it.
+-- Writers therefore commit in row_version order, and once a version is
+-- visible every lower one is visible too (or was rolled back).
+CREATE OR REPLACE FUNCTION lock_product_row_versions()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(5841504);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_product_row_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- The column default was drawn before the lock; take a fresh value
+    NEW.row_version = nextval('products_row_version_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_products_row_version_lock BEFORE INSERT OR UPDATE ON products FOR EACH STATEMENT EXECUTE FUNCTION lock_product_row_versions();
+CREATE TRIGGER trg_products_row_version BEFORE INSERT OR UPDATE ON products FOR EACH ROW EXECUTE FUNCTION bump_product_row_version();
 CREATE TRIGGER trg_customers_updated BEFORE UPDATE ON customers FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 CREATE TRIGGER trg_sales_orders_updated BEFORE UPDATE ON sales_orders FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+-- Feeds the incremental Parquet sales export. An order is exported once
+-- its xact_id is below the xmin of the export's snapshot: every writer
+-- that could still commit an older-looking order has finished by then.
+CREATE OR REPLACE FUNCTION stamp_sales_order_xact()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.xact_id = pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_sales_orders_xact BEFORE INSERT OR UPDATE ON sales_orders FOR EACH ROW EXECUTE FUNCTION stamp_sales_order_xact();
 CREATE TRIGGER trg_purchase_orders_updated BEFORE UPDATE ON purchase_orders FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 
 -- Generate Order Number
@@ -428,15 +521,3 @@ BEGIN
     RETURN result;
 END;
 $$ LANGUAGE plpgsql;
-
--- Update stock on sale
-CREATE OR REPLACE FUNCTION update_stock_on_sale()
-RETURNS TRIGGER AS $$
-BEGIN
-    UPDATE stock
-    SET quantity = quantity - NEW.quantity,
-        updated_at = NOW()
-    WHERE product_id = NEW.product_id;
-    RETURN NEW;
-END;
-$$ LANGUAGE plpgsql;
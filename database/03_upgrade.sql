@@ -0,0 +1,128 @@
+-- ============================================================
+-- Upgrade an existing database to the current schema
+-- Fresh installs get all of this from 01_schema.sql; this script brings
+-- databases created from an older 01_schema.sql up to date.
+-- Idempotent: safe to run again after every update.
+--   psql -U posuser -d posdb -f database/03_upgrade.sql
+-- ============================================================
+
+-- ── Stock commit on order completion ────────────────────────
+-- Stock is decremented per warehouse by the API now; the old trigger
+-- function (never attached) updated every warehouse row
+DROP FUNCTION IF EXISTS update_stock_on_sale();
+
+-- ── Sargable report date ranges ─────────────────────────────
+CREATE INDEX IF NOT EXISTS idx_sales_orders_status_date ON sales_orders(status, order_date);
+
+-- ── Daily sales rollup ──────────────────────────────────────
+CREATE TABLE IF NOT EXISTS daily_sales_rollup (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    sale_date DATE NOT NULL,
+    warehouse_id UUID NOT NULL REFERENCES warehouses(id),
+    payment_method payment_method NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    subtotal DECIMAL(14,2) NOT NULL DEFAULT 0,
+    discount_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    tax_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(sale_date, warehouse_id, payment_method)
+);
+-- Then backfill it from existing orders (from the backend directory):
+--   python -m app.commands.rebuild_sales_rollup
+
+-- ── Product search (trigram + case-insensitive code prefix) ─
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+-- Earlier builds indexed the raw code/barcode; prefix search uses lower() now
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_products_code_prefix' AND indexdef NOT LIKE '%lower(%') THEN
+        DROP INDEX idx_products_code_prefix;
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_products_barcode_prefix' AND indexdef NOT LIKE '%lower(%') THEN
+        DROP INDEX idx_products_barcode_prefix;
+    END IF;
+END
+$$;
+CREATE INDEX IF NOT EXISTS idx_products_code_prefix ON products(lower(code) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_products_barcode_prefix ON products(lower(barcode) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_name_en_trgm ON products USING gin (name_en gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_code_trgm ON products USING gin (code gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_barcode_trgm ON products USING gin (barcode gin_trgm_ops);
+
+-- ── Keyset pagination sort keys ─────────────────────────────
+CREATE INDEX IF NOT EXISTS idx_products_name_id ON products(name, id);
+CREATE INDEX IF NOT EXISTS idx_stock_transactions_created_id ON stock_transactions(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_sales_orders_customer_date ON sales_orders(customer_id, order_date, id);
+CREATE INDEX IF NOT EXISTS idx_sales_orders_date_id ON sales_orders(order_date, id);
+CREATE INDEX IF NOT EXISTS idx_customers_name_id ON customers(name, id);
+
+-- ── Parquet sales export watermark scan ─────────────────────
+-- Orders written before this upgrade keep xact_id 0 and are exported in
+-- (updated_at, id) order, continuing an existing watermark
+ALTER TABLE sales_orders ADD COLUMN IF NOT EXISTS xact_id BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION stamp_sales_order_xact()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.xact_id = pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sales_orders_xact ON sales_orders;
+CREATE TRIGGER trg_sales_orders_xact BEFORE INSERT OR UPDATE ON sales_orders FOR EACH ROW EXECUTE FUNCTION stamp_sales_order_xact();
+DROP INDEX IF EXISTS idx_sales_orders_completed_updated;
+CREATE INDEX IF NOT EXISTS idx_sales_orders_completed_xact ON sales_orders(xact_id, updated_at, id) WHERE status = 'completed';
+
+-- ── Product image thumbnails ────────────────────────────────
+ALTER TABLE products ADD COLUMN IF NOT EXISTS thumbnails JSONB DEFAULT '{}';
+ALTER TABLE product_images ADD COLUMN IF NOT EXISTS thumbnails JSONB DEFAULT '{}';
+-- Then render thumbnails for existing images (from the backend directory):
+--   python -m app.commands.generate_thumbnails
+
+-- ── Catalog delta sync (row_version) ────────────────────────
+CREATE SEQUENCE IF NOT EXISTS products_row_version_seq;
+-- The volatile default numbers existing rows as the column is added
+ALTER TABLE products ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT nextval('products_row_version_seq');
+ALTER SEQUENCE products_row_version_seq OWNED BY products.row_version;
+CREATE INDEX IF NOT EXISTS idx_products_row_version ON products(row_version);
+
+CREATE OR REPLACE FUNCTION lock_product_row_versions()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(5841504);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_product_row_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- The column default was drawn before the lock; take a fresh value
+    NEW.row_version = nextval('products_row_version_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Earlier builds bumped on UPDATE only, without the writer lock
+DROP TRIGGER IF EXISTS trg_products_row_version ON products;
+DROP TRIGGER IF EXISTS trg_products_row_version_lock ON products;
+CREATE TRIGGER trg_products_row_version_lock BEFORE INSERT OR UPDATE ON products FOR EACH STATEMENT EXECUTE FUNCTION lock_product_row_versions();
+CREATE TRIGGER trg_products_row_version BEFORE INSERT OR UPDATE ON products FOR EACH ROW EXECUTE FUNCTION bump_product_row_version();
+
+-- ── Idempotent order / payment / batch sales requests ──────
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope VARCHAR(50) NOT NULL,
+    key VARCHAR(100) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code INTEGER NOT NULL,
+    response JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys(created_at);
+
+-- ── Order lines by order (stock commit, batch sales) ───────
+CREATE INDEX IF NOT EXISTS idx_sales_order_items_order ON sales_order_items(order_id);
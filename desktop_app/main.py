@@ -22,7 +22,10 @@ from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtGui import QFont
 
 from services.api_client import APIClient
+from services.catalog_replica import CatalogReplica
+from services.checkout_outbox import CheckoutOutbox
 from services.printer import PrinterService
+from services.request_executor import API_WORKERS, get_executor
 from ui.login_window import LoginWindow
 from ui.main_window import MainWindow
 
@@ -39,7 +42,7 @@ def main():
 
     # Init services
     api_url = os.getenv('API_URL', 'http://localhost:8000/api/v1')
-    api = APIClient(api_url)
+    api = APIClient(api_url, pool_size=API_WORKERS)
     printer = PrinterService()
 
     # Try to connect printer at startup (non-blocking)
@@ -58,12 +61,23 @@ def main():
     if login_win.exec() != LoginWindow.DialogCode.Accepted:
         sys.exit(0)
 
+    # Local catalog replica, synced in the background by the POS terminal
+    catalog_db = os.getenv('CATALOG_DB', str(Path(__file__).parent / 'catalog.db'))
+    replica = CatalogReplica(api, catalog_db)
+
+    # Completed sales are kept on disk until the backend has accepted them
+    outbox_db = os.getenv('OUTBOX_DB', str(Path(__file__).parent / 'outbox.db'))
+    outbox = CheckoutOutbox(api, outbox_db)
+
     # Main window
-    main_win = MainWindow(api, user_data, printer)
+    main_win = MainWindow(api, user_data, printer, replica, outbox)
     main_win.show()
     main_win.showMaximized()
 
-    sys.exit(app.exec())
+    code = app.exec()
+    get_executor().shutdown()
+    api.close()
+    sys.exit(code)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,31 @@
 """
 API Client - communicates with FastAPI backend
+Safe to share between the GUI thread and request-executor workers: each
+call borrows its own requests.Session, and the token and ETag cache are
+guarded by a lock.
 """
+import json
+import threading
 import requests
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+from requests.adapters import HTTPAdapter
+
+# Bodies kept for conditional GETs (URL -> (ETag, raw body))
+ETAG_CACHE_SIZE = 64
+
+# (connect, read) seconds per path prefix; the longest matching prefix wins.
+# Sales give up quickly and fall back to the outbox; bulk calls get longer.
+TIMEOUTS = {
+    '': (3.05, 15),
+    '/auth': (3.05, 10),
+    '/products': (3.05, 8),
+    '/products/changes': (3.05, 30),
+    '/sales': (3.05, 10),
+    '/sales/orders/batch': (3.05, 30),
+    '/reports': (3.05, 60),
+}
 
 class APIError(Exception):
     def __init__(self, message: str, status_code: int = 0):
@@ -10,21 +33,76 @@ class APIError(Exception):
         self.status_code = status_code
 
 class APIClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool_size: int = 4):
         self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
         self.token: Optional[str] = None
-        self.session = requests.Session()
-        self.session.headers.update({'Content-Type': 'application/json'})
+        # Guards token, the ETag cache and the idle session list
+        self._lock = threading.Lock()
+        # requests.Session is not thread-safe; each call borrows one. At most
+        # one per concurrent caller (worker threads plus the GUI thread).
+        self._idle_sessions: List[requests.Session] = []
+        self._etag_cache: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        # Bumped on login/logout so responses for the old user are not cached
+        self._cache_generation = 0
+
+    @staticmethod
+    def _new_session() -> requests.Session:
+        session = requests.Session()
+        session.headers.update({'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)  # one keep-alive connection
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @contextmanager
+    def _session(self) -> Iterator[requests.Session]:
+        with self._lock:
+            session = self._idle_sessions.pop() if self._idle_sessions else None
+        if session is None:
+            session = self._new_session()
+        try:
+            yield session
+        finally:
+            with self._lock:
+                if len(self._idle_sessions) <= self.pool_size:
+                    self._idle_sessions.append(session)
+                    session = None
+            if session is not None:
+                session.close()
+
+    def close(self):
+        with self._lock:
+            sessions, self._idle_sessions = self._idle_sessions, []
+        for session in sessions:
+            session.close()
+
+    def _set_token(self, token: Optional[str]):
+        with self._lock:
+            self.token = token
+            self._etag_cache.clear()
+            self._cache_generation += 1
 
     def _headers(self) -> Dict[str, str]:
         headers = {}
-        if self.token:
-            headers['Authorization'] = f'Bearer {self.token}'
+        with self._lock:
+            token = self.token
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
         return headers
 
+    @staticmethod
+    def _timeout(path: str) -> Tuple[float, float]:
+        prefix = max((p for p in TIMEOUTS if path.startswith(p)), key=len)
+        return TIMEOUTS[prefix]
+
     def _handle(self, resp: requests.Response) -> Any:
         if resp.status_code == 401:
-            self.token = None
+            sent = resp.request.headers.get('Authorization', '')
+            with self._lock:
+                # A late 401 for an earlier token must not log out a newer login
+                if self.token and sent == f'Bearer {self.token}':
+                    self.token = None
             raise APIError('กรุณาเข้าสู่ระบบใหม่', 401)
         if not resp.ok:
             try:
@@ -37,42 +115,81 @@ class APIClient:
         return resp.json()
 
     def login(self, username: str, password: str) -> Dict:
-        resp = self.session.post(
-            f'{self.base_url}/auth/login',
-            data={'username': username, 'password': password},
-            headers={'Content-Type': 'application/x-www-form-urlencoded'},
-        )
+        with self._session() as session:
+            resp = session.post(
+                f'{self.base_url}/auth/login',
+                data={'username': username, 'password': password},
+                headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                timeout=self._timeout('/auth'),
+            )
         data = self._handle(resp)
-        self.token = data['access_token']
+        self._set_token(data['access_token'])
         return data
 
+    def logout(self):
+        if not self.token:
+            return
+        try:
+            self.post('/auth/logout')
+        except (APIError, requests.RequestException):
+            pass  # token expires on its own; never block closing the app
+        self._set_token(None)
+
     def get(self, path: str, params: Dict = None) -> Any:
-        resp = self.session.get(
-            f'{self.base_url}{path}',
-            params=params,
-            headers=self._headers(),
-        )
-        return self._handle(resp)
+        """GET with If-None-Match; a 304 is answered from the cached body."""
+        url = requests.Request('GET', f'{self.base_url}{path}', params=params).prepare().url
+        headers = self._headers()
+        with self._lock:
+            cached = self._etag_cache.get(url)
+            generation = self._cache_generation
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        with self._session() as session:
+            resp = session.get(url, headers=headers, timeout=self._timeout(path))
+        if resp.status_code == 304 and cached:
+            # Parse again so callers never share (and mutate) one object
+            return json.loads(cached[1])
+        data = self._handle(resp)
+        etag = resp.headers.get('ETag')
+        with self._lock:
+            if generation == self._cache_generation:
+                # Re-insert so the entry moves to the newest end
+                self._etag_cache.pop(url, None)
+                if etag:
+                    self._etag_cache[url] = (etag, resp.content)
+                    while len(self._etag_cache) > ETAG_CACHE_SIZE:
+                        self._etag_cache.popitem(last=False)
+        return data
 
-    def post(self, path: str, data: Dict = None) -> Any:
-        resp = self.session.post(
-            f'{self.base_url}{path}',
-            json=data,
-            headers=self._headers(),
-        )
+    def post(self, path: str, data: Dict = None, headers: Dict = None) -> Any:
+        with self._session() as session:
+            resp = session.post(
+                f'{self.base_url}{path}',
+                json=data,
+                headers={**self._headers(), **(headers or {})},
+                timeout=self._timeout(path),
+            )
         return self._handle(resp)
 
     def put(self, path: str, data: Dict = None) -> Any:
-        resp = self.session.put(
-            f'{self.base_url}{path}',
-            json=data,
-            headers=self._headers(),
-        )
+        with self._session() as session:
+            resp = session.put(
+                f'{self.base_url}{path}',
+                json=data,
+                headers=self._headers(),
+                timeout=self._timeout(path),
+            )
         return self._handle(resp)
 
     # ── Products ──────────────────────────────────────────
-    def get_products(self, search='', limit=200):
-        return self.get('/products', {'search': search, 'limit': limit})
+    def get_products(self, search='', limit=200, view=None):
+        params = {'search': search, 'limit': limit}
+        if view:
+            params['view'] = view
+        return self.get('/products', params)
+
+    def get_product_changes(self, since: int, limit: int = 1000):
+        return self.get('/products/changes', {'since': since, 'limit': limit})
 
     def get_product_by_code(self, code: str):
         return self.get('/products/scan', {'code': code})
@@ -94,11 +211,16 @@ class APIClient:
         return self.get('/stock/alerts/low-stock')
 
     # ── Sales ─────────────────────────────────────────────
-    def create_order(self, data: Dict):
-        return self.post('/sales/orders', data)
+    def create_order(self, data: Dict, idempotency_key: str = None):
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        return self.post('/sales/orders', data, headers)
+
+    def initiate_payment(self, data: Dict, idempotency_key: str = None):
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        return self.post('/sales/payment/initiate', data, headers)
 
-    def initiate_payment(self, data: Dict):
-        return self.post('/sales/payment/initiate', data)
+    def create_orders_batch(self, sales: List[Dict]):
+        return self.post('/sales/orders/batch', {'sales': sales})
 
     def confirm_payment(self, data: Dict):
         return self.post('/sales/payment/confirm', data)
@@ -0,0 +1,173 @@
+"""
+Catalog Replica - local SQLite copy of the active product catalog and prices
+- FTS5 index over name / name_en / code / barcode for instant POS search
+- Exact barcode / QR / code lookup for scans
+- Delta sync from GET /products/changes?since=<row_version>
+"""
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from services.api_client import APIClient
+
+# Trigram tokenizer (SQLite 3.34+) matches anywhere inside Thai words,
+# which have no spaces; older builds fall back to prefix matching.
+_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS products (
+    id          TEXT PRIMARY KEY,
+    code        TEXT,
+    barcode     TEXT,
+    qr_code     TEXT,
+    name        TEXT,
+    name_en     TEXT,
+    row_version INTEGER NOT NULL,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_code ON products(code);
+CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode);
+CREATE INDEX IF NOT EXISTS idx_products_qr_code ON products(qr_code);
+CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+    name, name_en, code, barcode,
+    content='products', content_rowid='rowid',
+    tokenize='{"trigram" if _TRIGRAM else "unicode61"}'
+);
+CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+    INSERT INTO product_fts(rowid, name, name_en, code, barcode)
+    VALUES (new.rowid, new.name, new.name_en, new.code, new.barcode);
+END;
+CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+    INSERT INTO product_fts(product_fts, rowid, name, name_en, code, barcode)
+    VALUES ('delete', old.rowid, old.name, old.name_en, old.code, old.barcode);
+END;
+CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+    INSERT INTO product_fts(product_fts, rowid, name, name_en, code, barcode)
+    VALUES ('delete', old.rowid, old.name, old.name_en, old.code, old.barcode);
+    INSERT INTO product_fts(rowid, name, name_en, code, barcode)
+    VALUES (new.rowid, new.name, new.name_en, new.code, new.barcode);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO products (id, code, barcode, qr_code, name, name_en, row_version, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    code = excluded.code, barcode = excluded.barcode, qr_code = excluded.qr_code,
+    name = excluded.name, name_en = excluded.name_en,
+    row_version = excluded.row_version, data = excluded.data
+"""
+
+
+class CatalogReplica:
+    """
+    Read by the GUI thread, written by the sync worker; one connection
+    guarded by a lock, WAL so reads never wait on a sync commit for long.
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, api: APIClient, path: str):
+        self.api = api
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        # A replica belongs to one backend; start over if the URL changed
+        if self._meta('source') != api.base_url:
+            with self._lock, self._db:
+                self._db.execute('DELETE FROM products')
+                self._set_meta('version', '0')
+                self._set_meta('source', api.base_url)
+
+    # ── Meta ──────────────────────────────────────────────
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, value),
+        )
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return int(self._meta('version') or 0)
+
+    @property
+    def ready(self) -> bool:
+        """True once at least one full sync has completed."""
+        return self.version > 0
+
+    # ── Sync ──────────────────────────────────────────────
+    def sync(self) -> int:
+        """Apply every change since the stored version; returns rows applied."""
+        applied = 0
+        since = self.version
+        while True:
+            page = self.api.get_product_changes(since, self.PAGE_SIZE)
+            with self._lock, self._db:
+                for p in page['products']:
+                    if p.get('is_active'):
+                        self._db.execute(_UPSERT, (
+                            p['id'], p.get('code'), p.get('barcode'), p.get('qr_code'),
+                            p.get('name'), p.get('name_en'), p['row_version'],
+                            json.dumps(p, ensure_ascii=False),
+                        ))
+                    else:
+                        self._db.execute('DELETE FROM products WHERE id = ?', (p['id'],))
+                # Version moves in the same transaction as the rows it covers
+                self._set_meta('version', str(page['version']))
+            applied += len(page['products'])
+            since = page['version']
+            if not page['has_more']:
+                return applied
+
+    # ── Queries ───────────────────────────────────────────
+    def search(self, text: str, limit: int = 60) -> List[Dict]:
+        """Products matching text in name / name_en / code / barcode, best first."""
+        text = text.strip()
+        with self._lock:
+            if not text:
+                rows = self._db.execute(
+                    'SELECT data FROM products ORDER BY name, id LIMIT ?', (limit,)
+                ).fetchall()
+            elif _TRIGRAM and len(text) < 3:
+                # Trigrams need three characters; the table is small enough to scan
+                like = f'%{text}%'
+                rows = self._db.execute(
+                    'SELECT data FROM products WHERE name LIKE ? OR name_en LIKE ? '
+                    'OR code LIKE ? OR barcode LIKE ? ORDER BY name, id LIMIT ?',
+                    (like, like, like, like, limit),
+                ).fetchall()
+            else:
+                terms = ' '.join(
+                    '"' + t.replace('"', '""') + '"' + ('' if _TRIGRAM else '*')
+                    for t in text.split()
+                )
+                rows = self._db.execute(
+                    'SELECT p.data FROM product_fts f JOIN products p ON p.rowid = f.rowid '
+                    'WHERE product_fts MATCH ? ORDER BY f.rank, p.name LIMIT ?',
+                    (terms, limit),
+                ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def lookup(self, code: str) -> Optional[Dict]:
+        """Exact barcode / QR / product code match, as scanned at the till."""
+        code = code.strip()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT data FROM products WHERE barcode = ? OR qr_code = ? OR code = ? LIMIT 1',
+                (code, code, code),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
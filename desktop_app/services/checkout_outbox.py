@@ -0,0 +1,271 @@
+"""
+Checkout Outbox - durable local queue of completed cash sales
+- Every sale is written to SQLite before it is sent, so a backend outage
+  never loses one; queued sales are drained in the background
+- Sales go through POST /sales/orders/batch: order and payment in one
+  request, and a whole backlog in a few requests after an outage
+- Each sale carries a client-generated idempotency key, so a retry after
+  a lost response never creates a second order or payment
+- A paid sale is never deleted: one the server refuses, or one that has
+  been retried for longer than the server keeps its idempotency key, is
+  held for the cashier to resend or close by hand
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+from services.api_client import APIClient, APIError
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales (
+    id           TEXT PRIMARY KEY,
+    created_at   REAL NOT NULL,
+    order_data   TEXT NOT NULL,
+    paid_amount  REAL NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'pending',  -- pending | sent | rejected | resolved
+    order_id     TEXT,  -- set once the backend has accepted the sale
+    order_number TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    last_error   TEXT,
+    first_sent_at REAL,  -- first request that may have reached the server
+    resolved_at  REAL,
+    resolution   TEXT   -- cashier's note when a rejected sale is closed by hand
+);
+CREATE INDEX IF NOT EXISTS idx_sales_status ON sales(status, created_at);
+"""
+
+# Columns added after the first release: (name, declaration)
+_ADDED_COLUMNS = (
+    ('first_sent_at', 'REAL'),
+    ('resolved_at', 'REAL'),
+    ('resolution', 'TEXT'),
+)
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Network failures, server errors and expired logins are worth retrying; 4xx rejections are not."""
+    if isinstance(exc, requests.RequestException):
+        return True
+    return isinstance(exc, APIError) and (exc.status_code in (0, 401, 408, 429) or exc.status_code >= 500)
+
+
+class SaleRejected(APIError):
+    """The server refused a sale; it is kept in the outbox for the cashier to resolve."""
+
+    def __init__(self, sale_id: str, exc: APIError):
+        super().__init__(str(exc), exc.status_code)
+        self.sale_id = sale_id
+
+
+class CheckoutOutbox:
+    BATCH_SIZE = 100
+    # Sales still unsent this long after their first attempt are held for a
+    # person to check: well inside the backend's IDEMPOTENCY_KEY_TTL_HOURS
+    # (72), after which a resend could create the order a second time
+    REPLAY_WINDOW = int(os.getenv('OUTBOX_REPLAY_WINDOW_HOURS', '48')) * 3600
+
+    def __init__(self, api: APIClient, path: str):
+        if not path or path == ':memory:' or path.startswith('file::memory:'):
+            raise ValueError('CheckoutOutbox needs a database file: paid sales must survive a restart')
+        self.api = api
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        # Money records: fsync on every commit
+        self._db.execute('PRAGMA synchronous=FULL')
+        self._db.executescript(_SCHEMA)
+        existing = {row[1] for row in self._db.execute('PRAGMA table_info(sales)')}
+        with self._db:
+            for name, declaration in _ADDED_COLUMNS:
+                if name not in existing:
+                    self._db.execute(f'ALTER TABLE sales ADD COLUMN {name} {declaration}')
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock, self._db:
+            return self._db.execute(sql, params).fetchall()
+
+    # ── Recording ─────────────────────────────────────────
+    def record(self, order_data: Dict, paid_amount: float) -> str:
+        sale_id = str(uuid.uuid4())
+        self._execute(
+            'INSERT INTO sales (id, created_at, order_data, paid_amount) VALUES (?, ?, ?, ?)',
+            (sale_id, time.time(), json.dumps(order_data, ensure_ascii=False), paid_amount),
+        )
+        return sale_id
+
+    def checkout(self, order_data: Dict, paid_amount: float) -> Dict:
+        """
+        Record a cash sale and try to send it now. Returns the server result,
+        or a local one with queued=True if the backend could not be reached.
+        Raises SaleRejected if the backend refused the sale; it stays in the
+        outbox as rejected until the cashier resends or closes it.
+        """
+        sale_id = self.record(order_data, paid_amount)
+        try:
+            result = self._send([sale_id])[sale_id]
+        except (APIError, requests.RequestException) as e:
+            if not is_retryable(e):
+                self._note_failure(sale_id, e, rejected=True)
+                raise SaleRejected(sale_id, e) from e
+            self._note_failure(sale_id, e)
+        else:
+            # _send has already recorded the outcome
+            if result['status'] != 'error':
+                return result
+            error = APIError(f"[HTTP {result['status_code']}] {result['detail']}", result['status_code'])
+            if not is_retryable(error):
+                raise SaleRejected(sale_id, error)
+        return {
+            'order_number': f'OFFLINE-{sale_id[:8].upper()}',
+            'paid_amount': paid_amount,
+            'queued': True,
+        }
+
+    # ── Sending ───────────────────────────────────────────
+    def _send(self, sale_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Post sales in one batch request and record the outcome of each.
+        Returns the per-sale results by sale id; raises if the request failed.
+        """
+        marks = ','.join('?' * len(sale_ids))
+        rows = self._execute(
+            f'SELECT id, created_at, order_data, paid_amount FROM sales WHERE id IN ({marks})', tuple(sale_ids)
+        )
+        sales = [
+            {
+                **json.loads(order_data),
+                'idempotency_key': sale_id,
+                'payment_method': 'cash',
+                'paid_amount': paid_amount,
+                'sold_at': datetime.fromtimestamp(created_at, timezone.utc).isoformat(),
+            }
+            for sale_id, created_at, order_data, paid_amount in rows
+        ]
+        self._execute(
+            f'UPDATE sales SET first_sent_at = COALESCE(first_sent_at, ?) WHERE id IN ({marks})',
+            (time.time(), *sale_ids),
+        )
+        response = self.api.create_orders_batch(sales)
+        results = {}
+        for result in response['results']:
+            sale_id = sales[result['index']]['idempotency_key']
+            results[sale_id] = result
+            if result['status'] == 'error':
+                error = APIError(result['detail'], result['status_code'])
+                self._note_failure(sale_id, error, rejected=not is_retryable(error))
+            else:
+                self._execute(
+                    "UPDATE sales SET status = 'sent', order_id = ?, order_number = ?, last_error = NULL WHERE id = ?",
+                    (result['order_id'], result['order_number'], sale_id),
+                )
+        return results
+
+    def submit(self, sale_id: str) -> Dict:
+        """Send one sale (order and payment together). Safe to repeat."""
+        result = self._send([sale_id])[sale_id]
+        if result['status'] == 'error':
+            raise APIError(f"[HTTP {result['status_code']}] {result['detail']}", result['status_code'])
+        return result
+
+    def _hold_expired(self) -> None:
+        """Hold pending sales whose idempotency key the server may have dropped."""
+        self._execute(
+            "UPDATE sales SET status = 'rejected', last_error = ? "
+            "WHERE status = 'pending' AND first_sent_at < ?",
+            (f'ส่งไม่สำเร็จนานเกิน {self.REPLAY_WINDOW // 3600} ชั่วโมง '
+             'ตรวจสอบว่าบิลนี้เข้าระบบแล้วหรือยังก่อนส่งใหม่', time.time() - self.REPLAY_WINDOW),
+        )
+
+    def _note_failure(self, sale_id: str, exc: Exception, rejected: bool = False) -> None:
+        self._execute(
+            'UPDATE sales SET attempts = attempts + 1, last_error = ?, status = ? WHERE id = ?',
+            (str(exc), 'rejected' if rejected else 'pending', sale_id),
+        )
+
+    def drain(self, limit: Optional[int] = None) -> int:
+        """Send up to limit queued sales, oldest first, in one batch; returns sales accepted."""
+        self._hold_expired()
+        pending = [row[0] for row in self._execute(
+            "SELECT id FROM sales WHERE status = 'pending' ORDER BY created_at LIMIT ?",
+            (limit or self.BATCH_SIZE,),
+        )]
+        if not pending:
+            return 0
+        try:
+            results = self._send(pending)
+        except (APIError, requests.RequestException) as e:
+            if is_retryable(e):
+                for sale_id in pending:
+                    self._note_failure(sale_id, e)
+                return 0
+            if len(pending) == 1:
+                self._note_failure(pending[0], e, rejected=True)
+                logger.error('Queued sale %s rejected by server: %s', pending[0], e)
+                return 0
+            # The batch as a whole was refused (e.g. one malformed sale): isolate it
+            return sum(self.drain(1) for _ in pending)
+        for sale_id, result in results.items():
+            if result['status'] == 'error':
+                logger.error('Queued sale %s rejected by server: %s', sale_id, result['detail'])
+        return sum(1 for r in results.values() if r['status'] != 'error')
+
+    def pending_count(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM sales WHERE status = 'pending'")[0][0]
+
+    # ── Manual resolution ─────────────────────────────────
+    def rejected_count(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM sales WHERE status = 'rejected'")[0][0]
+
+    def rejected_sales(self) -> List[Dict]:
+        """Sales waiting for the cashier, oldest first."""
+        rows = self._execute(
+            "SELECT id, created_at, order_data, paid_amount, attempts, last_error, first_sent_at "
+            "FROM sales WHERE status = 'rejected' ORDER BY created_at"
+        )
+        held_before = time.time() - self.REPLAY_WINDOW
+        return [
+            {
+                'id': sale_id,
+                'created_at': created_at,
+                'order_data': json.loads(order_data),
+                'paid_amount': paid_amount,
+                'attempts': attempts,
+                'last_error': last_error,
+                # A resend may duplicate the order: check the server first
+                'expired': first_sent_at is not None and first_sent_at < held_before,
+            }
+            for sale_id, created_at, order_data, paid_amount, attempts, last_error, first_sent_at in rows
+        ]
+
+    def requeue(self, sale_id: str) -> None:
+        """
+        Send a rejected sale again with the next drain. For an expired sale the
+        caller has checked the server does not have it, so its replay window
+        starts over.
+        """
+        self._execute(
+            "UPDATE sales SET status = 'pending', first_sent_at = NULL WHERE id = ? AND status = 'rejected'",
+            (sale_id,),
+        )
+
+    def resolve(self, sale_id: str, note: str) -> None:
+        """Close a rejected sale by hand (e.g. money refunded); the record is kept."""
+        self._execute(
+            "UPDATE sales SET status = 'resolved', resolved_at = ?, resolution = ? "
+            "WHERE id = ? AND status = 'rejected'",
+            (time.time(), note, sale_id),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
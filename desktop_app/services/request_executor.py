@@ -0,0 +1,160 @@
+"""
+Request Executor - shared worker pool for blocking API calls
+- A fixed QThreadPool instead of a QThread per request
+- Results and errors are delivered on the GUI thread
+- Keyed requests supersede each other: a new search drops the previous one
+- Identical calls already in flight are coalesced into one HTTP request
+"""
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+# Worker threads; the API client keeps as many keep-alive connections
+API_WORKERS = int(os.getenv('API_WORKERS', '4'))
+
+ResultCallback = Optional[Callable[[Any], None]]
+ErrorCallback = Optional[Callable[[Exception], None]]
+
+
+class _Job(QRunnable):
+    def __init__(self, executor: 'RequestExecutor', identity: tuple, fn: Callable, args: tuple, kwargs: dict):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.executor = executor
+        self.identity = identity
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.subscribers: List['RequestHandle'] = []
+
+    def run(self):
+        if not self.subscribers:
+            return  # every caller cancelled before a worker picked it up
+        try:
+            result, error = self.fn(*self.args, **self.kwargs), None
+        except Exception as e:
+            result, error = None, e
+        self.executor._finished.emit(self, result, error)
+
+
+class RequestHandle:
+    """One caller's interest in a job; cancel() drops its callbacks."""
+
+    def __init__(self, job: _Job, key: Optional[str], on_result: ResultCallback, on_error: ErrorCallback):
+        self.job = job
+        self.key = key
+        self.on_result = on_result
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.job.executor._cancel(self)
+
+
+def _alive(callback: Callable) -> bool:
+    # Bound slots of widgets closed while the request was in flight
+    owner = getattr(callback, '__self__', None)
+    return not (isinstance(owner, QObject) and sip.isdeleted(owner))
+
+
+class RequestExecutor(QObject):
+    _finished = pyqtSignal(object, object, object)  # job, result, error
+
+    def __init__(self, max_workers: int = API_WORKERS, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[tuple, _Job] = {}
+        self._by_key: Dict[str, RequestHandle] = {}
+        self._finished.connect(self._deliver)
+
+    @staticmethod
+    def _identity(fn: Callable, args: tuple, kwargs: dict) -> tuple:
+        return fn, repr(args), repr(sorted(kwargs.items()))
+
+    def submit(
+        self,
+        fn: Callable,
+        *args,
+        key: Optional[str] = None,
+        on_result: ResultCallback = None,
+        on_error: ErrorCallback = None,
+        **kwargs,
+    ) -> RequestHandle:
+        """
+        Run fn(*args, **kwargs) on the pool. With key, any earlier request
+        under the same key is cancelled first. Must be called from the GUI thread.
+        """
+        identity = self._identity(fn, args, kwargs)
+        previous = self._by_key.get(key) if key else None
+        if previous and previous.job.identity == identity:
+            # Same call still pending under this key: keep it, newest callbacks win
+            previous.on_result, previous.on_error = on_result, on_error
+            return previous
+        if previous:
+            previous.cancel()
+        with self._lock:
+            job = self._in_flight.get(identity)
+            start = job is None
+            if start:
+                job = _Job(self, identity, fn, args, kwargs)
+                self._in_flight[identity] = job
+            handle = RequestHandle(job, key, on_result, on_error)
+            job.subscribers.append(handle)
+        if key:
+            self._by_key[key] = handle
+        if start:
+            self.pool.start(job)
+        return handle
+
+    def _cancel(self, handle: RequestHandle) -> None:
+        handle.cancelled = True
+        if handle.key and self._by_key.get(handle.key) is handle:
+            del self._by_key[handle.key]
+        job = handle.job
+        with self._lock:
+            if handle in job.subscribers:
+                job.subscribers.remove(handle)
+            if job.subscribers:
+                return
+            # Nobody is waiting: forget it, and skip it if it has not started
+            if self._in_flight.get(job.identity) is job:
+                del self._in_flight[job.identity]
+        self.pool.tryTake(job)
+
+    def _deliver(self, job: _Job, result: Any, error: Optional[Exception]) -> None:
+        with self._lock:
+            if self._in_flight.get(job.identity) is job:
+                del self._in_flight[job.identity]
+            handles, job.subscribers = job.subscribers, []
+        for handle in handles:
+            if handle.key and self._by_key.get(handle.key) is handle:
+                del self._by_key[handle.key]
+            callback = handle.on_error if error is not None else handle.on_result
+            if handle.cancelled or callback is None or not _alive(callback):
+                if error is not None and callback is None:
+                    logger.warning('Background request failed: %s', error)
+                continue
+            callback(error if error is not None else result)
+
+    def shutdown(self, timeout_ms: int = 3000) -> None:
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
+
+
+_executor: Optional[RequestExecutor] = None
+
+
+def get_executor() -> RequestExecutor:
+    """Process-wide executor; created on first use (after QApplication)."""
+    global _executor
+    if _executor is None:
+        _executor = RequestExecutor()
+    return _executor
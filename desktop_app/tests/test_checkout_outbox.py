@@ -0,0 +1,166 @@
+"""
+Checkout outbox: a paid sale stays on disk until the server accepts it,
+whatever the server answers, and is held for the cashier once a resend
+could slip past the server's idempotency keys
+"""
+import sqlite3
+import time
+
+import pytest
+import requests
+
+from services.api_client import APIError
+from services.checkout_outbox import CheckoutOutbox, SaleRejected
+
+ORDER = {'items': [{'product_id': 'p-1', 'quantity': 1}]}
+
+
+class FakeAPI:
+    """create_orders_batch answering from a script: a response, an exception or a status code per sale."""
+
+    def __init__(self):
+        self.answers = []
+        self.sent = []
+
+    def create_orders_batch(self, sales):
+        self.sent.append([s['idempotency_key'] for s in sales])
+        answer = self.answers.pop(0) if self.answers else 'created'
+        if isinstance(answer, Exception):
+            raise answer
+        results = []
+        for index, sale in enumerate(sales):
+            if answer == 'created':
+                results.append({'index': index, 'status': 'created', 'order_id': sale['idempotency_key'],
+                                'order_number': f'SO-{index}'})
+            else:
+                results.append({'index': index, 'status': 'error', 'status_code': answer, 'detail': 'refused'})
+        return {'results': results}
+
+
+@pytest.fixture
+def api():
+    return FakeAPI()
+
+
+@pytest.fixture
+def outbox(api, tmp_path):
+    box = CheckoutOutbox(api, str(tmp_path / 'outbox.db'))
+    yield box
+    box.close()
+
+
+def _statuses(outbox):
+    return [row[0] for row in outbox._execute('SELECT status FROM sales ORDER BY created_at')]
+
+
+def test_memory_database_refused(api):
+    with pytest.raises(ValueError):
+        CheckoutOutbox(api, ':memory:')
+
+
+def test_accepted_sale_is_sent(outbox):
+    result = outbox.checkout(ORDER, 100)
+    assert result['status'] == 'created'
+    assert _statuses(outbox) == ['sent']
+
+
+def test_offline_sale_is_queued_then_drained(outbox, api):
+    api.answers = [requests.ConnectionError('down')]
+    assert outbox.checkout(ORDER, 100)['queued']
+    assert outbox.pending_count() == 1
+
+    assert outbox.drain() == 1
+    assert _statuses(outbox) == ['sent']
+    assert api.sent[0] == api.sent[1]  # same idempotency key on the retry
+
+
+def test_rejected_checkout_keeps_the_sale(outbox, api):
+    api.answers = [409]
+    with pytest.raises(SaleRejected) as raised:
+        outbox.checkout(ORDER, 100)
+    assert _statuses(outbox) == ['rejected']
+    held = outbox.rejected_sales()
+    assert [s['id'] for s in held] == [raised.value.sale_id]
+    assert held[0]['paid_amount'] == 100 and held[0]['attempts'] == 1 and not held[0]['expired']
+
+
+def test_refused_request_keeps_the_sale(outbox, api):
+    api.answers = [APIError('bad request', 422)]
+    with pytest.raises(SaleRejected):
+        outbox.checkout(ORDER, 100)
+    assert outbox.rejected_count() == 1
+
+
+def test_server_error_result_stays_pending(outbox, api):
+    api.answers = [503]
+    assert outbox.checkout(ORDER, 100)['queued']
+    assert _statuses(outbox) == ['pending']
+
+
+def test_rejected_in_drain_then_requeued(outbox, api):
+    api.answers = [requests.ConnectionError('down'), 409]
+    outbox.checkout(ORDER, 100)
+    assert outbox.drain() == 0
+    assert outbox.rejected_count() == 1 and outbox.pending_count() == 0
+
+    # e.g. stock was received: send it again
+    outbox.requeue(outbox.rejected_sales()[0]['id'])
+    assert outbox.drain() == 1
+    assert _statuses(outbox) == ['sent']
+
+
+def test_resolved_sale_is_kept(outbox, api):
+    api.answers = [409]
+    with pytest.raises(SaleRejected) as raised:
+        outbox.checkout(ORDER, 100)
+    outbox.resolve(raised.value.sale_id, 'คืนเงินลูกค้าแล้ว')
+
+    assert outbox.rejected_count() == 0
+    assert outbox._execute('SELECT status, resolution FROM sales') == [('resolved', 'คืนเงินลูกค้าแล้ว')]
+
+
+def test_sale_past_replay_window_is_held(outbox, api):
+    api.answers = [requests.ConnectionError('down')]
+    outbox.checkout(ORDER, 100)
+    outbox._execute('UPDATE sales SET first_sent_at = ?', (time.time() - outbox.REPLAY_WINDOW - 1,))
+
+    assert outbox.drain() == 0
+    assert len(api.sent) == 1  # not resent automatically
+    held = outbox.rejected_sales()
+    assert held[0]['expired']
+
+    # The cashier checked the server does not have it
+    outbox.requeue(held[0]['id'])
+    assert outbox.drain() == 1
+
+
+def test_sales_survive_reopening(api, tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    box = CheckoutOutbox(api, path)
+    api.answers = [requests.ConnectionError('down')]
+    box.checkout(ORDER, 100)
+    box.close()
+
+    box = CheckoutOutbox(api, path)
+    try:
+        assert box.pending_count() == 1
+    finally:
+        box.close()
+
+
+def test_database_from_before_manual_resolution(api, tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE sales (id TEXT PRIMARY KEY, created_at REAL NOT NULL, order_data TEXT NOT NULL, "
+               "paid_amount REAL NOT NULL, status TEXT NOT NULL DEFAULT 'pending', order_id TEXT, "
+               "order_number TEXT, attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT)")
+    db.execute("INSERT INTO sales (id, created_at, order_data, paid_amount, status) "
+               "VALUES ('old', 1, '{}', 50, 'rejected')")
+    db.commit()
+    db.close()
+
+    box = CheckoutOutbox(api, path)
+    try:
+        assert [s['id'] for s in box.rejected_sales()] == ['old']
+    finally:
+        box.close()
@@ -0,0 +1,55 @@
+"""
+Product grid model: diffed result updates always end on the new result,
+moving rows with inserts/removes rather than a reset when rows are kept
+"""
+import os
+import random
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+from ui.product_grid import ProductListModel
+
+PRODUCTS = [{'id': f'p-{i:04d}', 'name': f'สินค้า {i}', 'selling_price': i} for i in range(300)]
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_random_results_end_on_the_new_list(app):
+    rng = random.Random(7)
+    model = ProductListModel()
+    for _ in range(300):
+        result = rng.sample(PRODUCTS, rng.randint(0, len(PRODUCTS)))
+        if rng.random() < 0.5:
+            result.sort(key=lambda p: p['id'])
+        model.set_products(result)
+        assert model._products == result
+        assert model.rowCount() == len(result)
+
+
+def test_narrowing_keeps_rows_without_a_reset(app):
+    model = ProductListModel()
+    model.set_products(PRODUCTS)
+    resets, removed = [], []
+    model.modelReset.connect(lambda: resets.append(1))
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append(last - first + 1))
+
+    model.set_products(PRODUCTS[::10])
+    assert not resets and sum(removed) == len(PRODUCTS) - len(PRODUCTS[::10])
+
+
+def test_changed_product_updates_in_place(app):
+    model = ProductListModel()
+    model.set_products(PRODUCTS[:5])
+    changed = []
+    model.dataChanged.connect(lambda first, last: changed.append((first.row(), last.row())))
+
+    repriced = [dict(p) for p in PRODUCTS[:5]]
+    repriced[2]['selling_price'] = 99
+    model.set_products(repriced)
+    assert changed == [(2, 2)] and model.product(2)['selling_price'] == 99
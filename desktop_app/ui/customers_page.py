@@ -7,30 +7,14 @@ from PyQt6.QtWidgets import (
     QDialog, QFormLayout, QDoubleSpinBox, QSpinBox,
     QMessageBox, QFrame, QComboBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QRegularExpressionValidator
 from PyQt6.QtCore import QRegularExpression
 from services.api_client import APIClient, APIError
+from services.request_executor import get_executor
 from ui.styles import INPUT_STYLE, BUTTON_PRIMARY, BUTTON_SECONDARY, TABLE_STYLE, CARD_STYLE
 
 
-class CustomersWorker(QThread):
-    result = pyqtSignal(list)
-    error = pyqtSignal(str)
-
-    def __init__(self, api: APIClient, search=''):
-        super().__init__()
-        self.api = api
-        self.search = search
-
-    def run(self):
-        try:
-            data = self.api.get_customers(self.search)
-            self.result.emit(data if isinstance(data, list) else [])
-        except Exception as e:
-            self.error.emit(str(e))
-
-
 class CustomerFormDialog(QDialog):
     saved = pyqtSignal()
 
@@ -156,7 +140,6 @@ class CustomersPage(QWidget):
         super().__init__(parent)
         self.api = api
         self.customers = []
-        self.worker = None
         self._build()
 
     def _build(self):
@@ -228,17 +211,15 @@ class CustomersPage(QWidget):
 
     def on_show(self):
         search = self.search_inp.text()
-        if self.worker and self.worker.isRunning():
-            return
-        self.worker = CustomersWorker(self.api, search)
-        self.worker.result.connect(self._on_data)
-        self.worker.error.connect(self._on_error)
-        self.worker.start()
+        # A newer search replaces one still loading
+        get_executor().submit(self.api.get_customers, search, key='customers-page',
+                              on_result=self._on_data, on_error=self._on_error)
 
     STATUS_COLOR = {'active':'#10b981','overdue':'#ef4444','suspended':'#94a3b8','paid':'#3b82f6'}
     STATUS_LABEL = {'active':'ปกติ','overdue':'เกินกำหนด','suspended':'ระงับ','paid':'ชำระแล้ว'}
 
-    def _on_data(self, customers: list):
+    def _on_data(self, customers):
+        customers = customers if isinstance(customers, list) else []
         self.customers = customers
         self.table.setRowCount(len(customers))
         for row, c in enumerate(customers):
@@ -260,7 +241,7 @@ class CustomersPage(QWidget):
                 self.table.setItem(row, col, item)
         self.status_lbl.setText(f'ทั้งหมด {len(customers)} ราย  (ดับเบิลคลิกเพื่อแก้ไข)')
 
-    def _on_error(self, msg: str):
+    def _on_error(self, msg):
         self.status_lbl.setText(f'ข้อผิดพลาด: {msg}')
 
     def _open_add(self):
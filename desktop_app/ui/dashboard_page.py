@@ -5,28 +5,13 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QFrame, QPushButton, QGridLayout, QScrollArea
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 from services.api_client import APIClient
+from services.request_executor import get_executor
 from ui.styles import BUTTON_SECONDARY, CARD_STYLE
 
 
-class DashboardWorker(QThread):
-    result = pyqtSignal(dict)
-    error = pyqtSignal(str)
-
-    def __init__(self, api: APIClient):
-        super().__init__()
-        self.api = api
-
-    def run(self):
-        try:
-            data = self.api.get_dashboard()
-            self.result.emit(data)
-        except Exception as e:
-            self.error.emit(str(e))
-
-
 def make_kpi_card(icon: str, label: str, value: str, sub: str, gradient: tuple) -> QFrame:
     card = QFrame()
     card.setObjectName('card')
@@ -78,7 +63,6 @@ class DashboardPage(QWidget):
     def __init__(self, api: APIClient, parent=None):
         super().__init__(parent)
         self.api = api
-        self.worker = None
         self._build()
 
     def _build(self):
@@ -151,12 +135,8 @@ class DashboardPage(QWidget):
         outer.addWidget(scroll)
 
     def on_show(self):
-        if self.worker and self.worker.isRunning():
-            return
-        self.worker = DashboardWorker(self.api)
-        self.worker.result.connect(self._on_data)
-        self.worker.error.connect(self._on_error)
-        self.worker.start()
+        # Coalesced: re-opening the page while a load is in flight joins it
+        get_executor().submit(self.api.get_dashboard, on_result=self._on_data, on_error=self._on_error)
 
     def _on_data(self, data: dict):
         today = data.get('today', {})
@@ -178,5 +158,5 @@ class DashboardPage(QWidget):
 
         self.orders_placeholder.setText(f'ยอดขายวันนี้: {today.get("order_count",0)} รายการ | เดือนนี้: {month.get("order_count",0)} รายการ')
 
-    def _on_error(self, msg: str):
+    def _on_error(self, msg):
         self.orders_placeholder.setText(f'ไม่สามารถโหลดข้อมูลได้: {msg}')
@@ -5,39 +5,19 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel,
     QLineEdit, QPushButton, QMessageBox, QFrame
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPalette
 from services.api_client import APIClient, APIError
+from services.request_executor import get_executor
 from ui.styles import INPUT_STYLE, BUTTON_PRIMARY
 
 
-class LoginWorker(QThread):
-    success = pyqtSignal(dict)
-    error = pyqtSignal(str)
-
-    def __init__(self, api: APIClient, username: str, password: str):
-        super().__init__()
-        self.api = api
-        self.username = username
-        self.password = password
-
-    def run(self):
-        try:
-            data = self.api.login(self.username, self.password)
-            self.success.emit(data)
-        except APIError as e:
-            self.error.emit(str(e))
-        except Exception as e:
-            self.error.emit(f'ไม่สามารถเชื่อมต่อกับ Server: {e}')
-
-
 class LoginWindow(QDialog):
     logged_in = pyqtSignal(dict)
 
     def __init__(self, api: APIClient, parent=None):
         super().__init__(parent)
         self.api = api
-        self.worker = None
         self.setWindowTitle('AgriPOS — เข้าสู่ระบบ')
         self.setFixedSize(420, 540)
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Dialog)
@@ -145,10 +125,8 @@ class LoginWindow(QDialog):
         self.login_btn.setText('กำลังเข้าสู่ระบบ...')
         self.status_label.setText('')
 
-        self.worker = LoginWorker(self.api, username, password)
-        self.worker.success.connect(self._on_success)
-        self.worker.error.connect(self._on_error)
-        self.worker.start()
+        get_executor().submit(self.api.login, username, password,
+                              on_result=self._on_success, on_error=self._on_login_failed)
 
     def _on_success(self, data: dict):
         self.login_btn.setEnabled(True)
@@ -156,6 +134,9 @@ class LoginWindow(QDialog):
         self.logged_in.emit(data)
         self.accept()
 
+    def _on_login_failed(self, e: Exception):
+        self._on_error(str(e) if isinstance(e, APIError) else f'ไม่สามารถเชื่อมต่อกับ Server: {e}')
+
     def _on_error(self, msg: str):
         self.login_btn.setEnabled(True)
         self.login_btn.setText('เข้าสู่ระบบ')
@@ -9,6 +9,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QFont, QIcon
 from services.api_client import APIClient
+from services.catalog_replica import CatalogReplica
+from services.checkout_outbox import CheckoutOutbox
 from services.printer import PrinterService
 from ui.pos_terminal import POSTerminal
 from ui.products_page import ProductsPage
@@ -47,11 +49,14 @@ class NavButton(QPushButton):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, api: APIClient, user: dict, printer: PrinterService):
+    def __init__(self, api: APIClient, user: dict, printer: PrinterService,
+                 replica: CatalogReplica = None, outbox: CheckoutOutbox = None):
         super().__init__()
         self.api = api
         self.user = user
         self.printer = printer
+        self.replica = replica
+        self.outbox = outbox
         self.setWindowTitle('AgriPOS — ระบบจัดการร้านค้าเกษตร')
         self.setMinimumSize(1280, 780)
 
@@ -180,7 +185,7 @@ class MainWindow(QMainWindow):
         self.pages: dict[str, QWidget] = {}
 
         self.pages['dashboard'] = DashboardPage(self.api)
-        self.pages['pos'] = POSTerminal(self.api, self.printer, self.user)
+        self.pages['pos'] = POSTerminal(self.api, self.printer, self.user, self.replica, self.outbox)
         self.pages['products'] = ProductsPage(self.api)
         self.pages['customers'] = CustomersPage(self.api)
         self.pages['settings'] = SettingsPage(self.printer)
@@ -200,4 +205,5 @@ class MainWindow(QMainWindow):
         reply = QMessageBox.question(self, 'ออกจากระบบ', 'ต้องการออกจากระบบ?',
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
+            self.api.logout()
             self.close()
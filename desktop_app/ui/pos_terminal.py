@@ -3,19 +3,25 @@ POS Terminal — Main selling screen
 """
 from PyQt6.QtWidgets import (
     QWidget, QHBoxLayout, QVBoxLayout, QLabel, QLineEdit,
-    QPushButton, QFrame, QScrollArea, QGridLayout,
+    QPushButton, QFrame,
     QMessageBox, QDialog, QSizePolicy, QSplitter,
     QTableWidget, QTableWidgetItem, QHeaderView,
-    QButtonGroup, QSpinBox, QDoubleSpinBox
+    QButtonGroup, QSpinBox, QDoubleSpinBox, QInputDialog
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, pyqtSlot
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, pyqtSlot
 from PyQt6.QtGui import QFont, QColor, QPixmap, QIcon
 from typing import List, Dict, Optional
+from datetime import datetime
+import os
 from services.api_client import APIClient, APIError
+from services.catalog_replica import CatalogReplica
+from services.checkout_outbox import CheckoutOutbox, SaleRejected
+from services.request_executor import get_executor
 from services.printer import PrinterService
+from ui.product_grid import ProductGrid
 from ui.styles import (
     INPUT_STYLE, BUTTON_PRIMARY, BUTTON_SECONDARY, BUTTON_DANGER,
-    TABLE_STYLE, NUMPAD_STYLE, CHECKOUT_BTN_STYLE, PRODUCT_CARD_STYLE
+    TABLE_STYLE, NUMPAD_STYLE, CHECKOUT_BTN_STYLE
 )
 import logging
 
@@ -48,87 +54,6 @@ class CartItem:
         return self.subtotal
 
 
-# ── Product Search Worker ─────────────────────────────────────
-class ProductSearchWorker(QThread):
-    result = pyqtSignal(list)
-    error = pyqtSignal(str)
-
-    def __init__(self, api: APIClient, search: str):
-        super().__init__()
-        self.api = api
-        self.search = search
-
-    def run(self):
-        try:
-            data = self.api.get_products(self.search, limit=60)
-            self.result.emit(data if isinstance(data, list) else [])
-        except Exception as e:
-            self.error.emit(str(e))
-
-
-# ── Product Card Widget ───────────────────────────────────────
-class ProductCard(QFrame):
-    clicked = pyqtSignal(dict)
-
-    def __init__(self, product: dict, parent=None):
-        super().__init__(parent)
-        self.product = product
-        self.setObjectName('product_card')
-        self.setFixedSize(160, 140)
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.setStyleSheet(PRODUCT_CARD_STYLE + """
-            QFrame#product_card { cursor: pointer; }
-        """)
-        self._build()
-
-    def _build(self):
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(10, 10, 10, 10)
-        layout.setSpacing(4)
-
-        # Icon / image placeholder
-        icon = QLabel('📦')
-        icon.setFont(QFont('', 28))
-        icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        icon.setFixedHeight(40)
-        layout.addWidget(icon)
-
-        # Name
-        name = QLabel(self.product.get('name', ''))
-        name.setFont(QFont('Sarabun', 11, QFont.Weight.Bold))
-        name.setStyleSheet('color: #1e293b;')
-        name.setWordWrap(True)
-        name.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        name.setMaximumHeight(42)
-        layout.addWidget(name)
-
-        # Price
-        price = self.product.get('selling_price', 0)
-        unit = self.product.get('unit', '')
-        price_label = QLabel(f'฿{float(price):,.2f}/{unit}')
-        price_label.setFont(QFont('Sarabun', 11, QFont.Weight.Bold))
-        price_label.setStyleSheet('color: #10b981;')
-        price_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(price_label)
-
-    def mousePressEvent(self, event):
-        self.clicked.emit(self.product)
-        super().mousePressEvent(event)
-
-    def enterEvent(self, event):
-        self.setStyleSheet(PRODUCT_CARD_STYLE + """
-            QFrame#product_card {
-                background: #f0fdf4;
-                border-color: #10b981;
-            }
-        """)
-        super().enterEvent(event)
-
-    def leaveEvent(self, event):
-        self.setStyleSheet(PRODUCT_CARD_STYLE)
-        super().leaveEvent(event)
-
-
 # ── Cart Table ────────────────────────────────────────────────
 class CartTable(QTableWidget):
     qty_changed = pyqtSignal(int, float)
@@ -214,10 +139,12 @@ class CartTable(QTableWidget):
 class PaymentDialog(QDialog):
     payment_done = pyqtSignal(dict)
 
-    def __init__(self, total: float, api: APIClient, order_data: dict, printer: PrinterService, parent=None):
+    def __init__(self, total: float, api: APIClient, order_data: dict, printer: PrinterService,
+                 outbox: CheckoutOutbox, parent=None):
         super().__init__(parent)
         self.total = total
         self.api = api
+        self.outbox = outbox
         self.order_data = order_data
         self.printer = printer
         self.setWindowTitle('ชำระเงิน')
@@ -322,35 +249,164 @@ class PaymentDialog(QDialog):
         self.confirm_btn.setEnabled(False)
         self.confirm_btn.setText('กำลังบันทึก...')
 
-        try:
-            order = self.api.create_order(self.order_data)
-            # Open cash drawer
-            self.printer.open_cash_drawer()
-            # Print receipt
-            self.printer.print_receipt(order, {})
-            self.payment_done.emit(order)
-            self.accept()
-        except APIError as e:
-            QMessageBox.critical(self, 'ข้อผิดพลาด', str(e))
-            self.confirm_btn.setEnabled(True)
-            self.confirm_btn.setText('✓  ยืนยันชำระเงิน + เปิดลิ้นชัก')
+        # Recorded locally first; queued for later if the backend is unreachable
+        get_executor().submit(self.outbox.checkout, self.order_data, received,
+                              on_result=self._on_checkout_done, on_error=self._on_checkout_failed)
+
+    def _on_checkout_failed(self, e: Exception):
+        if isinstance(e, SaleRejected):
+            # The sale is kept in the outbox; the cart stays for the cashier to correct
+            QMessageBox.critical(self, 'ระบบไม่รับบิลนี้', f'{e}\n\nบิลถูกเก็บไว้ในรายการ "รอตรวจสอบ" '
+                                 'ส่งใหม่หรือปิดรายการ (เช่น คืนเงินลูกค้าแล้ว) ได้จากหน้าขาย')
+            self.reject()
+            return
+        QMessageBox.critical(self, 'ข้อผิดพลาด', str(e))
+        self.confirm_btn.setEnabled(True)
+        self.confirm_btn.setText('✓  ยืนยันชำระเงิน + เปิดลิ้นชัก')
+
+    def _on_checkout_done(self, order: dict):
+        order['change_amount'] = max(0, self.received_input.value() - self.total)
+        # Open cash drawer
+        self.printer.open_cash_drawer()
+        # Print receipt
+        self.printer.print_receipt(order, {})
+        self.payment_done.emit(order)
+        self.accept()
+
+
+# ── Rejected Sales Dialog ─────────────────────────────────────
+class RejectedSalesDialog(QDialog):
+    """Paid sales the server refused: resend them or close them by hand."""
+
+    def __init__(self, outbox: CheckoutOutbox, parent=None):
+        super().__init__(parent)
+        self.outbox = outbox
+        self.sales: List[dict] = []
+        self.setWindowTitle('บิลรอตรวจสอบ')
+        self.resize(760, 420)
+        self.setStyleSheet('QDialog { background: #ffffff; }')
+        self._build()
+        self._load()
+
+    def _build(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(24, 24, 24, 24)
+
+        title = QLabel('⚠  บิลที่ระบบไม่รับ')
+        title.setFont(QFont('Sarabun', 15, QFont.Weight.Bold))
+        title.setStyleSheet('color: #0f172a;')
+        layout.addWidget(title)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels(['เวลาขาย', 'รับเงิน', 'ครั้งที่ส่ง', 'สาเหตุ'])
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setStyleSheet(TABLE_STYLE)
+        layout.addWidget(self.table)
+
+        btn_row = QHBoxLayout()
+        requeue_btn = QPushButton('↻  ส่งใหม่')
+        requeue_btn.setFixedHeight(40)
+        requeue_btn.setStyleSheet(BUTTON_PRIMARY)
+        requeue_btn.clicked.connect(self._requeue)
+        btn_row.addWidget(requeue_btn)
+
+        resolve_btn = QPushButton('✓  ปิดรายการ')
+        resolve_btn.setFixedHeight(40)
+        resolve_btn.setStyleSheet(BUTTON_DANGER)
+        resolve_btn.clicked.connect(self._resolve)
+        btn_row.addWidget(resolve_btn)
+        btn_row.addStretch()
+
+        close_btn = QPushButton('ปิด')
+        close_btn.setFixedHeight(40)
+        close_btn.setStyleSheet(BUTTON_SECONDARY)
+        close_btn.clicked.connect(self.accept)
+        btn_row.addWidget(close_btn)
+        layout.addLayout(btn_row)
+
+    def _load(self):
+        self.sales = self.outbox.rejected_sales()
+        self.table.setRowCount(len(self.sales))
+        for row, sale in enumerate(self.sales):
+            sold_at = datetime.fromtimestamp(sale['created_at']).strftime('%d/%m/%Y %H:%M')
+            paid = QTableWidgetItem(f"฿{sale['paid_amount']:,.2f}")
+            paid.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table.setItem(row, 0, QTableWidgetItem(sold_at))
+            self.table.setItem(row, 1, paid)
+            self.table.setItem(row, 2, QTableWidgetItem(str(sale['attempts'])))
+            self.table.setItem(row, 3, QTableWidgetItem(sale['last_error'] or ''))
+
+    def _selected(self) -> Optional[dict]:
+        row = self.table.currentRow()
+        if row < 0:
+            QMessageBox.information(self, 'บิลรอตรวจสอบ', 'เลือกบิลก่อน')
+            return None
+        return self.sales[row]
+
+    def _requeue(self):
+        sale = self._selected()
+        if not sale:
+            return
+        if sale['expired']:
+            answer = QMessageBox.question(
+                self, 'ส่งใหม่',
+                'บิลนี้ค้างส่งนานเกินกว่าที่ระบบจะกันบิลซ้ำได้\n'
+                'ตรวจสอบในรายการขายของระบบแล้วว่ายังไม่มีบิลนี้ใช่หรือไม่?',
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+        self.outbox.requeue(sale['id'])
+        self._load()
+
+    def _resolve(self):
+        sale = self._selected()
+        if not sale:
+            return
+        note, ok = QInputDialog.getText(self, 'ปิดรายการ', 'บันทึกการแก้ไข (เช่น คืนเงินลูกค้าแล้ว, คีย์บิลใหม่แล้ว)')
+        if not ok or not note.strip():
+            return
+        self.outbox.resolve(sale['id'], note.strip())
+        self._load()
 
 
 # ── POS Terminal Main Widget ──────────────────────────────────
 class POSTerminal(QWidget):
-    def __init__(self, api: APIClient, printer: PrinterService, user: dict, parent=None):
+    def __init__(self, api: APIClient, printer: PrinterService, user: dict,
+                 replica: Optional[CatalogReplica] = None, outbox: Optional[CheckoutOutbox] = None,
+                 parent=None):
         super().__init__(parent)
+        if outbox is None:
+            # Sales are recorded in the outbox before they are sent; an
+            # in-memory one would lose paid sales on a crash or restart
+            raise ValueError('POSTerminal needs a file-backed CheckoutOutbox (OUTBOX_DB)')
         self.api = api
         self.printer = printer
         self.user = user
+        self.replica = replica
+        self.outbox = outbox
         self.cart: List[CartItem] = []
         self.products: List[dict] = []
-        self.search_worker: Optional[ProductSearchWorker] = None
+        self.executor = get_executor()
         self.search_timer = QTimer()
         self.search_timer.setSingleShot(True)
         self.search_timer.timeout.connect(self._do_search)
+        self.sync_timer = QTimer()
+        self.sync_timer.timeout.connect(self._sync_catalog)
         self._build()
         self._load_products()
+        if self.replica:
+            self._sync_catalog()
+            self.sync_timer.start(int(os.getenv('CATALOG_SYNC_INTERVAL', '30')) * 1000)
+        self.drain_timer = QTimer()
+        self.drain_timer.timeout.connect(self._drain_outbox)
+        self.drain_timer.start(int(os.getenv('OUTBOX_DRAIN_INTERVAL', '15')) * 1000)
+        self._drain_outbox()
 
     def _build(self):
         layout = QHBoxLayout(self)
@@ -375,8 +431,21 @@ class POSTerminal(QWidget):
         self.search_input.setFixedHeight(44)
         self.search_input.setStyleSheet(INPUT_STYLE)
         self.search_input.textChanged.connect(self._search_changed)
+        self.search_input.returnPressed.connect(self._search_submitted)
         top_bar.addWidget(self.search_input)
 
+        self.outbox_label = QLabel()
+        self.outbox_label.setStyleSheet('color: #b45309; background: #fffbeb; border-radius: 8px; padding: 4px 10px; font-weight: 600;')
+        self.outbox_label.hide()
+        top_bar.addWidget(self.outbox_label)
+
+        self.rejected_btn = QPushButton()
+        self.rejected_btn.setFixedHeight(44)
+        self.rejected_btn.setStyleSheet(BUTTON_DANGER)
+        self.rejected_btn.clicked.connect(self._show_rejected)
+        self.rejected_btn.hide()
+        top_bar.addWidget(self.rejected_btn)
+
         scan_btn = QPushButton('📷  สแกน')
         scan_btn.setFixedHeight(44)
         scan_btn.setFixedWidth(90)
@@ -384,19 +453,10 @@ class POSTerminal(QWidget):
         top_bar.addWidget(scan_btn)
         left_layout.addLayout(top_bar)
 
-        # Product grid scroll area
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        scroll.setStyleSheet('QScrollArea { border: none; background: transparent; }')
-
-        self.grid_widget = QWidget()
-        self.grid_widget.setStyleSheet('background: transparent;')
-        self.grid_layout = QGridLayout(self.grid_widget)
-        self.grid_layout.setSpacing(10)
-        self.grid_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
-        scroll.setWidget(self.grid_widget)
-        left_layout.addWidget(scroll)
+        # Product grid (virtualized: only visible cards are painted)
+        self.product_grid = ProductGrid()
+        self.product_grid.product_clicked.connect(self._add_to_cart)
+        left_layout.addWidget(self.product_grid)
 
         self.status_label = QLabel('กำลังโหลดสินค้า...')
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -490,48 +550,65 @@ class POSTerminal(QWidget):
 
     # ── Product Loading ───────────────────────────────────────
     def _load_products(self, search=''):
-        if self.search_worker and self.search_worker.isRunning():
-            self.search_worker.terminate()
-        self.search_worker = ProductSearchWorker(self.api, search)
-        self.search_worker.result.connect(self._on_products_loaded)
-        self.search_worker.error.connect(self._on_search_error)
-        self.search_worker.start()
-
-    @pyqtSlot(list)
-    def _on_products_loaded(self, products: list):
+        # Local replica answers in a few ms; the API is the fallback until it has synced
+        if self.replica and self.replica.ready:
+            self._on_products_loaded(self.replica.search(search, limit=60))
+            return
+        # Each keystroke supersedes the search before it; no thread is killed
+        self.executor.submit(self.api.get_products, search, limit=60, view='pos', key='pos-search',
+                             on_result=self._on_products_loaded, on_error=self._on_search_error)
+
+    def _on_products_loaded(self, products):
+        products = products if isinstance(products, list) else []
         self.products = products
         self._render_products(products)
 
     def _render_products(self, products: list):
-        # Clear grid
-        while self.grid_layout.count():
-            item = self.grid_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
+        # Diffed against the visible rows; unchanged cards are not repainted
+        self.product_grid.set_products(products)
         if not products:
             self.status_label.setText('ไม่พบสินค้า')
             self.status_label.show()
             return
-
         self.status_label.hide()
-        cols = 4
-        for i, product in enumerate(products):
-            card = ProductCard(product)
-            card.clicked.connect(self._add_to_cart)
-            self.grid_layout.addWidget(card, i // cols, i % cols)
-
-    @pyqtSlot(str)
-    def _on_search_error(self, msg: str):
+
+    def _on_search_error(self, msg):
         self.status_label.setText(f'ข้อผิดพลาด: {msg}')
         self.status_label.show()
 
     def _search_changed(self, text: str):
-        self.search_timer.start(300)
+        self.search_timer.start(80 if self.replica and self.replica.ready else 300)
 
     def _do_search(self):
         self._load_products(self.search_input.text())
 
+    def _search_submitted(self):
+        # Barcode scanners type the code and press Enter: exact hit goes to the cart
+        text = self.search_input.text().strip()
+        product = self.replica.lookup(text) if text and self.replica and self.replica.ready else None
+        if product:
+            self.search_timer.stop()
+            self.search_input.clear()
+            self._add_to_cart(product)
+            return
+        self.search_timer.stop()
+        self._do_search()
+
+    # ── Catalog Sync ──────────────────────────────────────────
+    def _sync_catalog(self):
+        # Keyed: a tick while a sync is still running joins it instead of starting another
+        was_ready = self.replica.ready
+        self.executor.submit(
+            self.replica.sync, key='catalog-sync',
+            on_result=lambda n: self._on_catalog_synced(n, was_ready),
+            on_error=lambda e: logger.warning('Catalog sync failed: %s', e),
+        )
+
+    def _on_catalog_synced(self, changed: int, was_ready: bool):
+        # Refresh the visible grid on the first sync or when prices/products changed
+        if changed or not was_ready:
+            self._load_products(self.search_input.text())
+
     # ── Cart Operations ───────────────────────────────────────
     def _add_to_cart(self, product: dict):
         pid = product.get('id')
@@ -591,11 +668,40 @@ class POSTerminal(QWidget):
             ],
         }
 
-        dlg = PaymentDialog(total, self.api, order_data, self.printer, self)
+        dlg = PaymentDialog(total, self.api, order_data, self.printer, self.outbox, self)
         dlg.payment_done.connect(self._on_payment_done)
         dlg.exec()
+        self._update_outbox_label()
 
     def _on_payment_done(self, order: dict):
         self.cart.clear()
         self._refresh_cart()
+        if order.get('queued'):
+            self._update_outbox_label()
+            QMessageBox.information(self, 'บันทึกแล้ว', f'✅ บันทึกการขายในเครื่องแล้ว (ออฟไลน์)\n'
+                                    f'เลขที่: {order.get("order_number", "")}\nจะส่งเข้าระบบอัตโนมัติเมื่อเชื่อมต่อได้')
+            return
         QMessageBox.information(self, 'สำเร็จ', f'✅ ชำระเงินสำเร็จ\nเลขที่: {order.get("order_number", "")}')
+
+    # ── Offline Outbox ────────────────────────────────────────
+    def _drain_outbox(self):
+        if not self.outbox.pending_count():
+            self._update_outbox_label()
+            return
+        self.executor.submit(
+            self.outbox.drain, key='outbox-drain',
+            on_result=lambda _: self._update_outbox_label(),
+            on_error=lambda e: logger.warning('Outbox drain failed: %s', e),
+        )
+
+    def _update_outbox_label(self):
+        pending = self.outbox.pending_count()
+        self.outbox_label.setText(f'⏳ รอส่ง {pending} บิล')
+        self.outbox_label.setVisible(pending > 0)
+        rejected = self.outbox.rejected_count()
+        self.rejected_btn.setText(f'⚠  รอตรวจสอบ {rejected} บิล')
+        self.rejected_btn.setVisible(rejected > 0)
+
+    def _show_rejected(self):
+        RejectedSalesDialog(self.outbox, self).exec()
+        self._drain_outbox()
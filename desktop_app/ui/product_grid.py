@@ -0,0 +1,203 @@
+"""
+Product Grid — virtualized POS product cards
+- QListView in icon mode over a QAbstractListModel: only visible cells are painted
+- Cards are drawn by a delegate instead of one QFrame + layouts per product
+- New search results are diffed against the current rows, so unchanged
+  products keep their cells and the view never does a full reset
+"""
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QStyleOptionViewItem, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen
+
+CARD_SIZE = QSize(160, 140)
+CARD_SPACING = 10
+
+ProductRole = Qt.ItemDataRole.UserRole + 1
+
+
+# ── Result Diff ───────────────────────────────────────────────
+def _kept_rows(old_ids: Sequence, new_ids: Sequence) -> List[Tuple[int, int]]:
+    """
+    (old row, new row) pairs of the longest run of products kept in order.
+    Ids are unique, so this is a longest increasing subsequence of old rows:
+    O(n log n), where difflib takes hundreds of ms on 5,000 results.
+    """
+    position = {pid: i for i, pid in enumerate(old_ids)}
+    pairs = [(position[pid], j) for j, pid in enumerate(new_ids) if pid in position]
+    tails: List[int] = []  # smallest old row ending a run of each length
+    tail_pairs: List[int] = []
+    previous: List[Optional[int]] = []
+    for k, (i, _) in enumerate(pairs):
+        n = bisect_left(tails, i)
+        if n == len(tails):
+            tails.append(i)
+            tail_pairs.append(k)
+        else:
+            tails[n] = i
+            tail_pairs[n] = k
+        previous.append(tail_pairs[n - 1] if n else None)
+    kept = []
+    k = tail_pairs[-1] if tail_pairs else None
+    while k is not None:
+        kept.append(pairs[k])
+        k = previous[k]
+    kept.reverse()
+    return kept
+
+
+def _opcodes(old_ids: Sequence, new_ids: Sequence) -> List[Tuple[str, int, int, int, int]]:
+    """difflib-style (tag, i1, i2, j1, j2) opcodes: 'equal' runs and 'replace' gaps."""
+    ops = []
+    i = j = 0
+    for oi, nj in _kept_rows(old_ids, new_ids) + [(len(old_ids), len(new_ids))]:
+        if oi > i or nj > j:
+            ops.append(('replace', i, oi, j, nj))
+        if oi < len(old_ids):
+            if ops and ops[-1][0] == 'equal' and ops[-1][2] == oi and ops[-1][4] == nj:
+                ops[-1] = ('equal', ops[-1][1], oi + 1, ops[-1][3], nj + 1)
+            else:
+                ops.append(('equal', oi, oi + 1, nj, nj + 1))
+        i, j = oi + 1, nj + 1
+    return ops
+
+
+# ── Model ─────────────────────────────────────────────────────
+class ProductListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._products: List[Dict] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._products)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        product = self._products[index.row()]
+        if role == ProductRole:
+            return product
+        if role == Qt.ItemDataRole.DisplayRole:
+            return product.get('name', '')
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{product.get('code', '')}  {product.get('name', '')}"
+        return None
+
+    def product(self, row: int) -> Optional[Dict]:
+        return self._products[row] if 0 <= row < len(self._products) else None
+
+    def set_products(self, products: List[Dict]) -> None:
+        """
+        Move the model to the new result list with row inserts / removes /
+        dataChanged only. Rows are matched by product id.
+        """
+        old_ids = [p.get('id') for p in self._products]
+        new_ids = [p.get('id') for p in products]
+        opcodes = _opcodes(old_ids, new_ids)
+        if not any(tag == 'equal' for tag, *_ in opcodes):
+            # Nothing in common (first load, unrelated search): one reset is cheaper
+            self.beginResetModel()
+            self._products = list(products)
+            self.endResetModel()
+            return
+        # Apply back to front so earlier row numbers stay valid
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                changed = [k for k in range(i2 - i1) if self._products[i1 + k] != products[j1 + k]]
+                for k in changed:
+                    self._products[i1 + k] = products[j1 + k]
+                if changed:
+                    self.dataChanged.emit(self.index(i1 + changed[0]), self.index(i1 + changed[-1]))
+                continue
+            if i2 > i1:
+                self.beginRemoveRows(QModelIndex(), i1, i2 - 1)
+                del self._products[i1:i2]
+                self.endRemoveRows()
+            if j2 > j1:
+                self.beginInsertRows(QModelIndex(), i1, i1 + j2 - j1 - 1)
+                self._products[i1:i1] = products[j1:j2]
+                self.endInsertRows()
+
+
+# ── Card Delegate ─────────────────────────────────────────────
+class ProductCardDelegate(QStyledItemDelegate):
+    """Paints the card the old ProductCard widget laid out: icon, name, price."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icon_font = QFont('', 28)
+        self.text_font = QFont('Sarabun', 11, QFont.Weight.Bold)
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        return CARD_SIZE
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        product = index.data(ProductRole)
+        if not product:
+            return
+        hover = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        rect = QRectF(option.rect).adjusted(1, 1, -1, -1)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor('#10b981' if hover else '#e2e8f0'), 1.5))
+        painter.setBrush(QColor('#f0fdf4' if hover else '#ffffff'))
+        painter.drawRoundedRect(rect, 14, 14)
+
+        inner = rect.adjusted(10, 10, -10, -10)
+        flags = Qt.AlignmentFlag.AlignCenter
+
+        # Icon / image placeholder
+        painter.setFont(self.icon_font)
+        painter.drawText(QRectF(inner.left(), inner.top(), inner.width(), 40), flags, '📦')
+
+        # Name (two lines at most)
+        painter.setFont(self.text_font)
+        painter.setPen(QColor('#1e293b'))
+        name_rect = QRectF(inner.left(), inner.top() + 44, inner.width(), 42)
+        painter.drawText(name_rect, flags | Qt.TextFlag.TextWordWrap, product.get('name', ''))
+
+        # Price
+        price = float(product.get('selling_price') or 0)
+        painter.setPen(QColor('#10b981'))
+        price_rect = QRectF(inner.left(), inner.bottom() - 22, inner.width(), 22)
+        painter.drawText(price_rect, flags, f"฿{price:,.2f}/{product.get('unit', '')}")
+        painter.restore()
+
+
+# ── Grid View ─────────────────────────────────────────────────
+class ProductGrid(QListView):
+    product_clicked = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.product_model = ProductListModel(self)
+        self.setModel(self.product_model)
+        self.setItemDelegate(ProductCardDelegate(self))
+
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setFlow(QListView.Flow.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setGridSize(CARD_SIZE + QSize(CARD_SPACING, CARD_SPACING))
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setMouseTracking(True)  # hover highlight
+        self.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setStyleSheet('QListView { border: none; background: transparent; }')
+
+        self.clicked.connect(self._on_clicked)
+
+    def set_products(self, products: List[Dict]) -> None:
+        self.product_model.set_products(products)
+
+    def _on_clicked(self, index: QModelIndex) -> None:
+        product = self.product_model.product(index.row())
+        if product:
+            self.product_clicked.emit(product)
@@ -7,9 +7,10 @@ from PyQt6.QtWidgets import (
     QDialog, QFormLayout, QComboBox, QDoubleSpinBox, QSpinBox,
     QTextEdit, QMessageBox, QCheckBox, QFrame
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from services.api_client import APIClient, APIError
+from services.request_executor import get_executor
 from ui.styles import (
     INPUT_STYLE, BUTTON_PRIMARY, BUTTON_SECONDARY, TABLE_STYLE,
     DIALOG_STYLE, CARD_STYLE
@@ -18,23 +19,6 @@ from ui.styles import (
 UNITS = ['piece', 'kg', 'g', 'l', 'ml', 'bag', 'box', 'set', 'bottle', 'pack']
 
 
-class ProductsWorker(QThread):
-    result = pyqtSignal(list)
-    error = pyqtSignal(str)
-
-    def __init__(self, api: APIClient, search=''):
-        super().__init__()
-        self.api = api
-        self.search = search
-
-    def run(self):
-        try:
-            data = self.api.get_products(self.search, 200)
-            self.result.emit(data if isinstance(data, list) else [])
-        except Exception as e:
-            self.error.emit(str(e))
-
-
 class ProductFormDialog(QDialog):
     saved = pyqtSignal()
 
@@ -190,7 +174,6 @@ class ProductsPage(QWidget):
         self.api = api
         self.products = []
         self.categories = []
-        self.worker = None
         self._build()
 
     def _build(self):
@@ -266,23 +249,19 @@ class ProductsPage(QWidget):
 
     def on_show(self):
         search = self.search_inp.text()
-        if self.worker and self.worker.isRunning():
-            return
         self.status_lbl.setText('กำลังโหลด...')
-        # Load categories first
-        try:
-            self.categories = self.api.get_categories()
-            if not isinstance(self.categories, list):
-                self.categories = []
-        except Exception:
-            self.categories = []
-
-        self.worker = ProductsWorker(self.api, search)
-        self.worker.result.connect(self._on_data)
-        self.worker.error.connect(self._on_error)
-        self.worker.start()
-
-    def _on_data(self, products: list):
+        executor = get_executor()
+        executor.submit(self.api.get_categories, key='products-page-categories',
+                        on_result=self._on_categories, on_error=lambda _: None)
+        # A newer search replaces one still loading
+        executor.submit(self.api.get_products, search, 200, key='products-page',
+                        on_result=self._on_data, on_error=self._on_error)
+
+    def _on_categories(self, categories):
+        self.categories = categories if isinstance(categories, list) else []
+
+    def _on_data(self, products):
+        products = products if isinstance(products, list) else []
         self.products = products
         self.table.setRowCount(len(products))
         for row, p in enumerate(products):
@@ -308,7 +287,7 @@ class ProductsPage(QWidget):
 
         self.status_lbl.setText(f'ทั้งหมด {len(products)} รายการ  (ดับเบิลคลิกเพื่อแก้ไข)')
 
-    def _on_error(self, msg: str):
+    def _on_error(self, msg):
         self.status_lbl.setText(f'ข้อผิดพลาด: {msg}')
 
     def _open_add(self):
@@ -5,6 +5,7 @@ import {
   Users, BarChart2, Settings, LogOut, Sprout
 } from 'lucide-react';
 import { useAuthStore } from '../../store/authStore';
+import { authApi } from '../../services/api';
 import clsx from 'clsx';
 
 const navItems = [
@@ -27,6 +28,11 @@ const roleLabel: Record<string, string> = {
 export default function Sidebar() {
   const { user, logout } = useAuthStore();
 
+  const handleLogout = () => {
+    authApi.logout().catch(() => {});
+    logout();
+  };
+
   return (
     <aside className="w-64 flex flex-col h-screen shrink-0 bg-gradient-to-b from-slate-900 via-slate-900 to-indigo-950 shadow-2xl">
       {/* Logo */}
@@ -86,7 +92,7 @@ export default function Sidebar() {
           </div>
         </div>
         <button
-          onClick={logout}
+          onClick={handleLogout}
           className="w-full flex items-center gap-2.5 px-3 py-2 text-slate-400 hover:text-rose-400 hover:bg-rose-500/10 rounded-xl text-sm transition-all"
         >
           <LogOut className="w-4 h-4" />
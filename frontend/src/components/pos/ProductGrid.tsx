@@ -29,8 +29,9 @@ export default function ProductGrid({ products, onSelect }: Props) {
           {/* Image */}
           {product.main_image_url ? (
             <img
-              src={product.main_image_url}
+              src={product.thumbnails?.card ?? product.main_image_url}
               alt={product.name}
+              loading="lazy"
               className="w-full h-24 object-cover rounded-xl mb-2 bg-slate-100"
             />
           ) : (
@@ -239,7 +239,7 @@ export default function ProductsPage() {
                   <td className="px-4 py-3">
                     <div className="flex items-center gap-3">
                       {p.main_image_url ? (
-                        <img src={p.main_image_url} className="w-10 h-10 rounded-xl object-cover border border-slate-100" alt="" />
+                        <img src={p.thumbnails?.list ?? p.main_image_url} loading="lazy" className="w-10 h-10 rounded-xl object-cover border border-slate-100" alt="" />
                       ) : (
                         <div className="w-10 h-10 bg-gradient-to-br from-slate-100 to-slate-200 rounded-xl flex items-center justify-center">
                           <Package className="w-5 h-5 text-slate-400" />
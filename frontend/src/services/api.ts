@@ -35,6 +35,7 @@ export const authApi = {
     form.append('password', password);
     return api.post('/auth/login', form);
   },
+  logout: () => api.post('/auth/logout'),
 };
 
 // ─── PRODUCTS ─────────────────────────────────────────────────
@@ -48,6 +48,7 @@ export interface Product {
   tax_rate: number;
   description?: string;
   main_image_url?: string;
+  thumbnails?: { list?: string; card?: string; detail?: string };
   min_stock_level: number;
   reorder_point: number;
   chemical_registration?: string;
@@ -0,0 +1,114 @@
+"""
+Shared helpers for the benchmark scripts in this folder
+- Run the FastAPI app in-process over ASGI (no server needed)
+- Seed synthetic products tagged with a code prefix, so reruns reuse them
+- Latency percentiles and a small result table
+
+Needs the backend requirements and DATABASE_URL pointing at a database with
+database/01_schema.sql + 02_seed.sql applied. Benchmarks write rows; use a
+scratch database, not a shop's live one.
+"""
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import httpx  # noqa: E402
+from sqlalchemy import select, insert  # noqa: E402
+
+from app.db.database import AsyncSessionLocal  # noqa: E402
+from app.models.models import Product, Stock, Warehouse  # noqa: E402
+
+ADMIN = {"username": "admin", "password": "admin1234"}
+
+
+@asynccontextmanager
+async def api_client(login: bool = True):
+    """httpx client bound to the app in-process, logged in as the seed admin."""
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench/api/v1", timeout=120) as client:
+        if login:
+            r = await client.post("/auth/login", data=ADMIN)
+            r.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+        yield client
+
+
+async def seed_products(
+    count: int, prefix: str = "BENCH", stock: int = 1_000_000, fields: Optional[Callable[[int], Dict]] = None,
+) -> List[uuid.UUID]:
+    """
+    Ids of count products coded <prefix>-000001..., inserting the missing
+    ones with plenty of stock in the default warehouse. fields(n) overrides
+    columns of product n (1-based) as it is inserted.
+    """
+    codes = [f"{prefix}-{i:06d}" for i in range(1, count + 1)]
+    numbers = {code: i for i, code in enumerate(codes, 1)}
+    async with AsyncSessionLocal() as db:
+        # By prefix: an IN list of 100k codes exceeds asyncpg's parameter limit
+        existing = {code: pid for code, pid in (await db.execute(
+            select(Product.code, Product.id).where(Product.code.like(f"{prefix}-%"))
+        )).all() if code in numbers}
+        missing = [c for c in codes if c not in existing]
+        if missing:
+            warehouse_id = (await db.execute(
+                select(Warehouse.id).where(Warehouse.is_active == True).order_by(Warehouse.code).limit(1)
+            )).scalar_one()
+            rows = [
+                {"id": uuid.uuid4(), "code": code, "name": f"สินค้าทดสอบ {code}", "name_en": f"Bench product {code}",
+                 "unit": "piece", "cost_price": 10, "selling_price": 25, "tax_rate": 7,
+                 **(fields(numbers[code]) if fields else {})}
+                for code in missing
+            ]
+            for i in range(0, len(rows), 5000):
+                await db.execute(insert(Product), rows[i:i + 5000])
+                await db.execute(insert(Stock), [
+                    {"id": uuid.uuid4(), "product_id": r["id"], "warehouse_id": warehouse_id, "quantity": stock}
+                    for r in rows[i:i + 5000]
+                ])
+            await db.commit()
+            existing.update({r["code"]: r["id"] for r in rows})
+    return [existing[c] for c in codes]
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """p50 / p99 / max in milliseconds."""
+    return {
+        "p50": percentile(samples, 50) * 1000,
+        "p99": percentile(samples, 99) * 1000,
+        "max": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence]) -> None:
+    cells = [[str(h) for h in headers]] + [
+        [f"{v:,.2f}" if isinstance(v, float) else str(v) for v in row] for row in rows
+    ]
+    widths = [max(len(r[i]) for r in cells) for i in range(len(headers))]
+    for n, row in enumerate(cells):
+        print("  ".join(c.rjust(w) for c, w in zip(row, widths)))
+        if n == 0:
+            print("  ".join("-" * w for w in widths))
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
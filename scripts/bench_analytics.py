@@ -0,0 +1,202 @@
+"""
+Benchmark: columnar sales analytics over 10M order lines
+Run: python scripts/bench_analytics.py [--lines 10000000] [--products 2000] [--runs 10] [--out /tmp/bench_sales_facts]
+
+Generates completed orders (4 lines each, skewed towards popular products,
+spread evenly over one year) as BANLY-... rows; reruns reuse them and add
+only what is missing. Exports them with export_sales_facts into --out, times
+loading the Parquet snapshot, then runs each report both ways, in ms:
+- sql:      the Postgres aggregation (the top-products route with
+            engine=sql; equivalent GROUP BY queries for the reports that
+            are columnar-only)
+- columnar: app.services.sales_analytics.SalesFacts on the loaded snapshot
+over the whole year and over its last 30 days.
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import and_, func, select, text
+from fastapi import Response
+
+from _bench import Timer, print_table, seed_products, summarize
+
+from app.api.v1.endpoints.reports import top_products_report
+from app.db.database import AsyncSessionLocal, engine
+from app.models.models import Category, OrderStatus, Product, SalesOrder, SalesOrderItem, Warehouse
+from app.services.date_range import between_days, local_date
+from app.services.sales_analytics import _load
+from app.services.sales_parquet import export_sales_facts
+
+PREFIX = "BANLY"
+LINES_PER_ORDER = 4
+YEAR_START, YEAR_END = date(2019, 1, 1), date(2019, 12, 31)
+TOP_N = 20
+WINDOW = 7
+
+# One transaction per day, in date order as a shop's history would be, so
+# the export batches (ordered by writing transaction) stay within a day or
+# two. Products are drawn through power(random(), 3) so a few sell far more
+# often than the rest.
+_GENERATE = text("""
+    WITH o AS (
+        INSERT INTO sales_orders (order_number, order_date, status, warehouse_id, payment_method, payment_status)
+        SELECT :prefix || '-' || g, CAST(:day AS timestamptz) + (8 * 3600 + g % 36000) * INTERVAL '1 second',
+               'completed', :warehouse_id, 'cash', 'confirmed'
+        FROM generate_series(CAST(:first AS INTEGER), CAST(:last AS INTEGER)) AS g
+        RETURNING id
+    )
+    INSERT INTO sales_order_items (order_id, product_id, quantity, unit_price, total_amount)
+    SELECT id, (CAST(:product_ids AS uuid[]))[k], qty, (CAST(:prices AS numeric[]))[k],
+           qty * (CAST(:prices AS numeric[]))[k]
+    FROM (
+        SELECT o.id, 1 + floor(power(random(), 3) * CAST(:n AS INTEGER))::int AS k,
+               (1 + floor(random() * 5))::numeric AS qty
+        FROM o CROSS JOIN generate_series(1, CAST(:lines AS INTEGER))
+        OFFSET 0
+    ) AS picked
+""")
+
+
+def product_fields(n: int, categories: list) -> dict:
+    return {"selling_price": 20 + n % 80, **({"category_id": categories[n % len(categories)]} if categories else {})}
+
+
+async def seed_orders(lines: int, products: int) -> int:
+    async with AsyncSessionLocal() as db:
+        categories = (await db.execute(select(Category.id).order_by(Category.name))).scalars().all()
+    product_ids = await seed_products(products, prefix=PREFIX, fields=lambda n: product_fields(n, categories))
+    prices = [product_fields(n, categories)["selling_price"] for n in range(1, products + 1)]
+
+    wanted = lines // LINES_PER_ORDER
+    days = (YEAR_END - YEAR_START).days + 1
+    async with AsyncSessionLocal() as db:
+        have = (await db.execute(
+            select(func.count()).select_from(SalesOrder).where(SalesOrder.order_number.like(f"{PREFIX}-%"))
+        )).scalar_one()
+        warehouse_id = (await db.execute(
+            select(Warehouse.id).where(Warehouse.is_active == True).order_by(Warehouse.code).limit(1)
+        )).scalar_one()
+        for d in range(days):
+            first, last = max(have, d * wanted // days) + 1, (d + 1) * wanted // days
+            if first > last:
+                continue
+            await db.execute(_GENERATE, {
+                "prefix": PREFIX, "day": YEAR_START + timedelta(days=d), "warehouse_id": warehouse_id,
+                "first": first, "last": last, "product_ids": product_ids, "prices": prices,
+                "n": products, "lines": LINES_PER_ORDER,
+            })
+            await db.commit()
+            if d % 30 == 29 or last == wanted:
+                print(f"  generated orders up to {last:,} of {wanted:,}")
+        if have < wanted:
+            await db.execute(text("ANALYZE sales_orders"))
+            await db.execute(text("ANALYZE sales_order_items"))
+            await db.commit()
+    return wanted
+
+
+def _completed_lines(query, date_from: date, date_to: date):
+    return query.join(SalesOrder, SalesOrderItem.order_id == SalesOrder.id).where(and_(
+        between_days(SalesOrder.order_date, date_from, date_to),
+        SalesOrder.status == OrderStatus.completed,
+    ))
+
+
+def sql_trend(date_from: date, date_to: date):
+    day = local_date(SalesOrder.order_date)
+    revenue = func.sum(SalesOrderItem.total_amount)
+    return _completed_lines(select(
+        day, func.count(func.distinct(SalesOrder.id)), func.count(), func.sum(SalesOrderItem.quantity), revenue,
+        func.avg(revenue).over(order_by=day, rows=(-(WINDOW - 1), 0)),
+    ).select_from(SalesOrderItem), date_from - timedelta(days=WINDOW - 1), date_to).group_by(day).order_by(day)
+
+
+def sql_abc(date_from: date, date_to: date):
+    revenue = func.sum(SalesOrderItem.total_amount)
+    return _completed_lines(select(
+        SalesOrderItem.product_id, func.sum(SalesOrderItem.quantity), revenue,
+        func.sum(revenue).over(order_by=(revenue.desc(), SalesOrderItem.product_id)) / func.sum(revenue).over(),
+    ).select_from(SalesOrderItem), date_from, date_to).group_by(SalesOrderItem.product_id).order_by(revenue.desc())
+
+
+def sql_categories(date_from: date, date_to: date):
+    revenue = func.sum(SalesOrderItem.total_amount)
+    return _completed_lines(select(
+        Category.name, func.count(), func.count(func.distinct(SalesOrderItem.product_id)),
+        func.sum(SalesOrderItem.quantity), revenue,
+    ).select_from(SalesOrderItem)
+        .join(Product, Product.id == SalesOrderItem.product_id)
+        .outerjoin(Category, Category.id == Product.category_id), date_from, date_to
+    ).group_by(Category.name).order_by(revenue.desc())
+
+
+async def time_sql(run_query, runs: int) -> list:
+    samples = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(runs + 1):
+            with Timer() as t:
+                await run_query(db)
+            samples.append(t.elapsed)
+    return samples[1:]
+
+
+def time_columnar(call, runs: int) -> list:
+    call()
+    samples = []
+    for _ in range(runs):
+        with Timer() as t:
+            call()
+        samples.append(t.elapsed)
+    return samples
+
+
+async def main(lines: int, products: int, runs: int, out: str) -> None:
+    orders = await seed_orders(lines, products)
+    with Timer() as t:
+        async with AsyncSessionLocal() as db:
+            exported = await export_sales_facts(db, out)
+            await db.commit()
+    print(f"Parquet export into {out}: {t.elapsed:,.1f}s ({exported})")
+    with Timer() as t:
+        facts = _load(Path(out))
+    print(f"Snapshot load: {t.elapsed:,.2f}s, {len(facts.day):,} lines")
+
+    def top_sql(date_from, date_to):
+        return lambda db: top_products_report(Response(), date_from, date_to, TOP_N, "revenue", "sql", db)
+
+    def rows_of(query):
+        return lambda db: db.execute(query)
+
+    ranges = {"year": (YEAR_START, YEAR_END), "30 days": (YEAR_END - timedelta(days=29), YEAR_END)}
+    rows = []
+    for label, (date_from, date_to) in ranges.items():
+        reports = {
+            f"top-{TOP_N}": (top_sql(date_from, date_to),
+                             lambda: facts.top_products(date_from, date_to, TOP_N, "revenue")),
+            "trend": (rows_of(sql_trend(date_from, date_to)),
+                      lambda: facts.daily_trend(date_from, date_to, WINDOW)),
+            "abc": (rows_of(sql_abc(date_from, date_to)),
+                    lambda: facts.abc_classes(date_from, date_to, 0.8, 0.95)),
+            "categories": (rows_of(sql_categories(date_from, date_to)),
+                           lambda: facts.category_breakdown(date_from, date_to)),
+        }
+        for name, (sql_call, columnar_call) in reports.items():
+            sql = summarize(await time_sql(sql_call, runs))
+            columnar = summarize(time_columnar(columnar_call, runs))
+            rows.append((name, label, sql["p50"], columnar["p50"], columnar["p99"], sql["p50"] / columnar["p50"]))
+    await engine.dispose()
+
+    print(f"Report latency, ms ({runs} runs, {orders:,} orders x {LINES_PER_ORDER} lines, {products:,} products)")
+    print_table(("report", "range", "sql p50", "columnar p50", "columnar p99", "speedup"), rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=10_000_000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--out", default="/tmp/bench_sales_facts")
+    args = parser.parse_args()
+    asyncio.run(main(args.lines, args.products, args.runs, args.out))
@@ -0,0 +1,87 @@
+"""
+Benchmark: CRC-16/CCITT-FALSE over EMVCo payloads
+Run: python scripts/bench_crc16.py [--calls 2000] [--runs 10]
+
+Checksums PromptPay payloads as promptpay_payload builds them (no
+database needed), plus a 512-character maximum-size payload, three ways:
+- bitwise:  the original bit-at-a-time loop from qr_service.crc16_ccitt
+- table:    emvco.crc16_table, one table lookup per character
+- crc_hqx:  binascii.crc_hqx on the latin-1 bytes, what emvco.crc16 uses
+            for ASCII payloads (encoding included)
+All three are checked to agree on every payload first. Reports
+microseconds per call.
+"""
+import argparse
+import binascii
+from decimal import Decimal
+
+from _bench import Timer, print_table, summarize
+
+from app.services.emvco import crc16_table
+from app.services.qr_service import promptpay_payload
+
+
+def bitwise_crc16(data: str) -> int:
+    """qr_service.crc16_ccitt as it was before the table-driven version."""
+    crc = 0xFFFF
+    for char in data:
+        crc ^= ord(char) << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc <<= 1
+            crc &= 0xFFFF
+    return crc
+
+
+def hqx_crc16(data: str) -> int:
+    return binascii.crc_hqx(data.encode("latin-1"), 0xFFFF)
+
+
+IMPLEMENTATIONS = {"bitwise": bitwise_crc16, "table": crc16_table, "crc_hqx": hqx_crc16}
+
+
+def make_payloads() -> dict:
+    """CRC input (payload without its 4 checksum digits) by kind."""
+    payloads = {
+        "static": promptpay_payload("0812345678"),
+        "amount": promptpay_payload("0812345678", Decimal("1290.50")),
+        "amount + ref": promptpay_payload("0105561234567", Decimal("1290.50"), "SO-20240115-000123"),
+    }
+    inputs = {kind: p[:-4] for kind, p in payloads.items()}
+    inputs["max (512)"] = (inputs["amount + ref"] * 8)[:508]
+    return inputs
+
+
+def measure(fn, data: str, calls: int, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        with Timer() as t:
+            for _ in range(calls):
+                fn(data)
+        samples.append(t.elapsed / calls)
+    return samples
+
+
+def main(calls: int, runs: int) -> None:
+    inputs = make_payloads()
+    for data in inputs.values():
+        assert len({fn(data) for fn in IMPLEMENTATIONS.values()}) == 1, data
+
+    rows = []
+    for kind, data in inputs.items():
+        # summarize reports ms; per-call samples * 1000 read as microseconds
+        us = {name: summarize(measure(fn, data, calls, runs))["p50"] * 1000 for name, fn in IMPLEMENTATIONS.items()}
+        rows.append((kind, len(data) + 4, *us.values(), us["bitwise"] / us["table"], us["bitwise"] / us["crc_hqx"]))
+
+    print(f"CRC-16 per call, us (p50 of {runs} runs x {calls:,} calls)")
+    print_table(("payload", "chars", *IMPLEMENTATIONS, "table speedup", "crc_hqx speedup"), rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.calls, args.runs)
@@ -0,0 +1,101 @@
+"""
+Benchmark: order creation latency by line count
+Run: python scripts/bench_create_order.py [--runs 30]
+
+Compares, for 1 / 10 / 50 / 200-line orders:
+- before: the original create_order (one db.get per line, one INSERT per item)
+- after:  sales.create_order (one product query, one bulk item insert)
+
+Both run the handler directly on a session, so HTTP overhead is excluded.
+Orders are created as pending and left in the database.
+"""
+import argparse
+import asyncio
+import uuid
+from decimal import Decimal
+
+from _bench import Timer, print_table, seed_products, summarize
+
+from fastapi import HTTPException
+from app.api.v1.endpoints import sales
+from app.api.v1.endpoints.sales import OrderCreate, OrderItemCreate
+from app.db.database import AsyncSessionLocal, engine
+from app.models.models import Product, SalesOrder, SalesOrderItem, OrderStatus
+
+SIZES = (1, 10, 50, 200)
+
+
+async def baseline_create_order(payload: OrderCreate, db) -> dict:
+    """create_order as it was before batching, kept here for comparison."""
+    order_items = []
+    subtotal = Decimal("0")
+    tax_total = Decimal("0")
+    for item in payload.items:
+        product = await db.get(Product, uuid.UUID(item.product_id))
+        if not product:
+            raise HTTPException(404, f"Product {item.product_id} not found")
+        unit_price = item.unit_price or product.selling_price
+        discount_amt = unit_price * item.quantity * (item.discount_percent / 100)
+        taxable = unit_price * item.quantity - discount_amt
+        tax_amt = taxable * (product.tax_rate / 100)
+        order_items.append(SalesOrderItem(
+            product_id=product.id, quantity=item.quantity, unit_price=unit_price,
+            discount_percent=item.discount_percent, discount_amount=discount_amt,
+            tax_rate=product.tax_rate, tax_amount=tax_amt, total_amount=taxable + tax_amt,
+        ))
+        subtotal += taxable
+        tax_total += tax_amt
+    discount_amount = subtotal * (payload.discount_percent / 100)
+    order = SalesOrder(
+        order_number=sales._generate_order_number(),
+        subtotal=subtotal, discount_percent=payload.discount_percent, discount_amount=discount_amount,
+        tax_amount=tax_total, total_amount=subtotal - discount_amount + tax_total, status=OrderStatus.pending,
+    )
+    db.add(order)
+    await db.flush()
+    for item in order_items:
+        item.order_id = order.id
+        db.add(item)
+    await db.commit()
+    await db.refresh(order)
+    return {"order_id": str(order.id)}
+
+
+async def current_create_order(payload: OrderCreate, db) -> dict:
+    return await sales.create_order(payload, idempotency_key=None, db=db)
+
+
+async def measure(handler, payload: OrderCreate, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        # A fresh session per order, as get_db gives each request
+        async with AsyncSessionLocal() as db:
+            with Timer() as t:
+                await handler(payload, db)
+        samples.append(t.elapsed)
+    return samples
+
+
+async def main(runs: int) -> None:
+    product_ids = await seed_products(max(SIZES))
+    rows = []
+    for size in SIZES:
+        payload = OrderCreate(items=[
+            OrderItemCreate(product_id=str(pid), quantity=Decimal("1")) for pid in product_ids[:size]
+        ])
+        # Warm the pool and statement caches before timing
+        await measure(current_create_order, payload, 2)
+        await measure(baseline_create_order, payload, 2)
+        before = summarize(await measure(baseline_create_order, payload, runs))
+        after = summarize(await measure(current_create_order, payload, runs))
+        rows.append((size, before["p50"], before["p99"], after["p50"], after["p99"], before["p50"] / after["p50"]))
+    await engine.dispose()
+
+    print(f"create_order latency, ms ({runs} runs per size)")
+    print_table(("lines", "before p50", "before p99", "after p50", "after p99", "speedup p50"), rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=30)
+    asyncio.run(main(parser.parse_args().runs))
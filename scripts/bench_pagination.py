@@ -0,0 +1,101 @@
+"""
+Benchmark: deep-page latency, offset vs cursor
+Run: python scripts/bench_pagination.py [--rows 100000] [--runs 20]
+
+Pages through GET /stock/transactions (newest first, 50 rows a page) and
+times pages 1 / 10 / 100 / 1000:
+- offset: ?offset=(page - 1) * 50, which scans and discards every earlier row
+- cursor: ?cursor= from the previous page's X-Next-Cursor header
+
+The stock ledger is padded with synthetic rows (reference_no BENCHPG-...)
+up to --rows; reruns reuse them.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import func, select, text
+
+from _bench import Timer, api_client, print_table, seed_products, summarize
+
+from app.db.database import AsyncSessionLocal, engine
+from app.models.models import StockTransaction, Warehouse
+from app.services.pagination import NEXT_CURSOR_HEADER
+
+PAGE_SIZE = 50
+PAGES = (1, 10, 100, 1000)
+
+
+async def seed_ledger(rows: int) -> None:
+    """Pad stock_transactions with synthetic adjustments up to rows entries."""
+    product_id = (await seed_products(1, prefix="BENCHPG"))[0]
+    async with AsyncSessionLocal() as db:
+        have = (await db.execute(
+            select(func.count()).select_from(StockTransaction).where(StockTransaction.reference_no.like("BENCHPG-%"))
+        )).scalar_one()
+        if have >= rows:
+            return
+        warehouse_id = (await db.execute(
+            select(Warehouse.id).where(Warehouse.is_active == True).order_by(Warehouse.code).limit(1)
+        )).scalar_one()
+        await db.execute(text("""
+            INSERT INTO stock_transactions (id, transaction_type, reference_no, product_id, warehouse_id,
+                                            quantity, before_quantity, after_quantity, created_at)
+            SELECT gen_random_uuid(), 'adjustment', 'BENCHPG-' || g, :product_id, :warehouse_id,
+                   1, 0, 1, NOW() - g * INTERVAL '1 second'
+            FROM generate_series(CAST(:start AS INTEGER), CAST(:stop AS INTEGER)) AS g
+        """), {"product_id": product_id, "warehouse_id": warehouse_id, "start": have + 1, "stop": rows})
+        await db.execute(text("ANALYZE stock_transactions"))
+        await db.commit()
+
+
+async def page_cursors(client, last_page: int) -> dict:
+    """Cursor that fetches each page in PAGES, found by walking the pages in order."""
+    cursors, cursor = {1: None}, None
+    for page in range(2, last_page + 1):
+        params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        r = await client.get("/stock/transactions", params=params)
+        r.raise_for_status()
+        cursor = r.headers[NEXT_CURSOR_HEADER]
+        if page in PAGES:
+            cursors[page] = cursor
+    return cursors
+
+
+async def measure(client, params: dict, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        with Timer() as t:
+            r = await client.get("/stock/transactions", params={"limit": PAGE_SIZE, **params})
+        r.raise_for_status()
+        assert len(r.json()) == PAGE_SIZE
+        samples.append(t.elapsed)
+    return samples
+
+
+async def main(rows: int, runs: int) -> None:
+    if rows < PAGE_SIZE * max(PAGES):
+        raise SystemExit(f"--rows must be at least {PAGE_SIZE * max(PAGES):,} to reach page {max(PAGES)}")
+    await seed_ledger(rows)
+    results = []
+    async with api_client() as client:
+        cursors = await page_cursors(client, max(PAGES))
+        for page in PAGES:
+            by_offset = {"offset": (page - 1) * PAGE_SIZE}
+            by_cursor = {"cursor": cursors[page]} if cursors[page] else {}
+            await measure(client, by_offset, 2)
+            await measure(client, by_cursor, 2)
+            offset = summarize(await measure(client, by_offset, runs))
+            cursor = summarize(await measure(client, by_cursor, runs))
+            results.append((page, offset["p50"], offset["p99"], cursor["p50"], cursor["p99"]))
+    await engine.dispose()
+
+    print(f"GET /stock/transactions latency, ms ({runs} runs per page, {PAGE_SIZE} rows a page, {rows:,}+ rows)")
+    print_table(("page", "offset p50", "offset p99", "cursor p50", "cursor p99"), results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.runs))
@@ -0,0 +1,160 @@
+"""
+Benchmark: POS product grid with 5,000 products
+Run: python scripts/bench_product_grid.py [--products 5000] [--runs 5] [--frames 60]
+
+Renders the same synthetic products in a 900x700 window (offscreen unless
+QT_QPA_PLATFORM is set; no backend needed):
+- before: one ProductCard QFrame per product in a QGridLayout, rebuilt on
+  every result, as POSTerminal._render_products did
+- after:  ui.product_grid.ProductGrid (QListView + delegate, diffed model)
+Reports, in ms:
+- load:   show all products and paint the first frame
+- search: narrow to a 10% result and back to all, painting each
+- scroll: one frame per viewport-height scroll step
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "desktop_app"))
+
+from _bench import Timer, print_table, summarize
+
+from PyQt6.QtWidgets import QApplication, QFrame, QGridLayout, QLabel, QScrollArea, QVBoxLayout, QWidget
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+
+from ui.product_grid import ProductGrid
+from ui.styles import PRODUCT_CARD_STYLE
+
+WINDOW_SIZE = (900, 700)
+
+
+def make_products(count: int) -> list:
+    return [
+        {"id": f"00000000-0000-0000-0000-{i:012d}", "code": f"BENCH-{i:06d}",
+         "name": f"ปุ๋ยเคมี สูตร 16-16-16 ขนาด {i} กก.", "selling_price": 129 + i % 50, "unit": "bag"}
+        for i in range(count)
+    ]
+
+
+class ProductCard(QFrame):
+    """The per-product card widget the grid replaced, kept here for comparison."""
+    clicked = pyqtSignal(dict)
+
+    def __init__(self, product: dict, parent=None):
+        super().__init__(parent)
+        self.product = product
+        self.setObjectName('product_card')
+        self.setFixedSize(160, 140)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setStyleSheet(PRODUCT_CARD_STYLE)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(4)
+
+        icon = QLabel('📦')
+        icon.setFont(QFont('', 28))
+        icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        icon.setFixedHeight(40)
+        layout.addWidget(icon)
+
+        name = QLabel(product.get('name', ''))
+        name.setFont(QFont('Sarabun', 11, QFont.Weight.Bold))
+        name.setStyleSheet('color: #1e293b;')
+        name.setWordWrap(True)
+        name.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        name.setMaximumHeight(42)
+        layout.addWidget(name)
+
+        price_label = QLabel(f"฿{float(product.get('selling_price', 0)):,.2f}/{product.get('unit', '')}")
+        price_label.setFont(QFont('Sarabun', 11, QFont.Weight.Bold))
+        price_label.setStyleSheet('color: #10b981;')
+        price_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(price_label)
+
+
+class CardGrid(QScrollArea):
+    """QScrollArea + QGridLayout of ProductCards, rebuilt on every result."""
+
+    def __init__(self):
+        super().__init__()
+        self.setWidgetResizable(True)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.grid_widget = QWidget()
+        self.grid_layout = QGridLayout(self.grid_widget)
+        self.setWidget(self.grid_widget)
+
+    def set_products(self, products: list) -> None:
+        while self.grid_layout.count():
+            item = self.grid_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+        cols = 4
+        for i, product in enumerate(products):
+            self.grid_layout.addWidget(ProductCard(product), i // cols, i % cols)
+
+
+def frame(app: QApplication, widget) -> None:
+    """Process pending layout/deletes, then paint synchronously."""
+    app.processEvents()
+    widget.repaint()
+
+
+def run(app: QApplication, make_grid, products: list, runs: int, frames: int) -> dict:
+    narrowed = products[::10]
+    load, search, scroll = [], [], []
+    for _ in range(runs):
+        grid = make_grid()
+        grid.resize(*WINDOW_SIZE)
+        grid.show()
+        frame(app, grid)
+        with Timer() as t:
+            grid.set_products(products)
+            frame(app, grid)
+        load.append(t.elapsed)
+
+        for result in (narrowed, products):
+            with Timer() as t:
+                grid.set_products(result)
+                frame(app, grid)
+            search.append(t.elapsed)
+
+        bar = grid.verticalScrollBar()
+        step = grid.viewport().height()
+        for n in range(1, frames + 1):
+            with Timer() as t:
+                bar.setValue(min(bar.maximum(), n * step))
+                frame(app, grid)
+            scroll.append(t.elapsed)
+        grid.close()
+        grid.deleteLater()
+        app.processEvents()
+    return {"load": summarize(load), "search": summarize(search), "scroll": summarize(scroll)}
+
+
+def main(count: int, runs: int, frames: int) -> None:
+    app = QApplication.instance() or QApplication(sys.argv)
+    products = make_products(count)
+    results = {"before": run(app, CardGrid, products, runs, frames),
+               "after": run(app, ProductGrid, products, runs, frames)}
+
+    print(f"Rendering {count:,} products in {WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}, ms "
+          f"({runs} runs, {frames} scroll frames each)")
+    rows = []
+    for phase in ("load", "search", "scroll"):
+        for name, stats in results.items():
+            rows.append((phase, name, stats[phase]["p50"], stats[phase]["p99"], stats[phase]["max"]))
+        rows.append((phase, "speedup p50", results["before"][phase]["p50"] / results["after"][phase]["p50"], "", ""))
+    print_table(("phase", "path", "p50", "p99", "max"), rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+    main(args.products, args.runs, args.frames)
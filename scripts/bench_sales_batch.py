@@ -0,0 +1,84 @@
+"""
+Benchmark: batch sale throughput
+Run: python scripts/bench_sales_batch.py [--orders 2000] [--lines 3]
+
+Sends the same number of completed cash sales through the API each way
+and reports orders per second:
+- single:        POST /sales/orders, one request per sale
+- single + pay:  POST /sales/orders then POST /sales/payment/initiate per
+                 sale, what the till sent before the batch endpoint
+- batch N:       POST /sales/orders/batch with N = 10 / 100 / 1000 sales
+                 per request, each with its own idempotency key
+Sales and their stock movements are left in the database.
+"""
+import argparse
+import asyncio
+import uuid
+
+from _bench import Timer, api_client, print_table, seed_products, summarize
+
+from app.db.database import engine
+
+BATCH_SIZES = (10, 100, 1000)
+
+
+def make_sale(product_ids: list, n: int, lines: int) -> dict:
+    return {"items": [
+        {"product_id": str(product_ids[(n + i) % len(product_ids)]), "quantity": 1} for i in range(lines)
+    ]}
+
+
+async def single(client, sales: list, pay: bool) -> list:
+    samples = []
+    for sale in sales:
+        with Timer() as t:
+            r = await client.post("/sales/orders", json=sale)
+            r.raise_for_status()
+            if pay:
+                r = await client.post("/sales/payment/initiate",
+                                      json={"order_id": r.json()["order_id"], "payment_method": "cash"})
+                r.raise_for_status()
+        samples.append(t.elapsed)
+    return samples
+
+
+async def batched(client, sales: list, size: int) -> list:
+    samples = []
+    for i in range(0, len(sales), size):
+        chunk = [{**sale, "idempotency_key": str(uuid.uuid4())} for sale in sales[i:i + size]]
+        with Timer() as t:
+            r = await client.post("/sales/orders/batch", json={"sales": chunk})
+            r.raise_for_status()
+        assert all(res["status"] == "created" for res in r.json()["results"]), r.text
+        samples.append(t.elapsed)
+    return samples
+
+
+async def main(orders: int, lines: int) -> None:
+    product_ids = await seed_products(200)
+    sales = [make_sale(product_ids, n, lines) for n in range(orders)]
+    paths = [("single", 1, lambda c: single(c, sales, pay=False)),
+             ("single + pay", 1, lambda c: single(c, sales, pay=True))]
+    paths += [(f"batch {size}", size, lambda c, size=size: batched(c, sales, size)) for size in BATCH_SIZES]
+
+    rows = []
+    async with api_client() as client:
+        # Warm the pool and statement caches before timing
+        await single(client, sales[:5], pay=True)
+        await batched(client, sales[:10], 10)
+        for name, size, run in paths:
+            samples = await run(client)
+            per_request = summarize(samples)
+            rows.append((name, size, orders / sum(samples), per_request["p50"], per_request["p99"]))
+    await engine.dispose()
+
+    print(f"Completed sales throughput ({orders:,} sales of {lines} lines per path)")
+    print_table(("path", "sales/request", "orders/s", "request p50 ms", "request p99 ms"), rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.lines))
@@ -0,0 +1,100 @@
+"""
+Benchmark: product search latency over 100k products
+Run: python scripts/bench_search.py [--products 100000] [--runs 50]
+
+Times GET /products?search=...&view=pos&limit=50 (what the POS search box
+sends) for four kinds of query:
+- thai:    Thai product / brand names (trigram on name)
+- english: English names (trigram on name_en)
+- code:    exact and prefix product codes
+- barcode: exact and prefix barcodes
+Products are seeded as BSRCH-000001... with generated Thai / English names
+and 885... barcodes; reruns reuse them. Needs the pg_trgm extension.
+"""
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import text
+
+from _bench import api_client, percentile, print_table, seed_products, Timer
+
+from app.db.database import AsyncSessionLocal, engine
+
+PREFIX = "BSRCH"
+LIMIT = 50
+
+KINDS = [
+    ("ปุ๋ยเคมี", "Chemical fertilizer"), ("ปุ๋ยอินทรีย์", "Organic fertilizer"), ("ยาฆ่าแมลง", "Insecticide"),
+    ("ยากำจัดวัชพืช", "Herbicide"), ("ยากำจัดเชื้อรา", "Fungicide"), ("เมล็ดพันธุ์ข้าว", "Rice seed"),
+    ("เมล็ดพันธุ์ข้าวโพด", "Corn seed"), ("อาหารสัตว์", "Animal feed"), ("สารปรับปรุงดิน", "Soil conditioner"),
+    ("ฮอร์โมนพืช", "Plant hormone"),
+]
+BRANDS = [("ตราหัววัว", "Bull"), ("ตรามงกุฎ", "Crown"), ("ตราช้าง", "Elephant"), ("ตราปลาวาฬ", "Whale"),
+          ("ตรากระต่าย", "Rabbit"), ("ตราเรือใบ", "Sailboat"), ("ตราดาว", "Star")]
+FORMULAS = ["15-15-15", "16-16-16", "46-0-0", "21-0-0", "13-13-21", "0-0-60"]
+SIZES = [1, 5, 25, 50]
+
+QUERIES = {
+    "thai": ["ปุ๋ยเคมี", "ยาฆ่าแมลง", "เมล็ดพันธุ์ข้าว", "ตราช้าง", "ฮอร์โมน", "ปุ๋ยอินทรีย์ ตรามงกุฎ"],
+    "english": ["fertilizer", "insecticide", "rice seed", "Elephant", "hormone", "Crown organic"],
+}
+
+
+def product_fields(n: int) -> dict:
+    kind_th, kind_en = KINDS[n % len(KINDS)]
+    brand_th, brand_en = BRANDS[n // len(KINDS) % len(BRANDS)]
+    formula, size = FORMULAS[n % len(FORMULAS)], SIZES[n % len(SIZES)]
+    return {
+        "name": f"{kind_th} {brand_th} สูตร {formula} ขนาด {size} กก.",
+        "name_en": f"{brand_en} {kind_en} {formula} {size} kg",
+        "barcode": f"885{n:010d}",
+    }
+
+
+def code_queries(count: int, rng: random.Random) -> dict:
+    picks = [rng.randint(1, count) for _ in range(6)]
+    return {
+        # Exact codes, and prefixes matching ten codes each
+        "code": [f"{PREFIX}-{n:06d}" for n in picks[:3]] + [f"{PREFIX}-{n:06d}"[:-1] for n in picks[3:]],
+        "barcode": [f"885{n:010d}" for n in picks[:3]] + [f"885{n:010d}"[:-1] for n in picks[3:]],
+    }
+
+
+async def measure(client, terms: list, runs: int) -> list:
+    samples = []
+    for i in range(runs):
+        params = {"search": terms[i % len(terms)], "view": "pos", "limit": LIMIT}
+        with Timer() as t:
+            r = await client.get("/products", params=params)
+        r.raise_for_status()
+        assert r.json(), f"no results for {params['search']!r}"
+        samples.append(t.elapsed)
+    return samples
+
+
+async def main(count: int, runs: int) -> None:
+    await seed_products(count, prefix=PREFIX, fields=product_fields)
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("ANALYZE products"))
+        await db.commit()
+
+    queries = {**QUERIES, **code_queries(count, random.Random(42))}
+    results = []
+    async with api_client() as client:
+        for kind, terms in queries.items():
+            await measure(client, terms, len(terms))
+            samples = [s * 1000 for s in await measure(client, terms, runs)]
+            results.append((kind, percentile(samples, 50), percentile(samples, 95), percentile(samples, 99)))
+    await engine.dispose()
+
+    print(f"GET /products?search= latency, ms ({runs} runs per kind, {count:,}+ products, limit {LIMIT})")
+    print_table(("query", "p50", "p95", "p99"), results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.runs))
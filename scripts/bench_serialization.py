@@ -0,0 +1,81 @@
+"""
+Benchmark: serializing a GET /products page
+Run: python scripts/bench_serialization.py [--products 5000] [--runs 20]
+
+Encodes the same synthetic products (no database needed):
+- before: ORM objects through jsonable_encoder + JSONResponse, as the list
+  endpoints returned them
+- after:  PRODUCT_LIST_FIELDS rows through ORJSONResponse
+Both bodies are checked to decode to the same rows first.
+"""
+import argparse
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from _bench import Timer, print_table, summarize
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.core.serialization import ORJSONResponse
+from app.models.models import Product
+from app.services.serializers import PRODUCT_LIST_FIELDS
+
+
+def make_products(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        Product(
+            id=uuid.uuid4(), code=f"BENCH-{i:06d}", barcode=f"885{i:010d}", qr_code=None,
+            name=f"ปุ๋ยเคมี สูตร 16-16-16 ขนาด {i} กก.", name_en=f"Fertilizer 16-16-16 {i} kg",
+            category_id=uuid.uuid4(), supplier_id=uuid.uuid4(), unit="bag", unit_per_pack=Decimal("1.000"),
+            cost_price=Decimal("100.50"), selling_price=Decimal("129.00"), min_selling_price=None,
+            tax_rate=Decimal("7.00"), description="ปุ๋ยสำหรับนาข้าวและพืชไร่", specifications={"N": 16, "P": 16, "K": 16},
+            main_image_url=None, thumbnails={}, image_urls=[], min_stock_level=5, max_stock_level=1000,
+            reorder_point=10, is_active=True, chemical_registration=None, expiry_tracking=False,
+            created_by=None, created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(encode, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        with Timer() as t:
+            encode()
+        samples.append(t.elapsed)
+    return samples
+
+
+def main(count: int, runs: int) -> None:
+    products = make_products(count)
+    rows = [tuple(getattr(p, key) for key in PRODUCT_LIST_FIELDS.keys) for p in products]
+
+    def before() -> bytes:
+        return JSONResponse(jsonable_encoder(products)).body
+
+    def after() -> bytes:
+        return ORJSONResponse(PRODUCT_LIST_FIELDS.rows(rows)).body
+
+    old, new = json.loads(before()), json.loads(after())
+    assert [{k: r[k] for k in PRODUCT_LIST_FIELDS.keys} for r in old] == new, "bodies differ"
+
+    results = []
+    for name, encode in (("before", before), ("after", after)):
+        measure(encode, 2)
+        stats = summarize(measure(encode, runs))
+        results.append((name, stats["p50"], stats["p99"], len(encode()) // 1024))
+    results.append(("speedup p50", results[0][1] / results[1][1], "", ""))
+
+    print(f"Serializing {count:,} products, ms ({runs} runs)")
+    print_table(("path", "p50", "p99", "body KiB"), results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    main(args.products, args.runs)
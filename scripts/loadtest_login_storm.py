@@ -0,0 +1,94 @@
+"""
+Load test: scan latency during a login storm (shift change)
+Run: python scripts/loadtest_login_storm.py [--logins 30] [--seconds 3]
+
+A scan loop calls GET /products/scan back to back, first alone for
+--seconds, then while --logins concurrent logins run. Each login is one
+bcrypt verification. Scan latency is reported for:
+- before: verify_password called directly in the login handler, blocking
+  the event loop, as auth.login used to
+- after:  verify_password_async on the password-hash executor
+  (PASSWORD_HASH_WORKERS threads)
+"""
+import argparse
+import asyncio
+
+from _bench import ADMIN, Timer, api_client, print_table, seed_products, summarize
+
+from app.api.v1.endpoints import auth
+from app.core.config import settings
+from app.core.security import verify_password
+from app.db.database import engine
+
+
+async def inline_verify_password(plain_password: str, hashed_password: str) -> bool:
+    """The pre-executor behaviour: bcrypt runs on the event loop."""
+    return verify_password(plain_password, hashed_password)
+
+
+async def scan_loop(client, code: str, stop: asyncio.Event) -> list:
+    samples = []
+    while not stop.is_set():
+        with Timer() as t:
+            r = await client.get("/products/scan", params={"code": code})
+        r.raise_for_status()
+        samples.append(t.elapsed)
+        await asyncio.sleep(0)
+    return samples
+
+
+async def scan_while(client, code: str, work) -> tuple:
+    """Scan latencies and wall time while awaiting work()."""
+    stop = asyncio.Event()
+    scanner = asyncio.create_task(scan_loop(client, code, stop))
+    with Timer() as t:
+        await work()
+    stop.set()
+    return await scanner, t.elapsed
+
+
+async def login_storm(client, logins: int) -> None:
+    responses = await asyncio.gather(*[client.post("/auth/login", data=ADMIN) for _ in range(logins)])
+    for r in responses:
+        r.raise_for_status()
+
+
+async def run(client, code: str, logins: int, seconds: float) -> list:
+    idle, _ = await scan_while(client, code, lambda: asyncio.sleep(seconds))
+    storm, elapsed = await scan_while(client, code, lambda: login_storm(client, logins))
+    return [("idle", len(idle), *summarize(idle).values(), None),
+            ("storm", len(storm), *summarize(storm).values(), elapsed)]
+
+
+async def main(logins: int, seconds: float) -> None:
+    product_id = (await seed_products(1, prefix="BENCHSCAN"))[0]
+    rows = []
+    async with api_client() as client:
+        code = (await client.get(f"/products/{product_id}")).json()["code"]
+        await client.get("/products/scan", params={"code": code})
+
+        original = auth.verify_password_async
+        auth.verify_password_async = inline_verify_password
+        try:
+            for phase, *stats in await run(client, code, logins, seconds):
+                rows.append(("before", phase, *stats))
+        finally:
+            auth.verify_password_async = original
+        for phase, *stats in await run(client, code, logins, seconds):
+            rows.append(("after", phase, *stats))
+    await engine.dispose()
+
+    print(f"GET /products/scan latency, ms, during {logins} concurrent logins "
+          f"(PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS})")
+    print_table(
+        ("login", "phase", "scans", "p50", "p99", "max", "storm s"),
+        [(*r[:-1], "" if r[-1] is None else f"{r[-1]:.2f}") for r in rows],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=3.0, help="idle scan phase length")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.seconds))